@@ -20,12 +20,17 @@ class Settings(BaseSettings):
     # ── Orchestrator ───────────────────────────────────────────────────
     batch_size: int = 10
     stage_b_max_tokens: int = 65536
+    prompt_compact_analyses: bool = True  # columnar analyses/plan in planning + writing prompts
 
     # ── Supabase ──────────────────────────────────────────────────────────
     supabase_url: str = ""
     supabase_service_key: str = ""
     supabase_jwt_secret: str = ""       # Legacy HS256 (optional)
     supabase_jwks_url: str = ""         # New ES256 JWKS endpoint
+    supabase_max_connections: int = 20  # pooled PostgREST connections (HTTP/2)
+    supabase_http2: bool = True
+    profile_cache_ttl_seconds: int = 30  # per worker; profile writes invalidate locally
+    profile_cache_max_entries: int = 1000
 
     # ── Stripe ────────────────────────────────────────────────────────────
     stripe_api_key: str = ""
@@ -41,10 +46,43 @@ class Settings(BaseSettings):
     paypal_client_secret: str = ""
     paypal_sandbox: bool = True    # env: PAYPAL_SANDBOX — set False for production
 
+    # ── PDF export ───────────────────────────────────────────────────────
+    pdf_default_profile: str = "print"   # print | screen | preview — used when a request names none
+    pdf_workers: int = 2                 # concurrent Chromium renders
+    pdf_queue_max: int = 20              # waiting exports before new ones get 503
+    pdf_artifact_dir: str = ""           # finished PDFs + token index; empty → system temp dir. Share across workers
+    pdf_artifact_ttl_seconds: int = 600  # download tokens expire after 10 minutes
+
+    # ── Executors ────────────────────────────────────────────────────────
+    executor_cpu_image_workers: int = 0  # image encode / scoring threads; 0 → min(8, CPU count)
+    executor_io_db_workers: int = 16     # blocking Supabase and disk calls
+    executor_stt_workers: int = 1        # concurrent Whisper transcriptions
+
+    # ── Admin dashboard ──────────────────────────────────────────────────
+    admin_metric_ttls: dict[str, int] = {}   # per-metric TTL overrides (s), e.g. {"dashboard_stats": 30}
+    admin_metric_stale_factor: float = 10    # serve stale values up to TTL × factor while refreshing
+
+    # ── Drafts ───────────────────────────────────────────────────────────
+    draft_photo_upload_concurrency: int = 6    # parallel storage uploads per request
+
+    # ── Marketplace ──────────────────────────────────────────────────────
+    marketplace_refresh_seconds: int = 300     # catalogue snapshot reload interval
+    marketplace_cache_max_age: int = 60        # Cache-Control max-age for catalogue responses
+
+    # ── Analytics events ─────────────────────────────────────────────────
+    event_buffer_max_rows: int = 5000          # rows held in memory before spilling to disk
+    event_flush_rows: int = 200                # bulk insert size
+    event_flush_interval_seconds: float = 2.0
+    event_spill_dir: str = ""                  # empty → system temp dir
+
     # ── Sessions ─────────────────────────────────────────────────────────
     session_ttl_seconds: int = 1800      # 30 minutes
     session_max_count: int = 100
 
+    # ── Metrics ──────────────────────────────────────────────────────────
+    metrics_enabled: bool = False              # serve Prometheus text on /metrics (opt in: it exposes load and usage)
+    metrics_token: str = ""                    # if set, /metrics requires "Authorization: Bearer <token>"
+
     # ── Server ─────────────────────────────────────────────────────────────
     frontend_url: str = "http://localhost:5173"
     cors_origins: list[str] = ["http://localhost:5173"]
@@ -56,7 +56,7 @@ def get_image_enhancer(settings: Settings = Depends(get_settings)) -> AbstractIm
 
 @lru_cache
 def get_prompt_builder() -> AbstractPromptBuilder:
-    return MemoryBookPromptBuilder()
+    return MemoryBookPromptBuilder(compact_analyses=get_settings().prompt_compact_analyses)
 
 
 @lru_cache
@@ -66,7 +66,8 @@ def get_response_parser() -> AbstractResponseParser:
 
 @lru_cache
 def get_pdf_generator() -> AbstractPdfGenerator:
-    return PlaywrightPdfGenerator()
+    settings = get_settings()
+    return PlaywrightPdfGenerator(default_profile=settings.pdf_default_profile)
 
 
 def get_image_comparator(settings: Settings = Depends(get_settings)) -> ImageComparator:
@@ -99,7 +100,12 @@ def get_orchestrator(
 @lru_cache
 def get_supabase_service() -> SupabaseService:
     settings = get_settings()
-    return SupabaseService(url=settings.supabase_url, service_key=settings.supabase_service_key)
+    return SupabaseService(
+        url=settings.supabase_url,
+        service_key=settings.supabase_service_key,
+        max_connections=settings.supabase_max_connections,
+        http2=settings.supabase_http2,
+    )
 
 
 @lru_cache
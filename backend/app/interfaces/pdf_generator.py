@@ -18,3 +18,18 @@ class AbstractPdfGenerator(ABC):
     ) -> bytes:
         """Generate PDF bytes from a book draft, photos, and template config."""
         ...
+
+    @abstractmethod
+    async def render_page_images(
+        self,
+        book: MemoryBookDraft,
+        photo_data: dict[int, bytes],
+        page_indices: list[int],
+        design_scale: dict | None = None,
+        photo_analyses: list[dict] | None = None,
+        overrides: dict | None = None,
+        image_format: str = "webp",
+        width_px: int = 480,
+    ) -> list:
+        """Render selected pages to thumbnail images (one per index, in order)."""
+        ...
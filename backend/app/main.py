@@ -1,4 +1,6 @@
+import asyncio
 import base64
+import hmac
 import json
 import time
 import uuid
@@ -6,14 +8,26 @@ import uuid
 import structlog
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
-from app.dependencies import get_settings
+from app.dependencies import get_settings, get_supabase_service
+from app.middleware.auth import start_jwks_refresh, stop_jwks_refresh
 from app.logging_config import setup_logging
 from app.routers import book, stt, templates, payments, marketplace, profile, usage, contact, referral, drafts, events
 from app.routers.admin import dashboard as admin_dashboard, users as admin_users, revenue as admin_revenue, content as admin_content, system as admin_system
-from app.services.playwright_pdf_generator import shutdown_browser
+from app.pdf_templates.font_subsetting import warm_font_subsets
+from app.prompts.yaml_loader import get_prompt_registry
+from app.services.playwright_pdf_generator import preload_templates, shutdown_browser
+from app.services.pdf_job_queue import init_pdf_job_queue, get_pdf_job_queue
 from app.services.session_store import init_session_store, get_session_store
+from app.services.print_derivatives import purge_stale_print_derivatives
+from app.services.pdf_artifact_store import get_pdf_artifact_store, init_pdf_artifact_store
+from app.services.aggregate_cache import init_aggregate_cache
+from app.services.event_buffer import get_event_buffer, init_event_buffer
+from app.services.marketplace_catalog import get_marketplace_catalog, init_marketplace_catalog
+from app.services.profile_cache import get_profile_cache, init_profile_cache, profile_request_scope
+from app.services.executors import CPU_IMAGE, get_executor, get_executor_registry, init_executor_registry, shutdown_executors
+from app.services.metrics import get_metrics, register_runtime_gauges
 
 settings = get_settings()
 
@@ -78,7 +92,8 @@ async def request_context_middleware(request: Request, call_next):
     t0 = time.perf_counter()
 
     try:
-        response = await call_next(request)
+        with profile_request_scope():
+            response = await call_next(request)
     except Exception:
         # Ensure unhandled exceptions still get a proper JSON response
         # (so CORSMiddleware can add CORS headers to it)
@@ -112,29 +127,100 @@ async def generic_exception_handler(request: Request, exc: Exception):
 _start_time = time.time()
 
 
+def _log_font_warm_failure(future: asyncio.Future) -> None:
+    # Not fatal: exports build any missing subset themselves
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("font_warm_failed", exc_info=future.exception())
+
+
 @app.on_event("startup")
 async def on_startup():
+    init_profile_cache(
+        ttl_seconds=settings.profile_cache_ttl_seconds,
+        max_entries=settings.profile_cache_max_entries,
+    )
+    init_executor_registry(
+        cpu_image_workers=settings.executor_cpu_image_workers,
+        io_db_workers=settings.executor_io_db_workers,
+        stt_workers=settings.executor_stt_workers,
+    )
     store = init_session_store(
         ttl_seconds=settings.session_ttl_seconds,
         max_sessions=settings.session_max_count,
     )
     store.start_cleanup_task()
     logger.info("session_store_started", ttl=settings.session_ttl_seconds, max=settings.session_max_count)
+    purged = purge_stale_print_derivatives(settings.session_ttl_seconds)
+    if purged:
+        logger.info("stale_print_derivatives_purged", count=purged)
+    init_pdf_artifact_store(
+        directory=settings.pdf_artifact_dir,
+        ttl_seconds=settings.pdf_artifact_ttl_seconds,
+    ).start_cleanup_task()
+    start_jwks_refresh()
+    init_aggregate_cache(ttls=settings.admin_metric_ttls, stale_factor=settings.admin_metric_stale_factor)
+    supa = get_supabase_service()
+    init_event_buffer(
+        insert=supa.db.insert if supa.db else None,
+        max_rows=settings.event_buffer_max_rows,
+        flush_rows=settings.event_flush_rows,
+        flush_interval=settings.event_flush_interval_seconds,
+        spill_dir=settings.event_spill_dir,
+    ).start()
+    init_marketplace_catalog(
+        load=supa.list_marketplace_designs,
+        refresh_interval=settings.marketplace_refresh_seconds,
+        cache_max_age=settings.marketplace_cache_max_age,
+    ).start()
+    preload_templates()
+    get_prompt_registry()
+    # Font subsets take ~1s each to build; do it off the event loop before the first export
+    app.state.font_warm = get_executor(CPU_IMAGE).run(warm_font_subsets)
+    app.state.font_warm.add_done_callback(_log_font_warm_failure)
+    init_pdf_job_queue(workers=settings.pdf_workers, max_queued=settings.pdf_queue_max).start()
+    logger.info("pdf_job_queue_started", workers=settings.pdf_workers, max_queued=settings.pdf_queue_max)
+    register_runtime_gauges()
+    if settings.metrics_enabled and not settings.metrics_token:
+        logger.warning("metrics_endpoint_unauthenticated", hint="set METRICS_TOKEN unless /metrics is only reachable internally")
 
 
 @app.on_event("shutdown")
 async def on_shutdown():
+    stop_jwks_refresh()
+    get_marketplace_catalog().stop()
     get_session_store().stop_cleanup_task()
+    get_pdf_artifact_store().stop_cleanup_task()
+    await get_pdf_job_queue().stop()
     await shutdown_browser()
+    await get_event_buffer().stop()
+    await get_supabase_service().aclose()
+    await shutdown_executors()
 
 
 @app.get("/api/health")
 async def health():
-    from app.routers.book import _pdf_store
     return {
         "status": "ok",
         "service": "Keepsqueak Memory Book API",
         "uptime_s": round(time.time() - _start_time),
-        "pdf_store_count": len(_pdf_store),
+        "pdf_store_count": await get_pdf_artifact_store().count(),
         "session_count": get_session_store().count,
+        "profile_cache_entries": get_profile_cache().size,
+        "event_buffer": get_event_buffer().stats(),
+        "marketplace_catalog": get_marketplace_catalog().stats(),
+        "pdf_jobs_queued": get_pdf_job_queue().queued_count,
+        "pdf_jobs_running": get_pdf_job_queue().running_count,
+        "executors": get_executor_registry().stats(),
     }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint."""
+    if not settings.metrics_enabled:
+        return Response(status_code=404)
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+            return Response(status_code=401)
+    return PlainTextResponse(get_metrics().render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -24,7 +24,7 @@ async def require_admin(
     if not user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
 
-    profile = await supa.get_profile(user_id)
+    profile = await supa.get_profile(user_id, fresh=True)
     if not profile:
         logger.warning("require_admin_no_profile", user_id=user_id)
         raise HTTPException(status_code=403, detail="Profile not found")
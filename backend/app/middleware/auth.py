@@ -1,19 +1,24 @@
-import json
+import asyncio
+import hashlib
 import time
-import urllib.request
+from collections import OrderedDict
 from functools import lru_cache
 
+import httpx
 import structlog
 from fastapi import Request, HTTPException
 from jose import jwt, JWTError, jwk
-from jose.utils import base64url_decode
 
 from app.config import Settings
 
 logger = structlog.get_logger()
 
 _JWKS_TTL_SECONDS = 3600  # 1 hour
-_jwks_cache: dict[str, tuple[float, dict]] = {}
+_JWKS_REFRESH_MARGIN = 300  # refresh in the background 5 minutes before expiry
+_JWKS_RETRY_SECONDS = 60  # after a failed fetch, and between unknown-kid refreshes
+_JWKS_FETCH_TIMEOUT = 10
+
+_CLAIMS_CACHE_MAX = 10_000
 
 
 @lru_cache
@@ -21,40 +26,165 @@ def _get_settings() -> Settings:
     return Settings()
 
 
-def _fetch_jwks(jwks_url: str) -> dict:
-    """Fetch JWKS public keys from Supabase with a 1-hour TTL cache."""
-    now = time.monotonic()
-    cached = _jwks_cache.get(jwks_url)
-    if cached and (now - cached[0]) < _JWKS_TTL_SECONDS:
-        return cached[1]
+def _jwks_url(settings: Settings) -> str:
+    if settings.supabase_jwks_url:
+        return settings.supabase_jwks_url
+    # Derive from supabase_url
+    base = settings.supabase_url.rstrip("/")
+    return f"{base}/auth/v1/.well-known/jwks.json" if base else ""
 
-    logger.info("jwks_fetch_start", jwks_url=jwks_url)
-    try:
-        resp = urllib.request.urlopen(jwks_url, timeout=10)
-        data = json.loads(resp.read())
-        _jwks_cache[jwks_url] = (now, data)
-        logger.info("jwks_fetch_success", num_keys=len(data.get("keys", [])))
-        return data
-    except Exception:
-        logger.error("jwks_fetch_failed", jwks_url=jwks_url, exc_info=True)
-        # Return stale cache if available, otherwise empty
-        if cached:
-            return cached[1]
-        return {"keys": []}
-
-
-def _decode_token(token: str) -> dict:
-    """Decode and verify a Supabase JWT using JWKS (ES256)."""
+
+# ── JWKS ────────────────────────────────────────────────────────────────
+
+class _JwksKeySet:
+    """Signing keys from one JWKS URL, indexed by ``kid`` and refreshed in the background.
+
+    Requests only wait on the network for the very first fetch, and for a
+    ``kid`` not seen yet (key rotation; at most once per _JWKS_RETRY_SECONDS).
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._keys: dict[str | None, object] = {}   # kid → constructed jose key
+        self._first_key: object | None = None
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get(self, kid: str | None):
+        """Signing key for ``kid``, or the first key when there is no match (single-key setups)."""
+        if not self._keys:
+            await self._refresh()
+        elif time.monotonic() - self._fetched_at > _JWKS_TTL_SECONDS - _JWKS_REFRESH_MARGIN:
+            self._schedule_refresh()
+        key = self._keys.get(kid) if kid is not None else None
+        if key is None and kid is not None and time.monotonic() - self._last_attempt > _JWKS_RETRY_SECONDS:
+            await self._refresh()  # possibly a rotated key
+            key = self._keys.get(kid)
+        return key or self._first_key
+
+    def start_refresh_task(self) -> None:
+        """Keep the keys fresh with a background loop. Call once at app startup."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    def stop_refresh_task(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+
+    # ── Private ──────────────────────────────────────────────────────────
+
+    def _schedule_refresh(self) -> None:
+        if (self._refresh_task is None or self._refresh_task.done()) and not self._lock.locked():
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        requested = time.monotonic()
+        async with self._lock:
+            if self._last_attempt >= requested:
+                return  # another caller fetched while we waited for the lock
+            self._last_attempt = time.monotonic()
+            logger.info("jwks_fetch_start", jwks_url=self.url)
+            try:
+                async with httpx.AsyncClient(timeout=_JWKS_FETCH_TIMEOUT) as client:
+                    resp = await client.get(self.url)
+                    resp.raise_for_status()
+                    data = resp.json()
+            except Exception:
+                # Keep serving the stale keys, if any
+                logger.error("jwks_fetch_failed", jwks_url=self.url, exc_info=True)
+                return
+            self._index(data.get("keys", []))
+            self._fetched_at = time.monotonic()
+            logger.info("jwks_fetch_success", num_keys=len(self._keys))
+
+    def _index(self, raw_keys: list[dict]) -> None:
+        keys: dict[str | None, object] = {}
+        first = None
+        for raw in raw_keys:
+            try:
+                key = jwk.construct(raw, raw.get("alg") or "ES256")
+            except Exception:
+                logger.warning("jwks_key_unusable", kid=raw.get("kid"), kty=raw.get("kty"))
+                continue
+            keys[raw.get("kid")] = key
+            first = first or key
+        if keys:
+            self._keys, self._first_key = keys, first
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self._refresh()
+                fresh = bool(self._keys) and time.monotonic() - self._fetched_at < _JWKS_RETRY_SECONDS
+                await asyncio.sleep(_JWKS_TTL_SECONDS - _JWKS_REFRESH_MARGIN if fresh else _JWKS_RETRY_SECONDS)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.warning("jwks_refresh_error", exc_info=True)
+                await asyncio.sleep(_JWKS_RETRY_SECONDS)
+
+
+_key_sets: dict[str, _JwksKeySet] = {}
+
+
+def _get_key_set(url: str) -> _JwksKeySet:
+    key_set = _key_sets.get(url)
+    if key_set is None:
+        key_set = _key_sets[url] = _JwksKeySet(url)
+    return key_set
+
+
+def start_jwks_refresh() -> None:
+    """Prefetch and keep refreshing the JWKS (no-op for HS256 or unconfigured auth)."""
     settings = _get_settings()
+    url = _jwks_url(settings)
+    if url and not settings.supabase_jwt_secret:
+        _get_key_set(url).start_refresh_task()
 
-    jwks_url = settings.supabase_jwks_url
-    if not jwks_url:
-        # Derive from supabase_url
-        base = settings.supabase_url.rstrip("/")
-        if base:
-            jwks_url = f"{base}/auth/v1/.well-known/jwks.json"
-        else:
-            raise HTTPException(status_code=500, detail="Auth not configured")
+
+def stop_jwks_refresh() -> None:
+    for key_set in _key_sets.values():
+        key_set.stop_refresh_task()
+
+
+# ── Verified claims cache ────────────────────────────────────────────────
+
+# sha256(token) → (exp, claims). Only tokens that passed verification get in,
+# and entries are served only until the token's own expiry.
+_claims_cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+
+def _cached_claims(token_hash: bytes) -> dict | None:
+    entry = _claims_cache.get(token_hash)
+    if entry is None:
+        return None
+    exp, claims = entry
+    if time.time() >= exp:
+        del _claims_cache[token_hash]
+        return None
+    _claims_cache.move_to_end(token_hash)
+    return dict(claims)  # callers add keys (role, profile) to the user dict
+
+
+def _cache_claims(token_hash: bytes, claims: dict) -> None:
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        return
+    _claims_cache[token_hash] = (float(exp), dict(claims))
+    while len(_claims_cache) > _CLAIMS_CACHE_MAX:
+        _claims_cache.popitem(last=False)
+
+
+async def _decode_token(token: str) -> dict:
+    """Verify a Supabase JWT (JWKS / ES256, or legacy HS256), with verified claims cached until exp."""
+    token_hash = hashlib.sha256(token.encode()).digest()
+    cached = _cached_claims(token_hash)
+    if cached is not None:
+        return cached
+
+    settings = _get_settings()
 
     # Fallback: if old jwt_secret is set, use HS256
     if settings.supabase_jwt_secret:
@@ -66,16 +196,15 @@ def _decode_token(token: str) -> dict:
                 audience="authenticated",
             )
             logger.info("jwt_decoded_hs256", user_id=payload.get("sub"))
-            return payload
         except JWTError:
             logger.warning("jwt_hs256_verification_failed", exc_info=True)
             raise HTTPException(status_code=401, detail="Invalid or expired token")
+        _cache_claims(token_hash, payload)
+        return payload
 
-    # New JWKS-based verification (ES256)
-    jwks = _fetch_jwks(jwks_url)
-    keys = jwks.get("keys", [])
-    if not keys:
-        raise HTTPException(status_code=500, detail="No signing keys available")
+    jwks_url = _jwks_url(settings)
+    if not jwks_url:
+        raise HTTPException(status_code=500, detail="Auth not configured")
 
     # Get the kid from the token header
     try:
@@ -86,16 +215,9 @@ def _decode_token(token: str) -> dict:
     kid = unverified_header.get("kid")
     alg = unverified_header.get("alg", "ES256")
 
-    # Find matching key
-    signing_key = None
-    for key in keys:
-        if key.get("kid") == kid:
-            signing_key = key
-            break
-
-    if not signing_key:
-        # Try first key if no kid match (single key setup)
-        signing_key = keys[0]
+    signing_key = await _get_key_set(jwks_url).get(kid)
+    if signing_key is None:
+        raise HTTPException(status_code=500, detail="No signing keys available")
 
     try:
         payload = jwt.decode(
@@ -105,10 +227,11 @@ def _decode_token(token: str) -> dict:
             audience="authenticated",
         )
         logger.info("jwt_decoded_jwks", user_id=payload.get("sub"), alg=alg)
-        return payload
     except JWTError:
         logger.warning("jwt_jwks_verification_failed", alg=alg, kid=kid, exc_info=True)
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    _cache_claims(token_hash, payload)
+    return payload
 
 
 async def get_current_user(request: Request) -> dict | None:
@@ -121,7 +244,7 @@ async def get_current_user(request: Request) -> dict | None:
         return None
     token = auth_header[7:]
     # Token was provided — if it's invalid, that's a 401, not anonymous
-    return _decode_token(token)
+    return await _decode_token(token)
 
 
 async def require_auth(request: Request) -> dict:
@@ -134,64 +257,26 @@ async def require_auth(request: Request) -> dict:
 
 
 # ── Ban enforcement ─────────────────────────────────────────────────────
-import time as _time
-from collections import OrderedDict
-
-_ban_cache: OrderedDict[str, tuple[float, bool, str | None]] = OrderedDict()
-_BAN_CACHE_TTL = 300  # 5 minutes
-_BAN_CACHE_MAX = 500
-
-
-def _check_ban_cache(user_id: str) -> tuple[bool, str | None] | None:
-    """Returns (is_banned, reason) from cache, or None if not cached / expired."""
-    entry = _ban_cache.get(user_id)
-    if entry is None:
-        return None
-    ts, is_banned, reason = entry
-    if _time.monotonic() - ts > _BAN_CACHE_TTL:
-        _ban_cache.pop(user_id, None)
-        return None
-    return is_banned, reason
-
-
-def clear_ban_cache(user_id: str):
-    """Clear ban cache for a specific user (called from admin ban/unban)."""
-    _ban_cache.pop(user_id, None)
-
 
 async def check_user_ban(request: Request) -> dict:
-    """Required auth + ban check. Returns user dict or raises 401/403."""
+    """Required auth + ban check. Returns user dict or raises 401/403.
+
+    The profile comes from the shared profile cache, so the plan and credit
+    checks later in the same request reuse this fetch.
+    """
     user = await require_auth(request)
     user_id = user.get("sub")
     if not user_id:
         return user
 
-    cached = _check_ban_cache(user_id)
-    if cached is not None:
-        is_banned, reason = cached
-        if is_banned:
-            logger.warning("banned_user_access_attempt", user_id=user_id, reason=reason, source="cache")
-            raise HTTPException(status_code=403, detail=f"Account suspended: {reason or 'Contact support'}")
-        return user
-
     # Import here to avoid circular import
     from app.dependencies import get_supabase_service
     supa = get_supabase_service()
     profile = await supa.get_profile(user_id)
 
-    is_banned = False
-    reason = None
     if profile and profile.get("banned_at"):
-        is_banned = True
         reason = profile.get("ban_reason")
-
-    # Cache the result
-    if len(_ban_cache) >= _BAN_CACHE_MAX:
-        _ban_cache.popitem(last=False)
-    _ban_cache[user_id] = (_time.monotonic(), is_banned, reason)
-
-    if is_banned:
-        logger.warning("banned_user_access_attempt", user_id=user_id, reason=reason, source="db")
+        logger.warning("banned_user_access_attempt", user_id=user_id, reason=reason)
         raise HTTPException(status_code=403, detail=f"Account suspended: {reason or 'Contact support'}")
 
     return user
@@ -7,3 +7,4 @@ class AIServiceResult:
     text: str
     images: list[bytes] = field(default_factory=list)
     image_mime_types: list[str] = field(default_factory=list)
+    usage: dict = field(default_factory=dict)  # prompt_tokens / output_tokens / total_tokens when reported
@@ -0,0 +1,66 @@
+"""
+PDF export profiles — trade output quality for speed and file size.
+
+- print:   full print quality (the historical default)
+- screen:  on-screen reading; lighter photos, same fonts and layout
+- preview: fastest turnaround for quick checks on small books
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PdfExportProfile:
+    """Rendering knobs for one export profile."""
+    name: str
+    image_dpi: int               # photos are resampled to this DPI for their slot size
+    max_photo_px: int            # hard ceiling on a photo's long edge
+    jpeg_quality: int
+    jpeg_optimize: bool          # extra Huffman pass: smaller files, slower encode
+    fast_resample: bool          # bilinear instead of Lanczos when downscaling
+    embed_fonts: bool            # inline web fonts; off falls back to system fonts
+
+
+PDF_EXPORT_PROFILES: dict[str, PdfExportProfile] = {
+    "print": PdfExportProfile(
+        name="print",
+        image_dpi=300,
+        max_photo_px=2400,
+        jpeg_quality=92,
+        jpeg_optimize=True,
+        fast_resample=False,
+        embed_fonts=True,
+    ),
+    "screen": PdfExportProfile(
+        name="screen",
+        image_dpi=150,
+        max_photo_px=1600,
+        jpeg_quality=82,
+        jpeg_optimize=True,
+        fast_resample=False,
+        embed_fonts=True,
+    ),
+    "preview": PdfExportProfile(
+        name="preview",
+        image_dpi=72,
+        max_photo_px=800,
+        jpeg_quality=60,
+        jpeg_optimize=False,
+        fast_resample=True,
+        embed_fonts=False,
+    ),
+}
+
+DEFAULT_EXPORT_PROFILE = "print"
+
+
+def get_export_profile(name: str | None) -> PdfExportProfile:
+    """Look up a profile by name (empty → default). Raises ValueError for unknown names."""
+    key = (name or DEFAULT_EXPORT_PROFILE).strip().lower()
+    profile = PDF_EXPORT_PROFILES.get(key)
+    if profile is None:
+        allowed = ", ".join(PDF_EXPORT_PROFILES)
+        raise ValueError(f"Unknown PDF export profile '{name}'. Allowed: {allowed}.")
+    return profile
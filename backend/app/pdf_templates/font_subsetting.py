@@ -0,0 +1,202 @@
+"""
+Per-document web fonts for PDF export.
+
+Instead of linking every face in pdf_fonts.css, each document gets @font-face
+rules for only the families its template uses (resolved through the
+``font-*`` classes in pdf_styles.css), subset to the glyphs the draft's text
+needs and inlined as data URIs from the TTFs in app/fonts (see
+download_fonts.py). Subsets are cached by (font file, glyph-set hash). Glyph
+sets are widened to whole Unicode blocks, so most books share a handful of
+cached subsets instead of each paying for a fresh one.
+
+When fontTools or a local font file is missing, the family's original rules
+from pdf_fonts.css are used instead.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import structlog
+
+from app.models.schemas import MemoryBookDraft
+from app.pdf_templates.template_styles import TEMPLATE_STYLES
+
+logger = structlog.get_logger()
+
+TEMPLATES_DIR = Path(__file__).parent
+FONTS_DIR = TEMPLATES_DIR.parent / "fonts"
+PDF_STYLES_PATH = TEMPLATES_DIR / "pdf_styles.css"
+PDF_FONTS_PATH = TEMPLATES_DIR / "pdf_fonts.css"
+
+# Always kept: Basic Latin, Latin-1 and General Punctuation, so static markup
+# (quote marks, "No photo") and most text never need a new subset
+_BASE_CODEPOINTS = frozenset([*range(0x20, 0x7F), *range(0xA0, 0x100), *range(0x2010, 0x2070), 0x20AC, 0x2122])
+_BLOCK_SIZE = 0x80  # text outside the base set pulls in its whole 128-codepoint block
+
+_SUBSET_CACHE_MAX = 64
+
+_FONT_CLASS_RE = re.compile(r"\.(font-[\w-]+)\s*\{\s*font-family:\s*'([^']+)'")
+_FONT_FACE_RE = re.compile(r"@font-face\s*\{[^}]*?font-family:\s*'([^']+)'[^}]*\}", re.S)
+
+
+@dataclass(frozen=True)
+class _FontFace:
+    family: str
+    path: Path
+    style: str           # normal | italic
+    weight: str          # "400" or a variable range like "400 900"
+
+
+# ── Lookups (built once) ────────────────────────────────────────────────
+
+@lru_cache
+def _family_classes() -> dict[str, str]:
+    """``font-*`` utility class → primary family, parsed from pdf_styles.css."""
+    css = PDF_STYLES_PATH.read_text(encoding="utf-8")
+    return dict(_FONT_CLASS_RE.findall(css))
+
+
+@lru_cache
+def _remote_font_rules() -> dict[str, str]:
+    """Family → its @font-face rules from pdf_fonts.css (fallback source)."""
+    rules: dict[str, list[str]] = {}
+    for match in _FONT_FACE_RE.finditer(PDF_FONTS_PATH.read_text(encoding="utf-8")):
+        rules.setdefault(match.group(1), []).append(match.group(0))
+    return {family: "\n".join(r) for family, r in rules.items()}
+
+
+@lru_cache
+def _local_faces() -> dict[str, tuple[_FontFace, ...]]:
+    """Family → faces available as local TTFs (empty without fontTools)."""
+    try:
+        from fontTools.ttLib import TTFont
+    except ImportError:
+        logger.warning("font_subsetting_unavailable", reason="fonttools not installed")
+        return {}
+    faces: dict[str, list[_FontFace]] = {}
+    for path in sorted(FONTS_DIR.glob("*.ttf")):
+        try:
+            font = TTFont(path, lazy=True)
+            name = font["name"]
+            family = str(name.getName(16, 3, 1, 0x409) or name.getDebugName(1))
+            style = "italic" if font["head"].macStyle & 0x02 else "normal"
+            weight = str(font["OS/2"].usWeightClass)
+            if "fvar" in font:
+                for axis in font["fvar"].axes:
+                    if axis.axisTag == "wght":
+                        weight = f"{int(axis.minValue)} {int(axis.maxValue)}"
+            font.close()
+        except Exception:
+            logger.warning("font_index_failed", path=str(path), exc_info=True)
+            continue
+        faces.setdefault(family, []).append(_FontFace(family, path, style, weight))
+    return {family: tuple(f) for family, f in faces.items()}
+
+
+@lru_cache
+def families_for_template(template_slug: str) -> tuple[str, ...]:
+    """Font families a template's text styles reference (via ``font-*`` classes)."""
+    style = TEMPLATE_STYLES.get(template_slug, TEMPLATE_STYLES["romantic"])
+    classes = set(" ".join(v for v in style.values() if isinstance(v, str)).split())
+    return tuple(sorted({family for cls, family in _family_classes().items() if cls in classes}))
+
+
+def glyphs_for_draft(draft: MemoryBookDraft) -> str:
+    """Characters the rendered pages can contain, widened to whole blocks (both cases, for ``uppercase``)."""
+    chars: set[str] = set()
+    for page in draft.pages:
+        for text in (page.heading_text, page.body_text, page.caption_text, page.quote_text):
+            if text:
+                chars.update(text)
+                chars.update(text.upper())
+                chars.update(text.lower())
+    codepoints = set(_BASE_CODEPOINTS)
+    for block in {ord(c) // _BLOCK_SIZE for c in chars if ord(c) not in _BASE_CODEPOINTS}:
+        codepoints.update(range(block * _BLOCK_SIZE, (block + 1) * _BLOCK_SIZE))
+    return "".join(chr(c) for c in sorted(codepoints) if c >= 0x20)
+
+
+# ── Subsetting ──────────────────────────────────────────────────────────
+
+_subset_cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+_subset_lock = threading.Lock()
+
+
+def _subset_woff_base64(path: Path, glyphs: str) -> str:
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = "woff"
+    options.hinting = False          # print output does not need TrueType hinting
+    options.desubroutinize = True
+    options.notdef_outline = True
+    font = subset.load_font(str(path), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=glyphs)
+    subsetter.subset(font)
+    buf = io.BytesIO()
+    subset.save_font(font, buf, options)
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def _subset_face(face: _FontFace, glyphs: str, glyph_hash: str) -> str:
+    key = (face.path.name, glyph_hash)
+    with _subset_lock:
+        cached = _subset_cache.get(key)
+        if cached is not None:
+            _subset_cache.move_to_end(key)
+            return cached
+    data = _subset_woff_base64(face.path, glyphs)
+    with _subset_lock:
+        _subset_cache[key] = data
+        while len(_subset_cache) > _SUBSET_CACHE_MAX:
+            _subset_cache.popitem(last=False)
+    return data
+
+
+def build_fonts_css(template_slug: str, draft: MemoryBookDraft) -> str:
+    """@font-face rules for one document: only the template's families, subset to the draft's glyphs.
+
+    CPU-bound on a cache miss (fontTools); call from a worker thread.
+    """
+    glyphs = glyphs_for_draft(draft)
+    glyph_hash = hashlib.sha1(glyphs.encode("utf-8")).hexdigest()[:16]
+    local = _local_faces()
+    rules: list[str] = []
+    for family in families_for_template(template_slug):
+        faces = local.get(family)
+        if not faces:
+            if family in _remote_font_rules():
+                rules.append(_remote_font_rules()[family])
+            continue
+        for face in faces:
+            try:
+                data = _subset_face(face, glyphs, glyph_hash)
+            except Exception:
+                logger.warning("font_subset_failed", font=face.path.name, exc_info=True)
+                continue
+            rules.append(
+                f"@font-face {{\n"
+                f"  font-family: '{family}';\n"
+                f"  font-style: {face.style};\n"
+                f"  font-weight: {face.weight};\n"
+                f"  src: url(data:font/woff;base64,{data}) format('woff');\n"
+                f"}}"
+            )
+    return "\n".join(rules)
+
+
+def warm_font_subsets() -> None:
+    """Build the base-glyph subsets for every template so the first export skips fontTools."""
+    empty = MemoryBookDraft()
+    for slug in TEMPLATE_STYLES:
+        build_fonts_css(slug, empty)
@@ -8,13 +8,21 @@ generator assembles these into a full document and prints to PDF.
 
 from __future__ import annotations
 
+import hashlib
 import html as html_mod
+import math
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 from app.pdf_templates.template_styles import TEMPLATE_STYLES, TEMPLATE_PHOTO_FILTERS
 
 TEXT_LAYOUTS = {"QUOTE_PAGE", "DEDICATION", "TOC_SIMPLE"}
 
+# Same range as the editor's crop zoom slider
+_MIN_CROP_ZOOM = 1.0
+_MAX_CROP_ZOOM = 3.0
+
 
 def _e(text: str | None) -> str:
     """HTML-escape text safely."""
@@ -23,19 +31,54 @@ def _e(text: str | None) -> str:
     return html_mod.escape(str(text))
 
 
-def _photo_src(photo_data: dict[int, str], idx: int) -> str:
-    """Get base64 data URI for a photo index."""
+def _photo_src(photo_data: dict[int, str], idx: int, size_mm: tuple[float, float] | None = None) -> str:
+    """Get base64 data URI for a photo index.
+
+    ``photo_data`` may also be a slot-aware source exposing ``resolve(idx, size_mm)``,
+    in which case the physical slot size picks the matching resampled variant.
+    """
+    resolve = getattr(photo_data, "resolve", None)
+    if resolve is not None:
+        return resolve(idx, size_mm)
     return photo_data.get(idx, "")
 
 
-def _obj_position(photo_index: int, analyses: list[dict] | None) -> str:
+def _has_photo(photo_data: dict[int, str], idx: int) -> bool:
+    """Whether a photo exists for ``idx`` — without resolving (or recording) a slot."""
+    has = getattr(photo_data, "has", None)
+    if has is not None:
+        return has(idx)
+    return bool(photo_data.get(idx))
+
+
+def _crop_number(crop: dict, key: str, default: float) -> float:
+    """A numeric crop override; missing, non-numeric or non-finite values give ``default``."""
+    try:
+        value = float(crop.get(key, default))
+    except (TypeError, ValueError):
+        return default
+    return value if math.isfinite(value) else default
+
+
+def _crop_zoom(crop: Any) -> float:
+    """Crop override zoom, clamped to the editor's range (1.0 without a usable override)."""
+    if not isinstance(crop, dict):
+        return 1.0
+    return min(max(_crop_number(crop, "zoom", 1.0), _MIN_CROP_ZOOM), _MAX_CROP_ZOOM)
+
+
+def _slot_mm(page_mm: tuple[float, float] | None, box: tuple[float, float], zoom: float = 1.0) -> tuple[float, float] | None:
+    """Physical slot size in mm from a (width, height) fraction of the page box."""
+    if not page_mm:
+        return None
+    return page_mm[0] * box[0] * zoom, page_mm[1] * box[1] * zoom
+
+
+def _obj_position(analysis: dict | None) -> str:
     """Compute CSS object-position from safe_crop_box — mirrors frontend getObjectPosition."""
-    if not analyses:
+    if not analysis or not analysis.get("safe_crop_box"):
         return ""
-    a = next((p for p in analyses if p.get("photo_index") == photo_index), None)
-    if not a or not a.get("safe_crop_box"):
-        return ""
-    box = a["safe_crop_box"]
+    box = analysis["safe_crop_box"]
     if isinstance(box, dict):
         x, y, w, h = box.get("x", 0), box.get("y", 0), box.get("w", 1), box.get("h", 1)
     else:
@@ -62,10 +105,10 @@ def _photo_img(
 
     # Apply crop overrides (zoom + pan)
     crop = (overrides or {}).get("crop", {}).get(slot_key) if slot_key else None
-    if crop:
-        zoom = crop.get("zoom", 1)
-        panX = crop.get("panX", 0)
-        panY = crop.get("panY", 0)
+    if isinstance(crop, dict) and crop:
+        zoom = _crop_zoom(crop)
+        panX = _crop_number(crop, "panX", 0.0)
+        panY = _crop_number(crop, "panY", 0.0)
         style_parts.append(f"transform: scale({zoom}) translate({panX}%, {panY}%); transform-origin: center;")
 
     # Apply filter overrides (CSS filter string from frontend)
@@ -108,113 +151,199 @@ def _photo_img(
 </div>'''
 
 
-# ── Ornament SVGs ────────────────────────────────────────────────────────
+# ── Ornament and background assets ───────────────────────────────────────
+# Shapes and colours are defined once per document (SVG <symbol>s and CSS
+# classes, see TemplateAssets); each page only references them by id/class.
 
-def _ornaments_romantic(stroke: str, fill: str) -> str:
-    return f'''<div class="absolute inset-0 pointer-events-none z-10">
-  <svg class="absolute top-3 left-3" width="56" height="56" viewBox="0 0 56 56" fill="none">
-    <path d="M6 50 C6 30 14 14 50 6" stroke="{stroke}" stroke-width="0.8"/>
-    <path d="M6 50 C10 36 18 22 42 12" stroke="{stroke}" stroke-width="0.5"/>
-    <ellipse cx="28" cy="20" rx="3" ry="6" transform="rotate(-35 28 20)" fill="{fill}" stroke="{stroke}" stroke-width="0.4"/>
-    <ellipse cx="18" cy="32" rx="2.5" ry="5" transform="rotate(-55 18 32)" fill="{fill}" stroke="{stroke}" stroke-width="0.4"/>
-    <circle cx="50" cy="6" r="1.5" fill="{stroke}"/>
-  </svg>
-  <svg class="absolute top-3 right-3" width="56" height="56" viewBox="0 0 56 56" fill="none" style="transform:scaleX(-1)">
+def _asset_key(*parts: str) -> str:
+    return hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()[:8]
+
+
+def _romantic_symbols(sid: str, stroke: str, fill: str) -> str:
+    return f'''<symbol id="{sid}-a" viewBox="0 0 56 56" fill="none">
     <path d="M6 50 C6 30 14 14 50 6" stroke="{stroke}" stroke-width="0.8"/>
     <path d="M6 50 C10 36 18 22 42 12" stroke="{stroke}" stroke-width="0.5"/>
     <ellipse cx="28" cy="20" rx="3" ry="6" transform="rotate(-35 28 20)" fill="{fill}" stroke="{stroke}" stroke-width="0.4"/>
     <ellipse cx="18" cy="32" rx="2.5" ry="5" transform="rotate(-55 18 32)" fill="{fill}" stroke="{stroke}" stroke-width="0.4"/>
     <circle cx="50" cy="6" r="1.5" fill="{stroke}"/>
-  </svg>
-  <svg class="absolute bottom-3 left-3" width="56" height="56" viewBox="0 0 56 56" fill="none" style="transform:scaleY(-1)">
-    <path d="M6 50 C6 30 14 14 50 6" stroke="{stroke}" stroke-width="0.8"/>
-    <ellipse cx="28" cy="20" rx="3" ry="6" transform="rotate(-35 28 20)" fill="{fill}" stroke="{stroke}" stroke-width="0.4"/>
-    <circle cx="50" cy="6" r="1.5" fill="{stroke}"/>
-  </svg>
-  <svg class="absolute bottom-3 right-3" width="56" height="56" viewBox="0 0 56 56" fill="none" style="transform:scale(-1,-1)">
+  </symbol>
+  <symbol id="{sid}-b" viewBox="0 0 56 56" fill="none">
     <path d="M6 50 C6 30 14 14 50 6" stroke="{stroke}" stroke-width="0.8"/>
     <ellipse cx="28" cy="20" rx="3" ry="6" transform="rotate(-35 28 20)" fill="{fill}" stroke="{stroke}" stroke-width="0.4"/>
     <circle cx="50" cy="6" r="1.5" fill="{stroke}"/>
-  </svg>
+  </symbol>'''
+
+
+def _ornaments_romantic(sid: str) -> str:
+    return f'''<div class="absolute inset-0 pointer-events-none z-10">
+  <svg class="absolute top-3 left-3" width="56" height="56" viewBox="0 0 56 56" fill="none"><use href="#{sid}-a"/></svg>
+  <svg class="absolute top-3 right-3" width="56" height="56" viewBox="0 0 56 56" fill="none" style="transform:scaleX(-1)"><use href="#{sid}-a"/></svg>
+  <svg class="absolute bottom-3 left-3" width="56" height="56" viewBox="0 0 56 56" fill="none" style="transform:scaleY(-1)"><use href="#{sid}-b"/></svg>
+  <svg class="absolute bottom-3 right-3" width="56" height="56" viewBox="0 0 56 56" fill="none" style="transform:scale(-1,-1)"><use href="#{sid}-b"/></svg>
 </div>'''
 
 
-def _ornaments_vintage(stroke: str, fill: str) -> str:
+def _vintage_symbols(sid: str, stroke: str, fill: str) -> str:
+    return f'''<symbol id="{sid}" viewBox="0 0 52 52" fill="none">
+    <path d="M4 48 C4 24 16 8 48 4" stroke="{stroke}" stroke-width="1"/>
+    <path d="M4 48 C6 40 10 32 18 24 C22 20 26 18 30 17" stroke="{stroke}" stroke-width="0.6"/>
+    <path d="M48 4 C44 6 42 10 44 14 C46 12 48 8 48 4" stroke="{stroke}" stroke-width="0.7" fill="{fill}"/>
+    <path d="M4 48 C8 46 10 42 8 38 C6 40 4 44 4 48" stroke="{stroke}" stroke-width="0.7" fill="{fill}"/>
+    <circle cx="26" cy="16" r="1.2" fill="{stroke}"/>
+  </symbol>'''
+
+
+def _ornaments_vintage(sid: str) -> str:
     positions = [
         "top-2 left-2",
         "top-2 right-2 -scale-x-100",
         "bottom-2 left-2 -scale-y-100",
         "bottom-2 right-2 -scale-x-100 -scale-y-100",
     ]
-    svgs = ""
-    for pos in positions:
-        svgs += f'''<svg class="absolute {pos}" width="52" height="52" viewBox="0 0 52 52" fill="none">
-    <path d="M4 48 C4 24 16 8 48 4" stroke="{stroke}" stroke-width="1"/>
-    <path d="M4 48 C6 40 10 32 18 24 C22 20 26 18 30 17" stroke="{stroke}" stroke-width="0.6"/>
-    <path d="M48 4 C44 6 42 10 44 14 C46 12 48 8 48 4" stroke="{stroke}" stroke-width="0.7" fill="{fill}"/>
-    <path d="M4 48 C8 46 10 42 8 38 C6 40 4 44 4 48" stroke="{stroke}" stroke-width="0.7" fill="{fill}"/>
-    <circle cx="26" cy="16" r="1.2" fill="{stroke}"/>
-  </svg>\n'''
+    svgs = "".join(
+        f'<svg class="absolute {pos}" width="52" height="52" viewBox="0 0 52 52" fill="none"><use href="#{sid}"/></svg>\n  '
+        for pos in positions
+    )
     return f'''<div class="absolute inset-0 pointer-events-none z-10">
-  {svgs}
-  <div class="absolute inset-4 border border-amber-600/10 rounded pointer-events-none"></div>
+  {svgs}<div class="absolute inset-4 border border-amber-600/10 rounded pointer-events-none"></div>
 </div>'''
 
 
-def _ornaments_elegant(stroke: str) -> str:
+def _ornaments_elegant(line_cls: str) -> str:
     return f'''<div class="absolute inset-0 pointer-events-none z-10">
   <div class="absolute top-4 left-4">
-    <div class="w-10 h-px" style="background-color:{stroke}"></div>
-    <div class="w-px h-10" style="background-color:{stroke}"></div>
+    <div class="w-10 h-px {line_cls}"></div>
+    <div class="w-px h-10 {line_cls}"></div>
   </div>
   <div class="absolute top-4 right-4 flex flex-col items-end">
-    <div class="w-10 h-px" style="background-color:{stroke}"></div>
-    <div class="w-px h-10 self-end" style="background-color:{stroke}"></div>
+    <div class="w-10 h-px {line_cls}"></div>
+    <div class="w-px h-10 self-end {line_cls}"></div>
   </div>
   <div class="absolute bottom-4 left-4 flex flex-col justify-end">
-    <div class="w-px h-10" style="background-color:{stroke}"></div>
-    <div class="w-10 h-px" style="background-color:{stroke}"></div>
+    <div class="w-px h-10 {line_cls}"></div>
+    <div class="w-10 h-px {line_cls}"></div>
   </div>
   <div class="absolute bottom-4 right-4 flex flex-col items-end justify-end">
-    <div class="w-px h-10 self-end" style="background-color:{stroke}"></div>
-    <div class="w-10 h-px" style="background-color:{stroke}"></div>
+    <div class="w-px h-10 self-end {line_cls}"></div>
+    <div class="w-10 h-px {line_cls}"></div>
   </div>
 </div>'''
 
 
-def _ornaments_html(style: dict) -> str:
-    co = style.get("cornerOrnament")
-    if not co:
-        return ""
-    stroke = style["ornamentStroke"]
-    fill = style["ornamentFill"]
+@dataclass(frozen=True)
+class TemplateAssets:
+    """Document-level definitions the page markup references by id or class."""
+    css: str        # rules for the document <style>
+    defs: str       # hidden <svg> of <symbol>s, placed once at the top of <body>
+    ornaments: str  # per-page ornament markup (references only)
+    bg_pattern: str  # per-page background layer (references only)
+
+
+@lru_cache(maxsize=32)
+def _template_assets(co: str | None, stroke: str, fill: str, pattern: str | None) -> TemplateAssets:
+    css: list[str] = []
+    symbols = ""
+    ornaments = ""
+    key = _asset_key(co or "", stroke, fill)
     if co == "romantic":
-        return _ornaments_romantic(stroke, fill)
-    if co == "vintage":
-        return _ornaments_vintage(stroke, fill)
-    if co == "elegant":
-        return _ornaments_elegant(stroke)
-    return ""
+        sid = f"orn-romantic-{key}"
+        symbols = _romantic_symbols(sid, stroke, fill)
+        ornaments = _ornaments_romantic(sid)
+    elif co == "vintage":
+        sid = f"orn-vintage-{key}"
+        symbols = _vintage_symbols(sid, stroke, fill)
+        ornaments = _ornaments_vintage(sid)
+    elif co == "elegant":
+        line_cls = f"orn-line-{key}"
+        css.append(f".{line_cls} {{ background-color: {stroke}; }}")
+        ornaments = _ornaments_elegant(line_cls)
+
+    bg_pattern = ""
+    if pattern:
+        bg_cls = f"bg-pattern-{_asset_key(pattern)}"
+        css.append(f".{bg_cls} {{ background-image: {pattern}; }}")
+        bg_pattern = f'<div class="absolute inset-0 pointer-events-none z-0 {bg_cls}"></div>'
+
+    defs = (
+        f'<svg width="0" height="0" style="position:absolute" aria-hidden="true">\n  {symbols}\n</svg>'
+        if symbols else ""
+    )
+    return TemplateAssets(css="\n".join(css), defs=defs, ornaments=ornaments, bg_pattern=bg_pattern)
 
 
-def _bg_pattern_html(style: dict) -> str:
-    pat = style.get("bgPattern")
-    if not pat:
-        return ""
-    return f'<div class="absolute inset-0 pointer-events-none z-0" style="background-image:{pat}"></div>'
+def _style_assets(style: dict) -> TemplateAssets:
+    return _template_assets(
+        style.get("cornerOrnament"),
+        style.get("ornamentStroke", ""),
+        style.get("ornamentFill", ""),
+        style.get("bgPattern"),
+    )
+
+
+# ── Render context ───────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class _TemplateFragments:
+    """Per-template HTML fragments that are identical on every page."""
+    style: dict
+    photo_filter: str
+    assets: TemplateAssets
+    shell_open: str       # '<div class="book-page ... ' — the caller appends extra classes
+    shell_decor: str      # '">' + background pattern + ornaments
+
+
+@lru_cache(maxsize=32)
+def _template_fragments(template_slug: str) -> _TemplateFragments:
+    style = TEMPLATE_STYLES.get(template_slug, TEMPLATE_STYLES["romantic"])
+    texture = style.get("pageTexture", "")
+    assets = _style_assets(style)
+    return _TemplateFragments(
+        style=style,
+        photo_filter=TEMPLATE_PHOTO_FILTERS.get(template_slug, ""),
+        assets=assets,
+        shell_open=f'<div class="book-page {style["pageBg"]} rounded-xl overflow-hidden border {style["pageBorder"]} relative {texture} ',
+        shell_decor=f'">\n  {assets.bg_pattern}\n  {assets.ornaments}\n  ',
+    )
+
+
+class RenderContext:
+    """Everything a page render needs that is fixed for the whole document.
+
+    Built once per document so each page costs time proportional to its own
+    content: template fragments are cached per slug and crop positions are
+    indexed by photo_index instead of scanning ``photo_analyses`` per slot.
+    """
+
+    def __init__(
+        self,
+        template_slug: str,
+        photo_analyses: list[dict] | None = None,
+        overrides: dict | None = None,
+        page_mm: tuple[float, float] | None = None,
+    ):
+        fragments = _template_fragments(template_slug)
+        self.fragments = fragments
+        self.style = fragments.style
+        self.assets = fragments.assets
+        self.photo_filter = fragments.photo_filter
+        self.overrides = overrides
+        self.page_mm = page_mm
+        self._positions: dict[int, str] = {}
+        for analysis in photo_analyses or []:
+            idx = analysis.get("photo_index")
+            if idx is not None and idx not in self._positions:  # first match wins, as before
+                self._positions[idx] = _obj_position(analysis)
+
+    def obj_position(self, photo_index: int) -> str:
+        return self._positions.get(photo_index, "")
 
 
 # ── Page shell ───────────────────────────────────────────────────────────
 
-def _page_shell(style: dict, inner_html: str, extra_class: str = "") -> str:
+def _page_shell(ctx: RenderContext, inner_html: str, extra_class: str = "") -> str:
     """Wraps content in a PageShell — mirrors frontend exactly."""
-    ornaments = _ornaments_html(style)
-    bg_pattern = _bg_pattern_html(style)
-    texture = style.get("pageTexture", "")
-    return f'''<div class="book-page {style['pageBg']} rounded-xl overflow-hidden border {style['pageBorder']} relative {texture} {extra_class}">
-  {bg_pattern}
-  {ornaments}
-  {inner_html}
+    fragments = ctx.fragments
+    return f'''{fragments.shell_open}{extra_class}{fragments.shell_decor}{inner_html}
 </div>'''
 
 
@@ -237,16 +366,16 @@ def _quote_block(text: str, style: dict, compact: bool = False) -> str:
 # PAGE RENDERERS — one function per page type / layout
 # ═════════════════════════════════════════════════════════════════════════
 
-def render_page(
-    page: Any,
-    photo_data: dict[int, str],
-    template_slug: str,
-    photo_analyses: list[dict] | None = None,
-    overrides: dict | None = None,
-) -> str:
-    """Render a single page to HTML. Main dispatch function."""
-    style = TEMPLATE_STYLES.get(template_slug, TEMPLATE_STYLES["romantic"])
-    pf = TEMPLATE_PHOTO_FILTERS.get(template_slug, "")
+def render_page(page: Any, photo_data: dict[int, str], ctx: RenderContext) -> str:
+    """Render a single page to HTML. Main dispatch function.
+
+    ``ctx`` is shared by all pages of a document. When ``ctx.page_mm`` (the
+    printable page box in mm) is set, every photo slot reports its physical size
+    to the photo source so it can serve a variant resampled for that slot.
+    """
+    style = ctx.style
+    pf = ctx.photo_filter
+    overrides = ctx.overrides
     layout = getattr(page, "layout_type", "HERO_FULLBLEED") or "HERO_FULLBLEED"
     indices = getattr(page, "photo_indices", []) or []
 
@@ -254,84 +383,84 @@ def render_page(
     ch_idx = getattr(page, "_chapter_idx", None)
     sp_idx = getattr(page, "_spread_idx", None)
 
-    def P(i: int) -> tuple[str, str, str]:
-        """Returns (src, frame_class, obj_pos_style) for photo at slot i."""
-        idx = indices[i] if i < len(indices) else -1
-        src = _photo_src(photo_data, idx)
-        frame = style["photoFrameHero"] if i == 0 else (style["photoFrameAlt"] if i % 2 == 1 else style["photoFrame"])
-        pos = _obj_position(idx, photo_analyses)
-        return src, frame, pos
-
-    def img(i: int, hero: bool = False, alt: bool = False, extra: str = "") -> str:
+    def img(
+        i: int,
+        hero: bool = False,
+        alt: bool = False,
+        extra: str = "",
+        box: tuple[float, float] = (1.0, 1.0),
+    ) -> str:
+        """Photo at slot i; ``box`` is the slot's (width, height) fraction of the page."""
         if i >= len(indices):
             return ""
         idx = indices[i]
-        src = _photo_src(photo_data, idx)
+        slot_key = f"{ch_idx}-{sp_idx}-{i}" if ch_idx is not None and sp_idx is not None else ""
+        crop = (overrides or {}).get("crop", {}).get(slot_key) if slot_key else None
+        src = _photo_src(photo_data, idx, _slot_mm(ctx.page_mm, box, _crop_zoom(crop)))
         if not src:
             return ""
         frame = style["photoFrameHero"] if hero else (style["photoFrameAlt"] if alt else style["photoFrame"])
-        pos = _obj_position(idx, photo_analyses)
-        slot_key = f"{ch_idx}-{sp_idx}-{i}" if ch_idx is not None and sp_idx is not None else ""
-        return _photo_img(src, frame, pf, pos, extra, slot_key, overrides)
+        return _photo_img(src, frame, pf, ctx.obj_position(idx), extra, slot_key, overrides)
 
-    photos_available = sum(1 for idx in indices if _photo_src(photo_data, idx))
+    photos_available = sum(1 for idx in indices if _has_photo(photo_data, idx))
 
     # Cover
     if page.page_type == "cover":
-        return _render_cover(page, style, pf, photo_data, indices, photo_analyses)
+        return _render_cover(page, ctx, photo_data, indices)
 
     # Back cover
     if page.page_type == "back_cover":
-        return _render_back_cover(page, style)
+        return _render_back_cover(page, ctx)
 
     # Left/right spread pages
     if getattr(page, "page_side", "") == "left":
-        return _render_left_page(page, style, pf, photo_data, indices, photo_analyses, photos_available)
+        return _render_left_page(page, ctx, photo_data, indices, photos_available)
 
     if getattr(page, "page_side", "") == "right":
-        return _render_right_page(page, style)
+        return _render_right_page(page, ctx)
 
     # Text-only layouts
     if layout in TEXT_LAYOUTS:
-        return _render_text_only(page, style, layout)
+        return _render_text_only(page, ctx, layout)
 
     # Photo layouts
     if layout == "HERO_FULLBLEED" and photos_available >= 1:
-        return _render_hero_fullbleed(page, style, img)
+        return _render_hero_fullbleed(page, ctx, img)
 
     if layout == "TWO_BALANCED" and photos_available >= 2:
-        return _render_two_balanced(page, style, img)
+        return _render_two_balanced(page, ctx, img)
 
     if layout == "THREE_GRID" and photos_available >= 2:
-        return _render_three_grid(page, style, img, photos_available)
+        return _render_three_grid(page, ctx, img, photos_available)
 
     if layout == "FOUR_GRID" and photos_available >= 2:
-        return _render_four_grid(page, style, img, photos_available)
+        return _render_four_grid(page, ctx, img, photos_available)
 
     if layout == "SIX_MONTAGE" and photos_available >= 2:
-        return _render_six_montage(page, style, img, photos_available)
+        return _render_six_montage(page, ctx, img, photos_available)
 
     if layout == "WALL_8_10" and photos_available >= 2:
-        return _render_wall(page, style, img, photos_available)
+        return _render_wall(page, ctx, img, photos_available)
 
     if layout == "PHOTO_PLUS_QUOTE":
-        return _render_photo_plus_quote(page, style, img, photos_available)
+        return _render_photo_plus_quote(page, ctx, img, photos_available)
 
     if layout == "COLLAGE_PLUS_LETTER":
-        return _render_collage_plus_letter(page, style, img, photos_available)
+        return _render_collage_plus_letter(page, ctx, img, photos_available)
 
     # Fallback
-    return _render_fallback(page, style, img, photos_available)
+    return _render_fallback(page, ctx, img, photos_available)
 
 
 # ── Cover ────────────────────────────────────────────────────────────────
 
-def _render_cover(page, style, pf, photo_data, indices, analyses):
+def _render_cover(page, ctx, photo_data, indices):
+    style, pf = ctx.style, ctx.photo_filter
     photo_html = ""
     if indices:
-        src = _photo_src(photo_data, indices[0])
+        src = _photo_src(photo_data, indices[0], _slot_mm(ctx.page_mm, (1.0, 1.0)))
         if src:
-            pos = _obj_position(indices[0], analyses)
+            pos = ctx.obj_position(indices[0])
             img_style = f"filter:{pf};" if pf else ""
             if pos:
                 img_style += f" {pos}"
@@ -350,28 +479,32 @@ def _render_cover(page, style, pf, photo_data, indices, analyses):
 
 # ── Back cover ───────────────────────────────────────────────────────────
 
-def _render_back_cover(page, style):
+def _render_back_cover(page, ctx):
+    style = ctx.style
     inner = f'''<div class="relative z-20 flex flex-col items-center max-w-xs">
   {"" if not page.heading_text else f'<h3 class="text-2xl font-bold {style["heading"]} mb-6 text-center">{_e(page.heading_text)}</h3>'}
   {_divider(style)}
   {"" if not page.body_text else f'<p class="{style["body"]} text-center italic max-w-sm mt-6 text-sm leading-relaxed">{_e(page.body_text)}</p>'}
   {"" if not page.quote_text else f'<div class="mt-8">{_quote_block(page.quote_text, style)}</div>'}
 </div>'''
-    return _page_shell(style, inner, f"flex flex-col items-center justify-center {style['innerPadding']}")
+    return _page_shell(ctx, inner, f"flex flex-col items-center justify-center {style['innerPadding']}")
 
 
 # ── Left page ────────────────────────────────────────────────────────────
 
-def _render_left_page(page, style, pf, photo_data, indices, analyses, count):
-    cols = "grid-cols-3" if count > 4 else ("grid-cols-2" if count > 1 else "grid-cols-1")
+def _render_left_page(page, ctx, photo_data, indices, count):
+    style, pf = ctx.style, ctx.photo_filter
+    n_cols = 3 if count > 4 else (2 if count > 1 else 1)
+    cols = f"grid-cols-{n_cols}"
+    shown = min(count, 9)
+    box = (1 / n_cols, 1 / max(1, math.ceil(shown / n_cols)))
     photos_html = ""
-    for i in range(min(count, 9)):
+    for i in range(shown):
         idx = indices[i] if i < len(indices) else -1
-        src = _photo_src(photo_data, idx)
+        src = _photo_src(photo_data, idx, _slot_mm(ctx.page_mm, box))
         if src:
             frame = style["photoFrameAlt"] if i % 2 == 1 else style["photoFrame"]
-            pos = _obj_position(idx, analyses)
-            photos_html += _photo_img(src, frame, pf, pos)
+            photos_html += _photo_img(src, frame, pf, ctx.obj_position(idx))
     if not photos_html:
         photos_html = '<div class="w-full h-full bg-gray-800/30 flex items-center justify-center rounded-lg"><span class="text-gray-600 text-sm">No photo</span></div>'
     caption = f'<p class="text-xs {style["caption"]} text-center mt-3 relative z-20">{_e(page.caption_text)}</p>' if page.caption_text else ""
@@ -379,24 +512,26 @@ def _render_left_page(page, style, pf, photo_data, indices, analyses, count):
   {photos_html}
 </div>
 {caption}'''
-    return _page_shell(style, inner, f"flex flex-col {style['innerPadding']}")
+    return _page_shell(ctx, inner, f"flex flex-col {style['innerPadding']}")
 
 
 # ── Right page ───────────────────────────────────────────────────────────
 
-def _render_right_page(page, style):
+def _render_right_page(page, ctx):
+    style = ctx.style
     inner = f'''<div class="relative z-20 flex flex-col items-center max-w-sm">
   {"" if not page.heading_text else f'<h3 class="{style["headingLg"]} mb-3 text-center">{_e(page.heading_text)}</h3>'}
   {_divider(style)}
   {"" if not page.body_text else f'<p class="{style["body"]} leading-relaxed text-center mt-4 text-sm">{_e(page.body_text)}</p>'}
   {"" if not page.quote_text else f'<div class="mt-8">{_quote_block(page.quote_text, style)}</div>'}
 </div>'''
-    return _page_shell(style, inner, f"flex flex-col items-center justify-center {style['innerPadding']}")
+    return _page_shell(ctx, inner, f"flex flex-col items-center justify-center {style['innerPadding']}")
 
 
 # ── Text-only ────────────────────────────────────────────────────────────
 
-def _render_text_only(page, style, layout):
+def _render_text_only(page, ctx, layout):
+    style = ctx.style
     is_ded = layout == "DEDICATION"
     h_cls = "text-2xl font-bold" if is_ded else "text-lg font-semibold"
     b_cls = "italic text-base" if is_ded else "text-sm"
@@ -406,15 +541,16 @@ def _render_text_only(page, style, layout):
   {"" if not page.body_text else f'<p class="{style["body"]} leading-relaxed text-center mt-5 {b_cls}">{_e(page.body_text)}</p>'}
   {"" if not page.quote_text else f'<div class="mt-8">{_quote_block(page.quote_text, style)}</div>'}
 </div>'''
-    return _page_shell(style, inner, f"flex flex-col items-center justify-center {style['innerPadding']}")
+    return _page_shell(ctx, inner, f"flex flex-col items-center justify-center {style['innerPadding']}")
 
 
 # ── HERO_FULLBLEED ───────────────────────────────────────────────────────
 
-def _render_hero_fullbleed(page, style, img):
-    return _page_shell(style, f'''<div class="absolute inset-0 z-20">
+def _render_hero_fullbleed(page, ctx, img):
+    style = ctx.style
+    return _page_shell(ctx, f'''<div class="absolute inset-0 z-20">
   <div class="absolute inset-x-0 top-0 bottom-[18%]">
-    {img(0, hero=True, extra="!rounded-none !border-0 !shadow-none !p-0")}
+    {img(0, hero=True, extra="!rounded-none !border-0 !shadow-none !p-0", box=(1.0, 0.82))}
   </div>
   <div class="absolute inset-x-0 bottom-0 h-[18%] flex flex-col items-center justify-center px-8">
     {"" if not page.heading_text else f'<h3 class="font-semibold {style["heading"]} mb-1 text-center">{_e(page.heading_text)}</h3>'}
@@ -426,10 +562,11 @@ def _render_hero_fullbleed(page, style, img):
 
 # ── TWO_BALANCED ─────────────────────────────────────────────────────────
 
-def _render_two_balanced(page, style, img):
+def _render_two_balanced(page, ctx, img):
+    style = ctx.style
     inner = f'''<div class="relative z-20 flex flex-col h-full">
   <div class="flex justify-start" style="height:38%">
-    <div class="w-[62%] h-full">{img(0, hero=True)}</div>
+    <div class="w-[62%] h-full">{img(0, hero=True, box=(0.62, 0.38))}</div>
   </div>
   <div class="flex-1 flex flex-col items-center justify-center px-4 py-2 min-h-0">
     {"" if not page.heading_text else f'<h3 class="font-semibold {style["headingLg"]} mb-2 text-center">{_e(page.heading_text)}</h3>'}
@@ -438,27 +575,28 @@ def _render_two_balanced(page, style, img):
     {"" if not page.quote_text else f'<div class="mt-3">{_quote_block(page.quote_text, style, compact=True)}</div>'}
   </div>
   <div class="flex justify-end" style="height:34%">
-    <div class="w-[52%] h-full">{img(1, alt=True)}</div>
+    <div class="w-[52%] h-full">{img(1, alt=True, box=(0.52, 0.34))}</div>
   </div>
   {"" if not page.caption_text else f'<p class="text-xs {style["caption"]} text-right mt-1.5">{_e(page.caption_text)}</p>'}
 </div>'''
-    return _page_shell(style, inner, f"{style['innerPadding']} flex flex-col")
+    return _page_shell(ctx, inner, f"{style['innerPadding']} flex flex-col")
 
 
 # ── THREE_GRID ───────────────────────────────────────────────────────────
 
-def _render_three_grid(page, style, img, count):
+def _render_three_grid(page, ctx, img, count):
+    style = ctx.style
     right_col = ""
     if count >= 2:
-        right_col += f'<div class="flex-1 min-h-0">{img(1, alt=True)}</div>'
+        right_col += f'<div class="flex-1 min-h-0">{img(1, alt=True, box=(0.40, 0.325))}</div>'
     if count >= 3:
-        right_col += f'<div class="flex-1 min-h-0">{img(2)}</div>'
+        right_col += f'<div class="flex-1 min-h-0">{img(2, box=(0.40, 0.325))}</div>'
     elif count >= 2:
         right_col += '<div class="flex-1"></div>'
 
     inner = f'''<div class="relative z-20 flex flex-col h-full">
   <div class="flex gap-2.5" style="height:65%">
-    <div class="w-[60%] h-full">{img(0, hero=True)}</div>
+    <div class="w-[60%] h-full">{img(0, hero=True, box=(0.60, 0.65))}</div>
     <div class="w-[40%] flex flex-col gap-2.5 h-full">{right_col}</div>
   </div>
   <div class="flex-1 flex flex-col justify-center min-h-0 pt-3">
@@ -469,25 +607,26 @@ def _render_three_grid(page, style, img, count):
     {"" if not page.caption_text else f'<p class="text-xs {style["caption"]} mt-1 line-clamp-1">{_e(page.caption_text)}</p>'}
   </div>
 </div>'''
-    return _page_shell(style, inner, f"{style['innerPadding']} flex flex-col")
+    return _page_shell(ctx, inner, f"{style['innerPadding']} flex flex-col")
 
 
 # ── FOUR_GRID ────────────────────────────────────────────────────────────
 
-def _render_four_grid(page, style, img, count):
+def _render_four_grid(page, ctx, img, count):
+    style = ctx.style
     right_col = ""
     if count >= 2:
-        right_col += f'<div class="flex-1 min-h-0">{img(1, alt=True)}</div>'
+        right_col += f'<div class="flex-1 min-h-0">{img(1, alt=True, box=(0.38, 0.24))}</div>'
     if count >= 3:
-        right_col += f'<div class="flex-1 min-h-0">{img(2)}</div>'
+        right_col += f'<div class="flex-1 min-h-0">{img(2, box=(0.38, 0.24))}</div>'
 
     pano = ""
     if count >= 4:
-        pano = f'<div class="mt-2.5" style="height:22%">{img(3, alt=True, extra="!rounded-lg")}</div>'
+        pano = f'<div class="mt-2.5" style="height:22%">{img(3, alt=True, extra="!rounded-lg", box=(1.0, 0.22))}</div>'
 
     inner = f'''<div class="relative z-20 flex flex-col h-full">
   <div class="flex gap-2.5" style="height:48%">
-    <div class="w-[62%] h-full">{img(0, hero=True)}</div>
+    <div class="w-[62%] h-full">{img(0, hero=True, box=(0.62, 0.48))}</div>
     <div class="w-[38%] flex flex-col gap-2.5 h-full">{right_col}</div>
   </div>
   {pano}
@@ -497,21 +636,22 @@ def _render_four_grid(page, style, img, count):
     {"" if not page.caption_text else f'<p class="text-xs {style["caption"]} mt-0.5">{_e(page.caption_text)}</p>'}
   </div>
 </div>'''
-    return _page_shell(style, inner, f"{style['innerPadding']} flex flex-col")
+    return _page_shell(ctx, inner, f"{style['innerPadding']} flex flex-col")
 
 
 # ── SIX_MONTAGE ──────────────────────────────────────────────────────────
 
-def _render_six_montage(page, style, img, count):
-    row1_r = f'<div class="w-[38%] h-full">{img(1, alt=True)}</div>' if count >= 2 else ""
-    row2_l = f'<div class="w-[38%] h-full">{img(2)}</div>' if count >= 3 else ""
-    row2_r = f'<div class="w-[62%] h-full">{img(3, alt=True)}</div>' if count >= 4 else ""
-    row3_l = f'<div class="w-[50%] h-full">{img(4)}</div>' if count >= 5 else ""
-    row3_r = f'<div class="w-[50%] h-full">{img(5, alt=True)}</div>' if count >= 6 else ""
+def _render_six_montage(page, ctx, img, count):
+    style = ctx.style
+    row1_r = f'<div class="w-[38%] h-full">{img(1, alt=True, box=(0.38, 0.28))}</div>' if count >= 2 else ""
+    row2_l = f'<div class="w-[38%] h-full">{img(2, box=(0.38, 0.28))}</div>' if count >= 3 else ""
+    row2_r = f'<div class="w-[62%] h-full">{img(3, alt=True, box=(0.62, 0.28))}</div>' if count >= 4 else ""
+    row3_l = f'<div class="w-[50%] h-full">{img(4, box=(0.50, 0.24))}</div>' if count >= 5 else ""
+    row3_r = f'<div class="w-[50%] h-full">{img(5, alt=True, box=(0.50, 0.24))}</div>' if count >= 6 else ""
 
     inner = f'''<div class="relative z-20 flex flex-col h-full gap-2">
   <div class="flex gap-2" style="height:28%">
-    <div class="w-[62%] h-full">{img(0, hero=True)}</div>
+    <div class="w-[62%] h-full">{img(0, hero=True, box=(0.62, 0.28))}</div>
     {row1_r}
   </div>
   <div class="flex gap-2" style="height:28%">
@@ -525,12 +665,13 @@ def _render_six_montage(page, style, img, count):
     {"" if not page.body_text else f'<p class="{style["body"]} text-xs line-clamp-1">{_e(page.body_text)}</p>'}
   </div>
 </div>'''
-    return _page_shell(style, inner, f"{style['innerPadding']} flex flex-col")
+    return _page_shell(ctx, inner, f"{style['innerPadding']} flex flex-col")
 
 
 # ── WALL_8_10 ────────────────────────────────────────────────────────────
 
-def _render_wall(page, style, img, count):
+def _render_wall(page, ctx, img, count):
+    style = ctx.style
     cells = [
         (0, "col-span-1 row-span-1", False, False),
         (1, "col-span-3 row-span-1", False, True),
@@ -546,19 +687,21 @@ def _render_wall(page, style, img, count):
     grid_html = ""
     for i, cls, hero, alt in cells:
         if i < count:
-            grid_html += f'<div class="{cls}">{img(i, hero=hero, alt=alt)}</div>\n'
+            col_span = int(cls.split()[0].rsplit("-", 1)[1])
+            grid_html += f'<div class="{cls}">{img(i, hero=hero, alt=alt, box=(col_span / 4, 0.25))}</div>\n'
     inner = f'<div class="relative z-20 h-full grid grid-cols-4 grid-rows-4 gap-1.5">{grid_html}</div>'
-    return _page_shell(style, inner, style["innerPadding"])
+    return _page_shell(ctx, inner, style["innerPadding"])
 
 
 # ── PHOTO_PLUS_QUOTE ─────────────────────────────────────────────────────
 
-def _render_photo_plus_quote(page, style, img, count):
+def _render_photo_plus_quote(page, ctx, img, count):
+    style = ctx.style
     if count == 1:
-        photo_area = f'<div class="w-[85%] h-full">{img(0, hero=True)}</div>'
+        photo_area = f'<div class="w-[85%] h-full">{img(0, hero=True, box=(0.85, 0.58))}</div>'
     elif count >= 2:
-        photo_area = f'''<div class="w-[55%] h-full">{img(0, hero=True)}</div>
-<div class="w-[40%] h-[85%] self-end">{img(1, alt=True)}</div>'''
+        photo_area = f'''<div class="w-[55%] h-full">{img(0, hero=True, box=(0.55, 0.58))}</div>
+<div class="w-[40%] h-[85%] self-end">{img(1, alt=True, box=(0.40, 0.58 * 0.85))}</div>'''
     else:
         photo_area = ""
 
@@ -574,15 +717,18 @@ def _render_photo_plus_quote(page, style, img, count):
     {"" if not page.body_text else f'<p class="{style["body"]} text-xs mt-1 text-center line-clamp-2">{_e(page.body_text)}</p>'}
   </div>
 </div>'''
-    return _page_shell(style, inner, f"{style['innerPadding']} flex flex-col")
+    return _page_shell(ctx, inner, f"{style['innerPadding']} flex flex-col")
 
 
 # ── COLLAGE_PLUS_LETTER ──────────────────────────────────────────────────
 
-def _render_collage_plus_letter(page, style, img, count):
+def _render_collage_plus_letter(page, ctx, img, count):
+    style = ctx.style
+    shown = min(count, 9)
+    box = (0.25, 1 / max(1, math.ceil(shown / 2)))
     photos_html = ""
-    for i in range(min(count, 9)):
-        photos_html += img(i, alt=(i % 2 == 1))
+    for i in range(shown):
+        photos_html += img(i, alt=(i % 2 == 1), box=box)
 
     inner = f'''<div class="grid grid-cols-2 h-full">
   <div class="grid grid-cols-2 gap-1.5 p-4 relative z-20">
@@ -595,39 +741,42 @@ def _render_collage_plus_letter(page, style, img, count):
     {"" if not page.body_text else f'<p class="{style["body"]} text-xs leading-relaxed mt-1">{_e(page.body_text)}</p>'}
   </div>
 </div>'''
-    return _page_shell(style, inner, "")
+    return _page_shell(ctx, inner, "")
 
 
 # ── Fallback ─────────────────────────────────────────────────────────────
 
-def _render_fallback(page, style, img, count):
+def _render_fallback(page, ctx, img, count):
+    style = ctx.style
     if count == 0:
         inner = f'''<div class="relative z-20 text-center max-w-sm">
   {"" if not page.heading_text else f'<h3 class="font-semibold {style["heading"]} mb-2">{_e(page.heading_text)}</h3>'}
   {"" if not page.body_text else f'<p class="{style["body"]} text-sm leading-relaxed">{_e(page.body_text)}</p>'}
 </div>'''
-        return _page_shell(style, inner, f"flex flex-col items-center justify-center {style['innerPadding']}")
+        return _page_shell(ctx, inner, f"flex flex-col items-center justify-center {style['innerPadding']}")
 
     if count == 1:
         inner = f'''<div class="relative z-20 flex flex-col h-full">
-  <div style="height:75%">{img(0, hero=True)}</div>
+  <div style="height:75%">{img(0, hero=True, box=(1.0, 0.75))}</div>
   <div class="flex-1 flex flex-col items-center justify-center min-h-0 pt-3">
     {"" if not page.heading_text else f'<h3 class="font-semibold {style["heading"]} mb-1 text-center">{_e(page.heading_text)}</h3>'}
     {_divider(style)}
     {"" if not page.body_text else f'<p class="{style["body"]} text-xs mt-2 text-center line-clamp-2">{_e(page.body_text)}</p>'}
   </div>
 </div>'''
-        return _page_shell(style, inner, f"{style['innerPadding']} flex flex-col")
+        return _page_shell(ctx, inner, f"{style['innerPadding']} flex flex-col")
 
     if count <= 5:
+        bottom_frac = 0.30 if count > 3 else 0.25
+        bottom_box = (1 / max(1, count - 2), bottom_frac)
         bottom_photos = "".join(
-            f'<div class="flex-1 h-full">{img(i, alt=(i % 2 == 0))}</div>' for i in range(2, count)
+            f'<div class="flex-1 h-full">{img(i, alt=(i % 2 == 0), box=bottom_box)}</div>' for i in range(2, count)
         )
         bottom_h = "30%" if count > 3 else "25%"
         inner = f'''<div class="relative z-20 flex flex-col h-full gap-2">
   <div class="flex gap-2" style="height:50%">
-    <div class="w-[60%] h-full">{img(0, hero=True)}</div>
-    <div class="w-[40%] h-full">{img(1, alt=True)}</div>
+    <div class="w-[60%] h-full">{img(0, hero=True, box=(0.60, 0.50))}</div>
+    <div class="w-[40%] h-full">{img(1, alt=True, box=(0.40, 0.50))}</div>
   </div>
   <div class="flex gap-2" style="height:{bottom_h}">{bottom_photos}</div>
   <div class="flex-1 flex items-center min-h-0 gap-3">
@@ -635,21 +784,23 @@ def _render_fallback(page, style, img, count):
     {"" if not page.body_text else f'<p class="{style["body"]} text-xs line-clamp-2">{_e(page.body_text)}</p>'}
   </div>
 </div>'''
-        return _page_shell(style, inner, f"{style['innerPadding']} flex flex-col")
+        return _page_shell(ctx, inner, f"{style['innerPadding']} flex flex-col")
 
     # 6+ photos: dense mosaic
     row1 = f'''<div class="flex gap-1.5" style="height:30%">
-  <div class="w-[55%] h-full">{img(0, hero=True)}</div>
-  <div class="w-[45%] h-full">{img(1, alt=True)}</div>
+  <div class="w-[55%] h-full">{img(0, hero=True, box=(0.55, 0.30))}</div>
+  <div class="w-[45%] h-full">{img(1, alt=True, box=(0.45, 0.30))}</div>
 </div>'''
+    row2_box = (1 / (min(5, count) - 2), 0.30)
     row2_items = "".join(
-        f'<div class="flex-1 h-full">{img(i, alt=(i % 2 == 0))}</div>' for i in range(2, min(5, count))
+        f'<div class="flex-1 h-full">{img(i, alt=(i % 2 == 0), box=row2_box)}</div>' for i in range(2, min(5, count))
     )
     row2 = f'<div class="flex gap-1.5" style="height:30%">{row2_items}</div>'
     row3 = ""
     if count > 5:
+        row3_box = (1 / (min(10, count) - 5), 0.25)
         row3_items = "".join(
-            f'<div class="flex-1 h-full">{img(i, alt=(i % 2 == 1))}</div>' for i in range(5, min(10, count))
+            f'<div class="flex-1 h-full">{img(i, alt=(i % 2 == 1), box=row3_box)}</div>' for i in range(5, min(10, count))
         )
         row3 = f'<div class="flex gap-1.5" style="height:25%">{row3_items}</div>'
 
@@ -662,4 +813,4 @@ def _render_fallback(page, style, img, count):
     {"" if not page.caption_text else f'<p class="text-xs {style["caption"]} ml-3">{_e(page.caption_text)}</p>'}
   </div>
 </div>'''
-    return _page_shell(style, inner, f"{style['innerPadding']} flex flex-col")
+    return _page_shell(ctx, inner, f"{style['innerPadding']} flex flex-col")
@@ -1,7 +1,7 @@
 from functools import lru_cache
 from pathlib import Path
 
-from app.prompts.yaml_loader import load_yaml
+from app.prompts.yaml_loader import load_yaml, register_reload_hook
 
 _PROMPTS_DIR = Path(__file__).resolve().parent
 
@@ -93,3 +93,6 @@ def load_system_prompt() -> str:
         sections.append(f"- {item}")
 
     return "\n".join(sections)
+
+
+register_reload_hook(load_system_prompt.cache_clear)
@@ -0,0 +1,150 @@
+"""Compact, columnar encoding of photo analyses and plans for stage prompts.
+
+With 250 photos, the planning and writing prompts spent most of their input
+tokens on repeating ``key=value`` labels. In compact mode each stage gets a
+table with only the columns it uses. It has one short header, one
+pipe-separated row per photo and blank cells for default values. A long
+value that appears for several photos is written once under SHARED and
+referenced as ``§N``. Those references are deterministic for a given set of
+analyses, so the response parser can rebuild the table and expand any ``§N``
+the model copies into its output (``expand_shared_refs``).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any
+
+# Values at least this long that occur for 2+ photos are written once under SHARED
+_MIN_SHARED_CHARS = 16
+
+_REF_RE = re.compile(r"§(\d+)")
+
+
+@dataclass(frozen=True)
+class Column:
+    """One photo-analysis field as a prompt column."""
+
+    key: str
+    short: str
+    label: str
+    default: Any = None          # cells equal to the default are left blank
+    max_chars: int | None = None
+
+
+PLANNING_COLUMNS = (
+    Column("photo_index", "i", "photo"),
+    Column("cluster_id", "c", "cluster"),
+    Column("hero_candidate", "h", "hero", default=False),
+    Column("quality_score", "q", "quality"),
+    Column("narrative_role", "r", "role"),
+    Column("is_book_worthy", "w", "book-worthy", default=True),
+    Column("is_duplicate", "d", "duplicate", default=False),
+    Column("aspect_ratio", "a", "aspect"),
+    Column("description", "t", "description", max_chars=80),
+)
+
+WRITING_COLUMNS = (
+    Column("photo_index", "i", "photo"),
+    Column("description", "t", "description"),
+    Column("emotion", "e", "emotion"),
+    Column("mood", "m", "mood"),
+    Column("activity", "v", "activity"),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt-size reporting (~4 characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def _cell(column: Column, analysis: dict, position: int) -> str:
+    value = analysis.get(column.key, position if column.key == "photo_index" else None)
+    if value is None or value == column.default:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(v) for v in value)
+    text = " ".join(str(value).replace("|", "/").split())
+    if column.max_chars is not None:
+        text = text[:column.max_chars]
+    return text
+
+
+def _cells(analyses: list[dict], columns: tuple[Column, ...]) -> list[list[str]]:
+    return [[_cell(col, a, i) for col in columns] for i, a in enumerate(analyses)]
+
+
+def _shared_table(rows: list[list[str]]) -> dict[str, str]:
+    counts: dict[str, int] = {}
+    for row in rows:
+        for cell in row:
+            if len(cell) >= _MIN_SHARED_CHARS:
+                counts[cell] = counts.get(cell, 0) + 1
+    repeated = [value for value, n in counts.items() if n > 1]
+    return {value: f"§{n}" for n, value in enumerate(repeated, 1)}
+
+
+def shared_values(analyses: list[dict], columns: tuple[Column, ...] = WRITING_COLUMNS) -> dict[str, str]:
+    """``§N`` → value for the references ``encode_analyses`` would use for these analyses."""
+    return {ref: value for value, ref in _shared_table(_cells(analyses, columns)).items()}
+
+
+def encode_analyses(analyses: list[dict], columns: tuple[Column, ...]) -> str:
+    """Analyses as a compact pipe-separated table with a one-line legend."""
+    rows = _cells(analyses, columns)
+    shared = _shared_table(rows)
+    defaults = [
+        f"{col.short}={'yes' if col.default else 'no'}" for col in columns if isinstance(col.default, bool)
+    ]
+    legend = "Columns: " + ", ".join(f"{col.short}={col.label}" for col in columns)
+    if defaults:
+        legend += f". 1=yes, 0=no; blank means {', '.join(defaults)}"
+    if shared:
+        legend += ". §N = repeated value listed under SHARED"
+
+    lines = [legend, "|".join(col.short for col in columns)]
+    lines.extend("|".join(shared.get(cell, cell) for cell in row).rstrip("|") for row in rows)
+    if shared:
+        lines.append("SHARED:")
+        lines.extend(f"{ref}={value}" for value, ref in shared.items())
+    return "\n".join(lines)
+
+
+def encode_plan(plan: dict) -> str:
+    """A stage C plan as indented lines (chapters, then one line per spread)."""
+    lines = []
+    for ch in plan.get("chapters", []):
+        header = f"Chapter {ch.get('chapter_index', '?')}: {ch.get('title', '')}"
+        if ch.get("theme"):
+            header += f" — {ch['theme']}"
+        lines.append(header)
+        for sp in ch.get("spreads", []):
+            flags = [name for name, key in (("hero", "is_hero"), ("breather", "is_breather")) if sp.get(key)]
+            photos = ",".join(str(p) for p in sp.get("photo_indices", []))
+            line = f"  Spread {sp.get('spread_index', '?')}: {sp.get('layout_id', '?')} [{photos}]"
+            lines.append(f"{line} {' '.join(flags)}".rstrip())
+    for key, value in plan.items():
+        if key != "chapters" and isinstance(value, (str, int, float)):
+            lines.append(f"{key}: {value}")
+    return "\n".join(lines)
+
+
+def expand_shared_refs(value: Any, table: dict[str, str]) -> Any:
+    """Replace ``§N`` references from ``table`` in every string inside ``value``."""
+    if not table:
+        return value
+    if isinstance(value, str):
+        if "§" not in value:
+            return value
+        return _REF_RE.sub(lambda m: table.get(m.group(0), m.group(0)), value)
+    if isinstance(value, dict):
+        return {k: expand_shared_refs(v, table) for k, v in value.items()}
+    if isinstance(value, list):
+        return [expand_shared_refs(v, table) for v in value]
+    return value
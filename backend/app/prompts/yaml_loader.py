@@ -1,18 +1,27 @@
-"""Central YAML loader with LRU caching for all prompt/config data."""
+"""Central YAML loader with LRU caching for all prompt/config data.
+
+``load_yaml`` / ``load_all_yaml_dir`` return deep copies, so callers that
+mutate the data are safe; use them for import-time constants. Per-request
+code should read through the prompt registry instead: frozen, shared views
+of the data plus prompt sections compiled once, so building a prompt copies
+nothing.
+"""
 
 from __future__ import annotations
 
 import copy
 from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from string import Formatter
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
 
 import yaml
 
 _DATA_DIR = Path(__file__).resolve().parent / "data"
 
-# Internal cache that stores the raw parsed data (never exposed directly)
-_all_yaml_dir_cache: dict[str, Any] = {}
+# Caches derived from the YAML data (cleared by reload())
+_reload_hooks: list[Callable[[], None]] = []
 
 
 @lru_cache(maxsize=64)
@@ -24,6 +33,19 @@ def _load_yaml_raw(filename: str) -> dict[str, Any]:
     return data if isinstance(data, dict) else {"_root": data}
 
 
+@lru_cache(maxsize=16)
+def _load_yaml_dir_raw(subdir: str) -> dict[str, Any]:
+    """Load all YAML files from a subdirectory, keyed by stem name (cached, internal)."""
+    target = _DATA_DIR / subdir
+    if not target.is_dir():
+        return {}
+    result: dict[str, Any] = {}
+    for fpath in sorted(target.glob("*.yaml")):
+        with open(fpath, encoding="utf-8") as f:
+            result[fpath.stem] = yaml.safe_load(f)
+    return result
+
+
 def load_yaml(filename: str) -> dict[str, Any]:
     """Load a YAML file, returning a deep copy to prevent cache mutation."""
     return copy.deepcopy(_load_yaml_raw(filename))
@@ -38,28 +60,94 @@ def load_yaml_section(filename: str, section: str) -> Any:
 
 
 def load_all_yaml_dir(subdir: str) -> dict[str, Any]:
-    """Load all YAML files from a subdirectory, keyed by stem name (cached)."""
-    if subdir in _all_yaml_dir_cache:
-        return copy.deepcopy(_all_yaml_dir_cache[subdir])
+    """Load all YAML files from a subdirectory, keyed by stem name (deep copied)."""
+    return copy.deepcopy(_load_yaml_dir_raw(subdir))
 
-    target = _DATA_DIR / subdir
-    if not target.is_dir():
-        return {}
-    result: dict[str, Any] = {}
-    for fpath in sorted(target.glob("*.yaml")):
-        with open(fpath, encoding="utf-8") as f:
-            result[fpath.stem] = yaml.safe_load(f)
-    _all_yaml_dir_cache[subdir] = result
-    return copy.deepcopy(result)
+
+def freeze(value: Any) -> Any:
+    """Read-only view of parsed YAML: dicts become mappingproxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+# ── Prompt registry ──────────────────────────────────────────────────────
+
+
+class PromptFragment:
+    """A prompt section compiled once: static sections are pre-rendered."""
+
+    __slots__ = ("text", "fields", "_static")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.fields = frozenset(name for _, name, _, _ in Formatter().parse(text) if name)
+        self._static: str | None = None
+        if not self.fields:
+            try:
+                self._static = text.format()  # resolve {{ }} escapes once
+            except (KeyError, IndexError, ValueError):
+                pass
+
+    def render(self, variables: Mapping[str, Any] | None = None) -> str:
+        """The section with ``variables`` filled in (unfillable placeholders leave it unformatted)."""
+        if not variables:
+            return self.text
+        if self._static is not None:
+            return self._static
+        try:
+            return self.text.format_map(variables)
+        except (KeyError, IndexError):
+            return self.text
+
+
+class PromptRegistry:
+    """Immutable prompt data shared by every request; build once, replace on reload()."""
+
+    def __init__(self) -> None:
+        sections = _load_yaml_raw("prompt_sections.yaml")
+        self.sections: Mapping[str, PromptFragment] = MappingProxyType({
+            name: PromptFragment(text) for name, text in sections.items() if isinstance(text, str)
+        })
+        self._files: dict[str, Any] = {}
+        self._dirs: dict[str, Any] = {}
+
+    def section(self, name: str, variables: Mapping[str, Any] | None = None) -> str:
+        fragment = self.sections.get(name)
+        return fragment.render(variables) if fragment else ""
+
+    def data(self, filename: str) -> Mapping[str, Any]:
+        """Frozen contents of a YAML file (shared; never copy or mutate)."""
+        data = self._files.get(filename)
+        if data is None:
+            data = self._files[filename] = freeze(_load_yaml_raw(filename))
+        return data
+
+    def yaml_dir(self, subdir: str) -> Mapping[str, Any]:
+        """Frozen contents of every YAML file in a subdirectory, keyed by stem."""
+        data = self._dirs.get(subdir)
+        if data is None:
+            data = self._dirs[subdir] = freeze(_load_yaml_dir_raw(subdir))
+        return data
+
+
+@lru_cache(maxsize=1)
+def get_prompt_registry() -> PromptRegistry:
+    """The process-wide prompt registry (built on first use; call at startup to warm it)."""
+    return PromptRegistry()
+
+
+def register_reload_hook(hook: Callable[[], None]) -> None:
+    """Have reload() also call ``hook``, e.g. to clear a cache of rendered prompt text."""
+    _reload_hooks.append(hook)
 
 
 def reload() -> None:
     """Clear all caches — useful for dev hot-reload."""
     _load_yaml_raw.cache_clear()
-    _all_yaml_dir_cache.clear()
-    # Also clear load_system_prompt cache if it exists
-    try:
-        from app.prompts import load_system_prompt
-        load_system_prompt.cache_clear()
-    except (ImportError, AttributeError):
-        pass
+    _load_yaml_dir_raw.cache_clear()
+    get_prompt_registry.cache_clear()
+    for hook in _reload_hooks:
+        hook()
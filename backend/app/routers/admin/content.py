@@ -25,11 +25,12 @@ class ContactUpdateBody(BaseModel):
 async def list_submissions(
     page: int = Query(1, ge=1),
     status: str = Query(""),
+    cursor: str = Query(""),
     _user: dict = Depends(require_admin),
     svc: AdminService = Depends(get_admin_service),
 ):
     logger.info("admin_list_submissions", page=page, status=status)
-    return await svc.list_design_submissions(page=page, status=status)
+    return await svc.list_design_submissions(page=page, status=status, cursor=cursor)
 
 
 @router.post("/submissions/{submission_id}/review")
@@ -53,11 +54,12 @@ async def review_submission(
 async def list_contacts(
     page: int = Query(1, ge=1),
     status: str = Query(""),
+    cursor: str = Query(""),
     _user: dict = Depends(require_admin),
     svc: AdminService = Depends(get_admin_service),
 ):
     logger.info("admin_list_contacts", page=page, status=status)
-    return await svc.list_contacts(page=page, status=status)
+    return await svc.list_contacts(page=page, status=status, cursor=cursor)
 
 
 @router.patch("/contacts/{contact_id}")
@@ -10,6 +10,18 @@ logger = structlog.get_logger()
 router = APIRouter(prefix="/api/admin/dashboard", tags=["admin-dashboard"])
 
 
+@router.get("/overview")
+async def dashboard_overview(
+    days: int = Query(30, ge=1, le=365),
+    template_limit: int = Query(10, ge=1, le=50),
+    _user: dict = Depends(require_admin),
+    svc: AdminService = Depends(get_admin_service),
+):
+    """All dashboard panels in one response, fetched concurrently from the aggregate cache."""
+    logger.info("admin_dashboard_overview", days=days)
+    return await svc.get_dashboard_overview(days, template_limit)
+
+
 @router.get("/stats")
 async def dashboard_stats(
     _user: dict = Depends(require_admin),
@@ -21,11 +21,12 @@ async def list_purchases(
     user_id: str = Query(""),
     status: str = Query(""),
     plan_id: str = Query(""),
+    cursor: str = Query(""),
     _user: dict = Depends(require_admin),
     svc: AdminService = Depends(get_admin_service),
 ):
     logger.info("admin_list_purchases", page=page, user_id=user_id, status=status, plan_id=plan_id)
-    return await svc.list_purchases(page=page, user_id=user_id, status=status, plan_id=plan_id)
+    return await svc.list_purchases(page=page, user_id=user_id, status=status, plan_id=plan_id, cursor=cursor)
 
 
 @router.post("/purchases/{purchase_id}/refund")
@@ -48,8 +49,9 @@ async def refund_purchase(
 async def payment_audit(
     page: int = Query(1, ge=1),
     event_type: str = Query(""),
+    cursor: str = Query(""),
     _user: dict = Depends(require_admin),
     svc: AdminService = Depends(get_admin_service),
 ):
     logger.info("admin_payment_audit", page=page, event_type=event_type)
-    return await svc.get_payment_audit_log(page=page, event_type=event_type)
+    return await svc.get_payment_audit_log(page=page, event_type=event_type, cursor=cursor)
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, Query
 from app.middleware.admin_auth import require_admin
 from app.dependencies import get_admin_service, get_settings
 from app.services.admin_service import AdminService
+from app.services.metrics import get_metrics
 from app.services.session_store import get_session_store
 
 logger = structlog.get_logger()
@@ -32,6 +33,15 @@ async def system_health(
     }
 
 
+@router.get("/metrics")
+async def system_metrics(
+    _user: dict = Depends(require_admin),
+):
+    """Stage, Gemini and PDF latency percentiles plus executor/session gauges."""
+    logger.info("admin_system_metrics")
+    return get_metrics().snapshot()
+
+
 @router.get("/errors")
 async def recent_errors(
     limit: int = Query(20, ge=1, le=100),
@@ -46,8 +56,9 @@ async def recent_errors(
 async def audit_log(
     page: int = Query(1, ge=1),
     action: str = Query(""),
+    cursor: str = Query(""),
     _user: dict = Depends(require_admin),
     svc: AdminService = Depends(get_admin_service),
 ):
     logger.info("admin_audit_log", page=page, action=action)
-    return await svc.list_audit_log(page=page, action=action)
+    return await svc.list_audit_log(page=page, action=action, cursor=cursor)
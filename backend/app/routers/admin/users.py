@@ -36,11 +36,12 @@ async def list_users(
     plan: str = Query(""),
     role: str = Query(""),
     sort: str = Query("created_at"),
+    cursor: str = Query(""),
     _user: dict = Depends(require_admin),
     svc: AdminService = Depends(get_admin_service),
 ):
     logger.info("admin_list_users", page=page, search=search, plan=plan, role=role)
-    return await svc.list_users(page=page, search=search, plan=plan, role=role, sort=sort)
+    return await svc.list_users(page=page, search=search, plan=plan, role=role, sort=sort, cursor=cursor)
 
 
 @router.get("/{user_id}")
@@ -1,18 +1,19 @@
 import asyncio
 import base64
-import io
 import json
 import os
-import tempfile
 import time
 import uuid
+from dataclasses import dataclass
+from typing import Literal
 
 import structlog
-from fastapi import APIRouter, Depends, Form, HTTPException, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
 from starlette.responses import StreamingResponse as StarletteStreamingResponse
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.dependencies import get_orchestrator, get_supabase_service
 from app.middleware.auth import get_current_user, check_user_ban
@@ -37,8 +38,18 @@ from app.models.schemas import (
     calculate_page_count,
 )
 from app.services.memory_book_orchestrator import MemoryBookOrchestrator
+from app.services.pdf_artifact_store import PdfJobRecord, get_pdf_artifact_store
+from app.services.pdf_job_queue import DONE, FAILED, PRIORITY_FREE, PRIORITY_PAID, QUEUED, RUNNING, PdfJob, PdfQueueFull, get_pdf_job_queue
+from app.services.print_derivatives import (
+    discard_directory,
+    load_print_derivatives,
+    save_print_derivatives,
+    spool_photos,
+    stored_print_derivatives,
+)
 from app.services.session_store import get_session_store
 from app.services.template_service import get_template
+from app.pdf_templates.export_profiles import get_export_profile
 
 logger = structlog.get_logger()
 
@@ -507,9 +518,17 @@ async def analyze_stream(
     async def analyze_task():
         try:
             async with session._lock:
+                # Keep print-size copies on disk for session-backed PDF export
+                derivatives = asyncio.create_task(
+                    save_print_derivatives(session.session_id, session.image_bytes)
+                )
                 result = await orchestrator.analyze(
                     session.image_bytes, session.mime_types, on_progress,
                 )
+                try:
+                    session.print_dir = await derivatives
+                except Exception:
+                    logger.warning("print_derivatives_failed", session_id=session_id, exc_info=True)
                 # Cache results in session
                 session.photo_analyses = result.photo_analyses
                 session.clusters = result.clusters
@@ -967,8 +986,39 @@ async def regenerate_text(
     return RegenerateTextResponse(new_text=new_text)
 
 
-@router.post("/pdf")
-async def download_pdf(
+# ── PDF export ───────────────────────────────────────────────────────────
+# Every export runs as a job on the bounded PDF queue (see pdf_job_queue), so
+# only `pdf_workers` Chromium renders run at once. Finished PDFs land in the
+# disk-backed token store below and are downloaded by token.
+
+def _validate_export_profile(name: str) -> str | None:
+    """Return the requested PDF export profile name, or None for the server default."""
+    if not name:
+        return None
+    try:
+        return get_export_profile(name).name
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@dataclass
+class _PdfExportRequest:
+    """Parsed form fields shared by every PDF export endpoint."""
+    draft: MemoryBookDraft
+    template_slug: str
+    page_size: str
+    template_config: dict
+    photo_data: dict[int, bytes]
+    photo_analyses: list[dict] | None
+    overrides: dict
+    design_scale: dict
+    export_profile: str | None
+    # Photos already on disk (a session's print copies): read by the PDF worker, not held here
+    photo_dir: str | None = None
+    photo_indices: frozenset[int] = frozenset()
+
+
+async def _pdf_export_form(
     images: list[UploadFile],
     draft_json: str = Form(...),
     template_slug: str = Form("romantic"),
@@ -985,10 +1035,9 @@ async def download_pdf(
     custom_width: float = Form(0),
     custom_height: float = Form(0),
     custom_unit: str = Form("mm"),
-    orchestrator: MemoryBookOrchestrator = Depends(get_orchestrator),
-    user: dict | None = Depends(get_current_user),
-    supa: SupabaseService = Depends(get_supabase_service),
-) -> StreamingResponse:
+    export_profile: str = Form(""),
+) -> _PdfExportRequest:
+    export_profile = _validate_export_profile(export_profile)
     draft = MemoryBookDraft(**json.loads(draft_json))
     template_config = get_template(template_slug) or get_template("romantic") or {}
 
@@ -1022,6 +1071,27 @@ async def download_pdf(
         except Exception:
             pass
 
+    return _PdfExportRequest(
+        draft=draft,
+        template_slug=template_slug,
+        page_size=page_size,
+        template_config=template_config,
+        photo_data=photo_data,
+        photo_analyses=photo_analyses,
+        overrides=overrides,
+        design_scale=_design_scale(page_size, bleed_mm, margin_mm, custom_width, custom_height, custom_unit),
+        export_profile=export_profile,
+    )
+
+
+def _design_scale(
+    page_size: str,
+    bleed_mm: float,
+    margin_mm: float,
+    custom_width: float,
+    custom_height: float,
+    custom_unit: str,
+) -> dict:
     design_scale = {
         "page_size": page_size,
         "bleed_mm": bleed_mm,
@@ -1040,214 +1110,558 @@ async def download_pdf(
         else:
             design_scale["custom_width_mm"] = custom_width
             design_scale["custom_height_mm"] = custom_height
+    return design_scale
 
-    pdf_bytes = await orchestrator.generate_pdf(
-        draft, photo_data, template_config, design_scale, photo_analyses, overrides,
-        on_progress=None,
-    )
 
-    # Track PDF download
-    user_id = user.get("sub") if user else None
+async def _pdf_priority(supa: SupabaseService, user_id: str | None) -> int:
+    """Paid users (pro plan or purchased credits) jump ahead of free exports."""
+    if not user_id:
+        return PRIORITY_FREE
     try:
-        await supa.record_pdf_download(user_id, {
-            "template_slug": template_slug,
-            "num_pages": len(draft.pages),
-            "page_size": page_size,
-            "file_size_bytes": len(pdf_bytes),
-            "download_method": "direct",
-        })
+        profile = await supa.get_profile(user_id)
     except Exception:
-        logger.warning("pdf_download_tracking_failed", exc_info=True)
+        logger.warning("pdf_priority_lookup_failed", user_id=user_id, exc_info=True)
+        return PRIORITY_FREE
+    if not profile:
+        return PRIORITY_FREE
+    if profile.get("plan", "free") in ("monthly_pro", "annual_pro") or (profile.get("credits") or 0) > 0:
+        return PRIORITY_PAID
+    return PRIORITY_FREE
 
-    safe_title = "".join(c if c.isalnum() or c in " -_" else "_" for c in draft.title)[:50]
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{safe_title}.pdf"'},
-    )
 
+async def _record_pdf_job(job_id: str, user_id: str | None, status: str, *args: str | None) -> None:
+    """Save a job's state to the shared index; a failure only costs other workers the status."""
+    try:
+        await get_pdf_artifact_store().record_job(job_id, user_id, status, *args)
+    except Exception:
+        logger.warning("pdf_job_record_failed", job_id=job_id, status=status, exc_info=True)
+
+
+async def _submit_pdf_job(
+    req: _PdfExportRequest,
+    orchestrator: MemoryBookOrchestrator,
+    supa: SupabaseService,
+    user_id: str | None,
+    download_method: str,
+) -> PdfJob:
+    """Queue a PDF export; the job result is a download token for the PDF store.
+
+    Photos are read from disk when a worker starts the job, so queued jobs
+    don't hold them in memory: straight from ``req.photo_dir`` (a session's
+    print copies), otherwise from a spool of the uploaded bytes written here.
+    """
+    priority = await _pdf_priority(supa, user_id)
+    spool_dir = None
+    if req.photo_dir:
+        photo_dir, indices = req.photo_dir, set(req.photo_indices)
+    else:
+        indices = set(req.photo_data)
+        photo_dir = spool_dir = await spool_photos(req.photo_data)
+        # The endpoint keeps ``req`` alive while it waits on the job; drop the bytes it holds
+        req.photo_data = {}
+
+    async def work(job: PdfJob) -> str:
+        token = uuid.uuid4().hex
+        pdf_path = get_pdf_artifact_store().path_for(token)
+        try:
+            await _record_pdf_job(job.job_id, user_id, RUNNING)
+            photo_data = await load_print_derivatives(photo_dir, indices)
+            if len(photo_data) < len(indices):
+                # The session expired (and its print copies went) while the job was queued
+                raise RuntimeError(f"{len(indices) - len(photo_data)} photos disappeared before the export started")
+            # The PDF is streamed from Chromium into the store's temp file; only its size comes back
+            file_size = await orchestrator.generate_pdf(
+                req.draft, photo_data, req.template_config, req.design_scale,
+                req.photo_analyses, req.overrides,
+                on_progress=job.emit, export_profile=req.export_profile, output_path=pdf_path,
+            )
+            await get_pdf_artifact_store().put(token, pdf_path, req.draft.title or "memory-book", user_id)
+            # Track PDF download
+            try:
+                await supa.record_pdf_download(user_id, {
+                    "template_slug": req.template_slug,
+                    "num_pages": len(req.draft.pages),
+                    "page_size": req.page_size,
+                    "file_size_bytes": file_size,
+                    "download_method": download_method,
+                })
+            except Exception:
+                logger.warning("pdf_download_tracking_failed", exc_info=True)
+        except asyncio.CancelledError:
+            _unlink_quietly(pdf_path)
+            raise
+        except Exception as exc:
+            _unlink_quietly(pdf_path)
+            logger.error("pdf_job_error", job_id=job.job_id, exc_info=True)
+            error_msg = "PDF generation failed"
+            if "timeout" in str(exc).lower():
+                error_msg = "PDF generation timed out. Try reducing the number of pages."
+            await job.emit({"stage": "error", "message": error_msg, "job_id": job.job_id})
+            raise
+        await job.emit({"stage": "complete", "download_token": token, "job_id": job.job_id})
+        return token
+
+    async def finish(job: PdfJob) -> None:
+        if spool_dir:
+            await discard_directory(spool_dir)
+        error = (job.last_event or {}).get("message") if job.status == FAILED else None
+        await _record_pdf_job(job.job_id, user_id, job.status, job.result, error)
 
-# ── Disk-backed PDF store with auto-expiry (10 min) ──────────────────
-_PDF_DIR = os.path.join(tempfile.gettempdir(), "keepsqueak_pdfs")
-os.makedirs(_PDF_DIR, exist_ok=True)
+    try:
+        job = get_pdf_job_queue().submit(work, user_id=user_id, priority=priority, cleanup=finish)
+    except PdfQueueFull:
+        if spool_dir:
+            await discard_directory(spool_dir)
+        raise HTTPException(
+            status_code=503,
+            detail="The PDF export queue is full. Please try again in a minute.",
+            headers={"Retry-After": "30"},
+        )
+    # Other worker processes answer status polls and downloads for this job from the shared index
+    await _record_pdf_job(job.job_id, user_id, QUEUED)
+    return job
 
-# token -> (file_path, timestamp, title, user_id)
-_pdf_store: dict[str, tuple[str, float, str, str | None]] = {}
-_pdf_store_lock = asyncio.Lock()
-_PDF_EXPIRY_S = 600  # 10 minutes
 
+@router.post("/pdf")
+async def download_pdf(
+    request: Request,
+    req: _PdfExportRequest = Depends(_pdf_export_form),
+    orchestrator: MemoryBookOrchestrator = Depends(get_orchestrator),
+    user: dict | None = Depends(get_current_user),
+    supa: SupabaseService = Depends(get_supabase_service),
+) -> FileResponse:
+    user_id = user.get("sub") if user else None
+    job = await _submit_pdf_job(req, orchestrator, supa, user_id, download_method="direct")
+    try:
+        token = await job.wait()
+    except asyncio.CancelledError:
+        await get_pdf_job_queue().cancel(job.job_id)
+        raise
+    except RuntimeError:
+        raise HTTPException(500, "PDF generation failed")
+    return await _pdf_download_response(token, user_id, request)
 
-def _cleanup_expired_pdfs():
-    """Remove expired entries from the PDF store and delete temp files."""
-    now = time.time()
-    expired = [k for k, (_, ts, _, _) in _pdf_store.items() if now - ts > _PDF_EXPIRY_S]
-    for k in expired:
-        entry = _pdf_store.pop(k, None)
-        if entry:
-            try:
-                os.unlink(entry[0])
-            except OSError:
-                pass
 
+# ── PDF downloads (files + token index in the shared artifact store) ──
 
-@router.get("/pdf/download/{token}")
-async def download_pdf_by_token(
-    token: str,
-    user: dict | None = Depends(get_current_user),
-):
-    """Download a previously generated PDF by token. Token is single-use and user-bound."""
-    async with _pdf_store_lock:
-        _cleanup_expired_pdfs()
-        entry = _pdf_store.pop(token, None)
-    if not entry:
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _range_reaches_end(header: str, size: int) -> bool:
+    """Whether a ``Range`` header asks for the last byte of a ``size``-byte file."""
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return False  # malformed: answered with a 400, nothing is sent
+    for spec in specs.split(","):
+        start, sep, end = spec.strip().partition("-")
+        try:
+            if sep and not start and int(end) > 0:
+                return True  # suffix range: the last N bytes
+            if sep and start and int(start) < size and (not end or int(end) >= size - 1):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def _sends_to_end(request: Request, response: FileResponse, size: int) -> bool:
+    """Whether ``response`` will send the file through its last byte for ``request``."""
+    http_range = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if http_range is None or (
+        if_range is not None and if_range not in (response.headers.get("etag"), response.headers.get("last-modified"))
+    ):
+        return True  # no usable Range: the whole file is sent
+    return _range_reaches_end(http_range, size)
+
+
+async def _pdf_download_response(token: str, requesting_user: str | None, request: Request) -> FileResponse:
+    """Serve a stored PDF from disk (sendfile, HTTP Range aware).
+
+    A download that reaches the end of the file (a plain GET, or the range
+    that completes a resumed download) consumes the token and deletes the file
+    once the response has been sent. Ranges that stop short of the end leave
+    the token in place until the download completes or the token expires.
+    """
+    store = get_pdf_artifact_store()
+    artifact = await store.get(token)
+    if not artifact:
         raise HTTPException(404, "PDF not found or expired")
-    file_path, _ts, title, owner_id = entry
     # Verify requesting user matches the token owner
-    requesting_user = user.get("sub") if user else None
-    if owner_id and requesting_user and owner_id != requesting_user:
+    if artifact.user_id and requesting_user and artifact.user_id != requesting_user:
         raise HTTPException(403, "Not authorized to download this PDF")
-    # Read PDF from temp file and clean up
     try:
-        with open(file_path, "rb") as f:
-            pdf_bytes = f.read()
-        os.unlink(file_path)
-    except FileNotFoundError:
+        stat_result = os.stat(artifact.path)
+    except OSError:
         raise HTTPException(404, "PDF file not found or expired")
-    safe_title = "".join(c if c.isalnum() or c in " -_" else "_" for c in title)[:50]
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes),
+    safe_title = "".join(c if c.isalnum() or c in " -_" else "_" for c in artifact.title)[:50]
+    response = FileResponse(
+        artifact.path,
         media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{safe_title}.pdf"'},
+        filename=f"{safe_title}.pdf",
+        stat_result=stat_result,
     )
+    if _sends_to_end(request, response, stat_result.st_size):
+        if not await store.consume(token):
+            raise HTTPException(404, "PDF not found or expired")  # another request consumed it first
+        response.background = BackgroundTask(_unlink_quietly, artifact.path)
+    return response
+
+
+@router.get("/pdf/download/{token}")
+async def download_pdf_by_token(
+    token: str,
+    request: Request,
+    user: dict | None = Depends(get_current_user),
+):
+    """Download a previously generated PDF by token. Token is single-use and user-bound."""
+    return await _pdf_download_response(token, user.get("sub") if user else None, request)
 
 
 @router.post("/pdf/stream")
 async def download_pdf_stream(
-    images: list[UploadFile],
-    draft_json: str = Form(...),
-    template_slug: str = Form("romantic"),
-    page_size: str = Form("a4"),
-    bleed_mm: float = Form(3.0),
-    margin_mm: float = Form(12.0),
-    photo_analyses_json: str = Form("[]"),
-    crop_overrides_json: str = Form("{}"),
-    filter_overrides_json: str = Form("{}"),
-    text_style_overrides_json: str = Form("{}"),
-    position_offsets_json: str = Form("{}"),
-    blend_overrides_json: str = Form("{}"),
-    size_overrides_json: str = Form("{}"),
-    custom_width: float = Form(0),
-    custom_height: float = Form(0),
-    custom_unit: str = Form("mm"),
+    req: _PdfExportRequest = Depends(_pdf_export_form),
     orchestrator: MemoryBookOrchestrator = Depends(get_orchestrator),
     user: dict = Depends(check_user_ban),
     supa: SupabaseService = Depends(get_supabase_service),
 ) -> StarletteStreamingResponse:
-    """SSE endpoint for PDF generation with real-time progress and token-based download."""
-    draft = MemoryBookDraft(**json.loads(draft_json))
-    template_config = get_template(template_slug) or get_template("romantic") or {}
+    """SSE endpoint for PDF generation with queue position, real-time progress and token-based download.
 
-    photo_data: dict[int, bytes] = {}
-    for i, upload in enumerate(images):
-        photo_data[i] = await upload.read()
+    Closing the connection cancels the export, whether it is still queued or already rendering.
+    """
+    user_id = user.get("sub") if user else None
+    job = await _submit_pdf_job(req, orchestrator, supa, user_id, download_method="stream")
+    return _pdf_job_event_stream(job)
+
+
+def _pdf_job_event_stream(job: PdfJob) -> StarletteStreamingResponse:
+    """Stream a job's events as SSE; the job is cancelled if the client goes away first."""
+    events = job.subscribe()
+
+    async def event_stream():
+        ended = False
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=15.0)
+                    yield f"data: {json.dumps(event)}\n\n"
+                    if event.get("stage") in ("complete", "error", "cancelled"):
+                        ended = True
+                        break
+                except asyncio.TimeoutError:
+                    # SSE heartbeat to keep connection alive
+                    yield ": heartbeat\n\n"
+        finally:
+            job.unsubscribe(events)
+            # A final event is sent just before the worker marks the job finished
+            if not ended and not job.finished:
+                logger.info("pdf_stream_client_disconnected", job_id=job.job_id)
+                await get_pdf_job_queue().cancel(job.job_id)
+
+    return StarletteStreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ── Session-backed PDF export (no photo re-upload) ──────────────────────
+
+# Saved editor_overrides may use the editor's state names or the form keys
+_OVERRIDE_KEYS = {
+    "crop": ("crop", "cropOverrides"),
+    "filter": ("filter", "filterOverrides"),
+    "textStyle": ("textStyle", "textStyleOverrides"),
+    "position": ("position", "positionOffsets"),
+    "blend": ("blend", "blendOverrides"),
+    "size": ("size", "sizeOverrides"),
+}
 
-    photo_analyses = None
-    try:
-        pa_raw = json.loads(photo_analyses_json)
-        if isinstance(pa_raw, list) and len(pa_raw) > 0:
-            photo_analyses = pa_raw
-    except Exception:
-        pass
 
+class SessionPdfRequest(BaseModel):
+    """PDF export that resolves photos server-side from a session or a saved draft.
+
+    Anything left unset falls back to what the session or draft already holds.
+    """
+    session_id: str | None = None
+    draft_id: str | None = None
+    draft: dict | None = None
+    template_slug: str | None = None
+    page_size: str = "a4"
+    bleed_mm: float = 3.0
+    margin_mm: float = 12.0
+    custom_width: float = 0
+    custom_height: float = 0
+    custom_unit: str = "mm"
+    photo_analyses: list[dict] | None = None
+    overrides: dict | None = None
+    export_profile: str = ""
+
+
+def _normalize_overrides(raw: dict | None) -> dict:
     overrides = {}
-    for key, json_str in [
-        ("crop", crop_overrides_json),
-        ("filter", filter_overrides_json),
-        ("textStyle", text_style_overrides_json),
-        ("position", position_offsets_json),
-        ("blend", blend_overrides_json),
-        ("size", size_overrides_json),
-    ]:
+    for key, aliases in _OVERRIDE_KEYS.items():
+        for alias in aliases:
+            value = (raw or {}).get(alias)
+            if isinstance(value, dict) and value:
+                overrides[key] = value
+                break
+    return overrides
+
+
+def _draft_photo_indices(draft: MemoryBookDraft) -> set[int]:
+    """Photo indices the renderer will actually place."""
+    return {idx for page in draft.pages for idx in page.photo_indices}
+
+
+async def _load_draft_photos(
+    supa: SupabaseService, draft_id: str, user_id: str, indices: set[int],
+) -> dict[int, bytes]:
+    rows = [r for r in await supa.list_draft_photos(draft_id, user_id) if r.get("photo_index") in indices]
+    blobs = await asyncio.gather(
+        *[supa.download_draft_photo(r["storage_path"]) for r in rows],
+        return_exceptions=True,
+    )
+    photo_data: dict[int, bytes] = {}
+    for row, blob in zip(rows, blobs):
+        if isinstance(blob, Exception) or not blob:
+            logger.warning("draft_photo_download_failed", draft_id=draft_id, photo_index=row.get("photo_index"))
+            continue
+        photo_data[row["photo_index"]] = blob
+    return photo_data
+
+
+async def _resolve_server_book(
+    body: SessionPdfRequest,
+    user_id: str | None,
+    supa: SupabaseService,
+    page_indices: list[int] | None = None,
+) -> _PdfExportRequest:
+    """Resolve draft, settings and photos from a session or a saved draft.
+
+    With ``page_indices`` only the photos placed on those pages are loaded.
+    """
+    export_profile = _validate_export_profile(body.export_profile)
+    if not body.session_id and not body.draft_id:
+        raise HTTPException(422, "Provide session_id or draft_id.")
+
+    saved: dict = {}
+    if body.session_id:
+        session = get_session_store().get(body.session_id)
+        if not session:
+            raise HTTPException(410, "Session expired. Upload the photos to export this book.")
+        if session.user_id and session.user_id != user_id:
+            raise HTTPException(403, "Not authorized to access this session")
+        if not session.has_print_photos:
+            raise HTTPException(410, "Session photos are not available. Upload the photos to export this book.")
+        saved = {"draft_json": session.draft, "photo_analyses": session.photo_analyses}
+    else:
         try:
-            parsed = json.loads(json_str)
-            if isinstance(parsed, dict) and parsed:
-                overrides[key] = parsed
+            saved = await supa.get_draft(body.draft_id, user_id) or {}
         except Exception:
-            pass
+            saved = {}
+        if not saved:
+            raise HTTPException(404, "Draft not found")
+
+    draft_dict = body.draft or saved.get("draft_json")
+    if not draft_dict:
+        raise HTTPException(400, "No draft to export.")
+    draft = MemoryBookDraft(**draft_dict)
+    if page_indices is not None:
+        bad = [i for i in page_indices if not 0 <= i < len(draft.pages)]
+        if bad:
+            raise HTTPException(422, f"Page index out of range: {bad[0]} (book has {len(draft.pages)} pages).")
+        indices = _draft_photo_indices(draft.model_copy(update={"pages": [draft.pages[i] for i in page_indices]}))
+    else:
+        indices = _draft_photo_indices(draft)
+
+    photo_dir, photo_data = None, {}
+    if body.session_id and page_indices is None:
+        # PDF export: the worker reads the print copies itself; only check they are there
+        photo_dir = session.print_dir
+        available = await stored_print_derivatives(photo_dir, indices)
+    else:
+        if body.session_id:
+            photo_data = await load_print_derivatives(session.print_dir, indices)
+        else:
+            photo_data = await _load_draft_photos(supa, body.draft_id, user_id, indices)
+        available = set(photo_data)
+    if indices and not available:
+        raise HTTPException(410, "Photos for this book are no longer stored. Upload the photos to export it.")
+    if body.session_id and page_indices is None and len(available) < len(indices):
+        # Photos added in the editor after analysis were never uploaded; the PDF needs them
+        raise HTTPException(410, "Some photos in this book are not on the server. Upload the photos to export it.")
+    if len(available) < len(indices):
+        logger.warning(
+            "session_pdf_photos_missing",
+            session_id=body.session_id,
+            draft_id=body.draft_id,
+            missing=len(indices) - len(available),
+        )
 
-    design_scale = {
-        "page_size": page_size,
-        "bleed_mm": bleed_mm,
-        "margin_mm": margin_mm,
+    template_slug = body.template_slug or saved.get("template_slug") or draft.template_slug or "romantic"
+    return _PdfExportRequest(
+        draft=draft,
+        template_slug=template_slug,
+        page_size=body.page_size,
+        template_config=get_template(template_slug) or get_template("romantic") or {},
+        photo_data=photo_data,
+        photo_analyses=body.photo_analyses or saved.get("photo_analyses") or None,
+        overrides=_normalize_overrides(body.overrides if body.overrides is not None else saved.get("editor_overrides")),
+        design_scale=_design_scale(
+            body.page_size, body.bleed_mm, body.margin_mm,
+            body.custom_width, body.custom_height, body.custom_unit,
+        ),
+        export_profile=export_profile,
+        photo_dir=photo_dir,
+        photo_indices=frozenset(available) if photo_dir else frozenset(),
+    )
+
+
+@router.post("/pdf/session/stream")
+async def download_session_pdf_stream(
+    body: SessionPdfRequest,
+    orchestrator: MemoryBookOrchestrator = Depends(get_orchestrator),
+    user: dict = Depends(check_user_ban),
+    supa: SupabaseService = Depends(get_supabase_service),
+) -> StarletteStreamingResponse:
+    """SSE PDF export using the photos already on the server.
+
+    Photos come from the session's print copies (saved during analysis) or from
+    a saved draft's uploaded photos, so the client sends JSON instead of
+    re-uploading every image. Returns 410 when the photos are no longer
+    available; the client should fall back to the multipart /pdf/stream.
+    """
+    user_id = user.get("sub")
+    req = await _resolve_server_book(body, user_id, supa)
+    job = await _submit_pdf_job(req, orchestrator, supa, user_id, download_method="session")
+    return _pdf_job_event_stream(job)
+
+
+# ── Page thumbnails ──────────────────────────────────────────────────────
+
+_MAX_THUMBNAIL_PAGES = 12
+
+
+class PageImagesRequest(SessionPdfRequest):
+    """Render a batch of pages to images for editor previews."""
+    page_indices: list[int] = Field(..., min_length=1, max_length=_MAX_THUMBNAIL_PAGES)
+    image_format: Literal["webp", "png", "jpeg"] = "webp"
+    width_px: int = Field(480, ge=120, le=1600)
+
+
+@router.post("/pages/render")
+async def render_page_images(
+    body: PageImagesRequest,
+    orchestrator: MemoryBookOrchestrator = Depends(get_orchestrator),
+    user: dict = Depends(check_user_ban),
+    supa: SupabaseService = Depends(get_supabase_service),
+):
+    """Thumbnails of selected pages, rendered exactly like the PDF (same templates, fonts, photo crops).
+
+    Photos are resolved server-side like /pdf/session/stream. Images come back
+    base64-encoded so one request can carry a whole batch.
+    """
+    page_indices = list(dict.fromkeys(body.page_indices))
+    req = await _resolve_server_book(body, user.get("sub"), supa, page_indices)
+    try:
+        images = await orchestrator.render_page_images(
+            req.draft, req.photo_data, page_indices,
+            design_scale=req.design_scale,
+            photo_analyses=req.photo_analyses,
+            overrides=req.overrides,
+            image_format=body.image_format,
+            width_px=body.width_px,
+        )
+    except ValueError as exc:
+        raise HTTPException(422, str(exc))
+    except Exception:
+        logger.error("page_images_failed", user_id=user.get("sub"), exc_info=True)
+        raise HTTPException(500, "Page preview failed. Please try again.")
+    return {
+        "format": body.image_format,
+        "pages": [
+            {
+                "index": img.page_index,
+                "width": img.width,
+                "height": img.height,
+                "media_type": img.media_type,
+                "data": base64.b64encode(img.data).decode("ascii"),
+            }
+            for img in images
+        ],
     }
 
-    # Custom page size support
-    if page_size == "custom" and custom_width > 0 and custom_height > 0:
-        if custom_unit == "in":
-            design_scale["custom_width_mm"] = custom_width * 25.4
-            design_scale["custom_height_mm"] = custom_height * 25.4
-        elif custom_unit == "cm":
-            design_scale["custom_width_mm"] = custom_width * 10
-            design_scale["custom_height_mm"] = custom_height * 10
-        else:
-            design_scale["custom_width_mm"] = custom_width
-            design_scale["custom_height_mm"] = custom_height
 
-    progress_queue: asyncio.Queue = asyncio.Queue()
+# ── PDF jobs (submit / poll / download) ──────────────────────────────────
+
+async def _get_owned_pdf_job(job_id: str, user: dict) -> PdfJob | PdfJobRecord:
+    """The job from this process's queue, else its record in the shared index (another worker runs it)."""
+    job = get_pdf_job_queue().get(job_id) or await get_pdf_artifact_store().get_job(job_id)
+    if not job:
+        raise HTTPException(404, "PDF job not found or expired")
+    if job.user_id and job.user_id != user.get("sub"):
+        raise HTTPException(403, "Not authorized to access this PDF job")
+    return job
+
+
+def _pdf_job_status(job: PdfJob | PdfJobRecord) -> dict:
+    if isinstance(job, PdfJobRecord):
+        # Progress and queue position only live in the worker running the job
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "queue_position": 0,
+            "progress": 100 if job.status == DONE else 0,
+            "message": "",
+            "download_token": job.result if job.status == DONE else None,
+            "error": job.error,
+        }
+    event = job.last_event or {}
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "queue_position": get_pdf_job_queue().position(job),
+        "progress": 100 if job.status == DONE else event.get("progress", 0),
+        "message": event.get("message", ""),
+        "download_token": job.result if job.status == DONE else None,
+        "error": event.get("message") if job.status == FAILED else None,
+    }
 
-    async def on_progress(event: dict):
-        await progress_queue.put(event)
 
-    user_id = user.get("sub") if user else None
+@router.post("/pdf/jobs", status_code=202)
+async def submit_pdf_job(
+    req: _PdfExportRequest = Depends(_pdf_export_form),
+    orchestrator: MemoryBookOrchestrator = Depends(get_orchestrator),
+    user: dict = Depends(check_user_ban),
+    supa: SupabaseService = Depends(get_supabase_service),
+):
+    """Queue a PDF export without holding a connection open; poll the returned job for status."""
+    job = await _submit_pdf_job(req, orchestrator, supa, user.get("sub"), download_method="job")
+    return _pdf_job_status(job)
 
-    async def generate_and_stream():
-        try:
-            pdf_bytes = await orchestrator.generate_pdf(
-                draft, photo_data, template_config, design_scale, photo_analyses, overrides,
-                on_progress=on_progress,
-            )
-            # Write PDF to temp file and store metadata only (disk-backed)
-            async with _pdf_store_lock:
-                _cleanup_expired_pdfs()
-                token = uuid.uuid4().hex
-                pdf_path = os.path.join(_PDF_DIR, f"{token}.pdf")
-                with open(pdf_path, "wb") as f:
-                    f.write(pdf_bytes)
-                _pdf_store[token] = (pdf_path, time.time(), draft.title or "memory-book", user_id)
-            # Track PDF download
-            try:
-                await supa.record_pdf_download(user_id, {
-                    "template_slug": template_slug,
-                    "num_pages": len(draft.pages),
-                    "page_size": page_size,
-                    "file_size_bytes": len(pdf_bytes),
-                    "download_method": "stream",
-                })
-            except Exception:
-                logger.warning("pdf_download_tracking_failed", exc_info=True)
-            await progress_queue.put({"stage": "complete", "download_token": token})
-        except Exception as exc:
-            logger.error("pdf_stream_error", exc_info=True)
-            error_msg = "PDF generation failed"
-            if "timeout" in str(exc).lower():
-                error_msg = "PDF generation timed out. Try reducing the number of pages."
-            await progress_queue.put({"stage": "error", "message": error_msg})
 
-    async def event_stream():
-        task = asyncio.create_task(generate_and_stream())
-        while True:
-            try:
-                event = await asyncio.wait_for(progress_queue.get(), timeout=15.0)
-                yield f"data: {json.dumps(event)}\n\n"
-                if event.get("stage") in ("complete", "error"):
-                    break
-            except asyncio.TimeoutError:
-                # SSE heartbeat to keep connection alive
-                yield ": heartbeat\n\n"
-        await task
+@router.get("/pdf/jobs/{job_id}")
+async def get_pdf_job(job_id: str, user: dict = Depends(check_user_ban)):
+    return _pdf_job_status(await _get_owned_pdf_job(job_id, user))
 
-    return StarletteStreamingResponse(
-        event_stream(),
-        media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
-    )
+
+@router.delete("/pdf/jobs/{job_id}")
+async def cancel_pdf_job(job_id: str, user: dict = Depends(check_user_ban)):
+    job = await _get_owned_pdf_job(job_id, user)
+    if isinstance(job, PdfJobRecord) and job.status in (QUEUED, RUNNING):
+        raise HTTPException(409, "This PDF job runs on another server and can't be cancelled from here")
+    cancelled = await get_pdf_job_queue().cancel(job.job_id)
+    return {"job_id": job.job_id, "cancelled": cancelled}
+
+
+@router.get("/pdf/jobs/{job_id}/download")
+async def download_pdf_job(job_id: str, request: Request, user: dict = Depends(check_user_ban)):
+    job = await _get_owned_pdf_job(job_id, user)
+    if job.status != DONE:
+        raise HTTPException(409, f"PDF job is {job.status}")
+    return await _pdf_download_response(job.result, user.get("sub"), request)
@@ -1,17 +1,25 @@
+import asyncio
+import hashlib
 import json
+import time
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, Form, Query
 from pydantic import BaseModel
 
+from app.config import Settings
 from app.middleware.auth import require_auth
-from app.dependencies import get_supabase_service
+from app.dependencies import get_settings, get_supabase_service
+from app.services.executors import CPU_IMAGE, get_executor
 from app.services.supabase_service import SupabaseService
 
 logger = structlog.get_logger()
 
 router = APIRouter(prefix="/api/drafts", tags=["drafts"])
 
+MAX_DRAFT_PHOTOS = 250
+_UPSERT_BATCH = 100
+
 
 class CreateDraftRequest(BaseModel):
     title: str = "Untitled"
@@ -108,29 +116,132 @@ async def delete_draft(
     return {"ok": True}
 
 
+@router.get("/{draft_id}/photos")
+async def get_draft_photo_status(
+    draft_id: str,
+    total: int = Query(0, ge=0, le=MAX_DRAFT_PHOTOS),
+    user: dict = Depends(require_auth),
+    supa: SupabaseService = Depends(get_supabase_service),
+):
+    """Photos stored for a draft, with digests. Pass ``total`` to also get the missing indices.
+
+    A client resuming an interrupted upload calls this first and then posts
+    only the ``missing`` indices (and any whose digest differs locally).
+    """
+    user_id = user.get("sub")
+    logger.info("get_draft_photo_status", user_id=user_id, draft_id=draft_id, total=total)
+    draft, stored = await asyncio.gather(
+        supa.get_draft(draft_id, user_id), supa.list_draft_photos(draft_id, user_id),
+    )
+    if not draft:
+        raise HTTPException(404, "Draft not found")
+    uploaded = {row["photo_index"] for row in stored}
+    return {
+        "photos": [
+            {k: row.get(k) for k in ("photo_index", "content_sha256", "file_size_bytes", "mime_type")}
+            for row in stored
+        ],
+        "missing": [i for i in range(total) if i not in uploaded],
+    }
+
+
 @router.post("/{draft_id}/photos")
 async def upload_draft_photos(
     draft_id: str,
     photos: list[UploadFile],
+    indices: str = Form(""),
     user: dict = Depends(require_auth),
     supa: SupabaseService = Depends(get_supabase_service),
+    settings: Settings = Depends(get_settings),
 ):
+    """Upload draft photos concurrently; ``indices`` (comma-separated) places each file.
+
+    Without ``indices`` the files are photos 0..n-1. Photos whose content
+    matches what is already stored for that index are skipped, and photos that
+    fail are listed in ``failed`` so the client can resend just those.
+    """
     user_id = user.get("sub")
     logger.info("upload_draft_photos", user_id=user_id, draft_id=draft_id, photo_count=len(photos))
+    photo_indices = _parse_photo_indices(indices, len(photos))
     # Verify draft belongs to user
-    draft = await supa.get_draft(draft_id, user_id)
+    draft, stored = await asyncio.gather(
+        supa.get_draft(draft_id, user_id), supa.list_draft_photos(draft_id, user_id),
+    )
     if not draft:
         logger.warning("upload_draft_photos_not_found", user_id=user_id, draft_id=draft_id)
         raise HTTPException(404, "Draft not found")
 
-    paths = []
-    for i, photo in enumerate(photos):
-        data = await photo.read()
-        ct = photo.content_type or "image/jpeg"
-        path = await supa.upload_draft_photo(
-            user_id, draft_id, i, data, ct, photo.filename or ""
-        )
+    t0 = time.perf_counter()
+    stored_by_index = {row["photo_index"]: row for row in stored}
+    semaphore = asyncio.Semaphore(max(1, settings.draft_photo_upload_concurrency))
+
+    async def store(index: int, photo: UploadFile) -> tuple[str, dict | None]:
+        async with semaphore:
+            data = await photo.read()
+            ct = photo.content_type or "image/jpeg"
+            digest = await get_executor(CPU_IMAGE).run(_sha256, data)
+            path = supa.draft_photo_path(user_id, draft_id, index, ct)
+            existing = stored_by_index.get(index)
+            if existing and existing.get("content_sha256") == digest and existing.get("storage_path") == path:
+                return path, None  # already stored
+            await supa.put_draft_photo_object(path, data, ct)
+            return path, {
+                "draft_id": draft_id,
+                "user_id": user_id,
+                "photo_index": index,
+                "original_name": photo.filename or "",
+                "storage_path": path,
+                "mime_type": ct,
+                "file_size_bytes": len(data),
+                "content_sha256": digest,
+            }
+
+    results = await asyncio.gather(
+        *[store(i, photo) for i, photo in zip(photo_indices, photos)], return_exceptions=True,
+    )
+
+    paths, rows, skipped, failed = [], [], [], []
+    for index, result in zip(photo_indices, results):
+        if isinstance(result, BaseException):
+            logger.warning("draft_photo_upload_failed", draft_id=draft_id, photo_index=index, error=str(result))
+            failed.append(index)
+            continue
+        path, row = result
         paths.append(path)
-
-    logger.info("upload_draft_photos_done", user_id=user_id, draft_id=draft_id, uploaded=len(paths))
-    return {"paths": paths, "count": len(paths)}
+        if row is None:
+            skipped.append(index)
+        else:
+            rows.append(row)
+    for start in range(0, len(rows), _UPSERT_BATCH):
+        await supa.upsert_draft_photos(rows[start:start + _UPSERT_BATCH])
+
+    if failed and not paths:
+        raise HTTPException(502, "Photo upload failed")
+    logger.info(
+        "upload_draft_photos_done",
+        user_id=user_id,
+        draft_id=draft_id,
+        uploaded=len(rows),
+        skipped=len(skipped),
+        failed=len(failed),
+        duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+    )
+    return {"paths": paths, "count": len(paths), "skipped": skipped, "failed": failed}
+
+
+def _parse_photo_indices(indices: str, count: int) -> list[int]:
+    if not indices.strip():
+        return list(range(count))
+    try:
+        parsed = [int(part) for part in indices.split(",")]
+    except ValueError:
+        raise HTTPException(422, "indices must be comma-separated integers")
+    if len(parsed) != count or len(set(parsed)) != count:
+        raise HTTPException(422, "indices must list one unique index per uploaded photo")
+    if any(i < 0 or i >= MAX_DRAFT_PHOTOS for i in parsed):
+        raise HTTPException(422, f"Photo indices must be between 0 and {MAX_DRAFT_PHOTOS - 1}")
+    return parsed
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
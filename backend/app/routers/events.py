@@ -47,6 +47,7 @@ async def track_events(
             "session_id": evt.session_id,
         })
 
-    await supa.batch_insert_events(rows)
-    logger.info("track_events_done", inserted=len(rows))
+    # Buffered: inserted in bulk by a background task, so the beacon returns at once
+    queued = await supa.batch_insert_events(rows)
+    logger.info("track_events_done", queued=queued)
     return {"ok": True, "count": len(rows)}
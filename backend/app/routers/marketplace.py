@@ -1,12 +1,12 @@
-import asyncio
 from typing import Optional
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
 from app.dependencies import get_supabase_service
 from app.middleware.auth import require_auth
+from app.services.marketplace_catalog import CatalogSnapshot, MarketplaceCatalog, etag_matches, get_marketplace_catalog
 from app.services.supabase_service import SupabaseService
 
 logger = structlog.get_logger()
@@ -16,54 +16,63 @@ router = APIRouter(prefix="/api/marketplace", tags=["marketplace"])
 
 @router.get("/designs")
 async def list_designs(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     free_only: bool = Query(False),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
-    supa: SupabaseService = Depends(get_supabase_service),
+    cursor: str = Query(""),
 ):
-    """List marketplace designs with optional filters."""
-    logger.info("list_designs", category=category, search=search, free_only=free_only, page=page)
-    if not supa.client:
-        return {"designs": [], "total": 0}
-
-    query = supa.client.table("marketplace_designs").select("*", count="exact")
-
-    if category:
-        query = query.eq("category", category)
-    if free_only:
-        query = query.eq("is_free", True)
-    if search:
-        query = query.ilike("name", f"%{search}%")
+    """List marketplace designs with optional filters.
 
-    offset = (page - 1) * page_size
-    query = query.order("sort_order").order("created_at", desc=True)
-    query = query.range(offset, offset + page_size - 1)
+    Served from the in-memory catalogue snapshot. Pass the previous
+    response's ``next_cursor`` to get the next page; ``page`` still works.
+    """
+    logger.info("list_designs", category=category, search=search, free_only=free_only, page=page)
+    catalog = get_marketplace_catalog()
+    snapshot = await _catalog_snapshot(catalog)
+    not_modified = _apply_cache_headers(request, response, snapshot.etag, catalog.cache_control)
+    if not_modified:
+        return not_modified
 
-    result = await asyncio.to_thread(query.execute)
-    logger.info("list_designs_done", count=len(result.data or []), total=result.count or 0)
-    return {"designs": result.data or [], "total": result.count or 0}
+    designs, total, next_cursor = snapshot.query(category, search, free_only, page, page_size, cursor)
+    logger.info("list_designs_done", count=len(designs), total=total)
+    return {"designs": designs, "total": total, "next_cursor": next_cursor}
 
 
 @router.get("/designs/{slug}")
-async def get_design(
-    slug: str,
-    supa: SupabaseService = Depends(get_supabase_service),
-):
-    """Get a single design by slug."""
+async def get_design(slug: str, request: Request, response: Response):
+    """Get a single design by slug (from the catalogue snapshot)."""
     logger.info("get_design", slug=slug)
-    if not supa.client:
-        raise HTTPException(status_code=404, detail="Design not found")
-
-    result = await asyncio.to_thread(
-        lambda: supa.client.table("marketplace_designs").select("*").eq("slug", slug).single().execute()
-    )
-    if not result.data:
+    catalog = get_marketplace_catalog()
+    snapshot = await _catalog_snapshot(catalog)
+    design = snapshot.by_slug.get(slug)
+    if not design:
         logger.warning("get_design_not_found", slug=slug)
         raise HTTPException(status_code=404, detail="Design not found")
+    not_modified = _apply_cache_headers(request, response, snapshot.design_etags[slug], catalog.cache_control)
+    if not_modified:
+        return not_modified
     logger.info("get_design_done", slug=slug)
-    return result.data
+    return design
+
+
+async def _catalog_snapshot(catalog: MarketplaceCatalog) -> CatalogSnapshot:
+    try:
+        return await catalog.snapshot()
+    except Exception:
+        raise HTTPException(status_code=503, detail="Marketplace temporarily unavailable")
+
+
+def _apply_cache_headers(request: Request, response: Response, etag: str, cache_control: str) -> Response | None:
+    """Set ETag/Cache-Control; returns a 304 response when the client's copy is current."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
 
 
 @router.post("/designs/{slug}/purchase")
@@ -79,7 +88,7 @@ async def purchase_design(
         raise HTTPException(status_code=501, detail="Marketplace not configured")
 
     # Get design
-    design_result = await asyncio.to_thread(
+    design_result = await supa._execute_sync(
         lambda: supa.client.table("marketplace_designs").select("*").eq("slug", slug).single().execute()
     )
     design = design_result.data
@@ -90,7 +99,7 @@ async def purchase_design(
     # Free designs don't need purchase
     if design["is_free"]:
         # Just add to owned
-        await asyncio.to_thread(
+        await supa._execute_sync(
             lambda: supa.client.table("user_owned_designs").upsert({
                 "user_id": user_id,
                 "design_id": design["id"],
@@ -100,7 +109,7 @@ async def purchase_design(
         return {"status": "ok", "message": "Design added to your collection"}
 
     # Check if already owned
-    existing = await asyncio.to_thread(
+    existing = await supa._execute_sync(
         lambda: supa.client.table("user_owned_designs")
             .select("id")
             .eq("user_id", user_id)
@@ -127,7 +136,7 @@ async def purchase_design(
             raise HTTPException(status_code=402, detail="Insufficient credits")
 
     # Add to owned
-    await asyncio.to_thread(
+    await supa._execute_sync(
         lambda: supa.client.table("user_owned_designs").insert({
             "user_id": user_id,
             "design_id": design["id"],
@@ -149,7 +158,7 @@ async def my_designs(
         return {"designs": []}
 
     user_id = user.get("sub")
-    result = await asyncio.to_thread(
+    result = await supa._execute_sync(
         lambda: supa.client.table("user_owned_designs")
             .select("design_id, purchased_at, marketplace_designs(*)")
             .eq("user_id", user_id)
@@ -193,7 +202,7 @@ async def submit_design(
     if body.category not in ("theme", "cover", "layout_pack"):
         raise HTTPException(status_code=422, detail="Invalid category")
 
-    result = await asyncio.to_thread(
+    result = await supa._execute_sync(
         lambda: supa.client.table("design_submissions").insert({
             "designer_id": user_id,
             "name": body.name,
@@ -221,7 +230,7 @@ async def my_submissions(
         return {"submissions": []}
 
     user_id = user.get("sub")
-    result = await asyncio.to_thread(
+    result = await supa._execute_sync(
         lambda: supa.client.table("design_submissions")
             .select("*")
             .eq("designer_id", user_id)
@@ -1,12 +1,20 @@
+import asyncio
 import time
 from datetime import datetime, timezone
 
 import structlog
-from app.middleware.auth import clear_ban_cache
+from app.services.aggregate_cache import get_aggregate_cache
+from app.services.marketplace_catalog import get_marketplace_catalog
+from app.services.pagination import Keyset, approximate_count, keyset_page, quote, search_pattern
 from app.services.supabase_service import SupabaseService
 
 logger = structlog.get_logger()
 
+# Sort columns list_users accepts; each has a (column, id) index (schema P4.1)
+_USER_SORT_COLUMNS = ("created_at", "updated_at", "credits", "books_created")
+
+_NEWEST_FIRST = Keyset.by("-created_at", "-id")
+
 
 class AdminService:
     def __init__(self, supa: SupabaseService):
@@ -15,66 +23,109 @@ class AdminService:
 
     # ── Dashboard ────────────────────────────────────────────────────────
 
+    async def _cached_rpc(self, metric: str, args: tuple, function: str, params: dict | None, default):
+        """An admin_* RPC result through the aggregate cache (per-metric TTL, stale-while-revalidate)."""
+        async def load():
+            return await self.supa.db.rpc(function, params) or default
+        return await get_aggregate_cache().get(metric, args, load)
+
     async def get_dashboard_stats(self) -> dict:
         logger.info("get_dashboard_stats")
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_get_dashboard_stats").execute()
-        )
+        result = await self._cached_rpc("dashboard_stats", (), "admin_get_dashboard_stats", None, {})
         logger.info("get_dashboard_stats_done")
-        return result.data or {}
+        return result
 
     async def get_revenue_timeseries(self, days: int = 30) -> list:
         logger.info("get_revenue_timeseries", days=days)
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_revenue_timeseries", {"days_input": days}).execute()
+        result = await self._cached_rpc(
+            "revenue_timeseries", (days,), "admin_revenue_timeseries", {"days_input": days}, [],
         )
-        logger.info("get_revenue_timeseries_done", count=len(result.data or []))
-        return result.data or []
+        logger.info("get_revenue_timeseries_done", count=len(result))
+        return result
 
     async def get_user_growth_timeseries(self, days: int = 30) -> list:
         logger.info("get_user_growth_timeseries", days=days)
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_user_growth_timeseries", {"days_input": days}).execute()
+        return await self._cached_rpc(
+            "user_growth_timeseries", (days,), "admin_user_growth_timeseries", {"days_input": days}, [],
         )
-        return result.data or []
 
     async def get_generation_timeseries(self, days: int = 30) -> list:
         logger.info("get_generation_timeseries", days=days)
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_generation_timeseries", {"days_input": days}).execute()
+        return await self._cached_rpc(
+            "generation_timeseries", (days,), "admin_generation_timeseries", {"days_input": days}, [],
         )
-        return result.data or []
 
     async def get_template_popularity(self, limit: int = 10) -> list:
         logger.info("get_template_popularity", limit=limit)
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_template_popularity", {"limit_input": limit}).execute()
+        return await self._cached_rpc(
+            "template_popularity", (limit,), "admin_template_popularity", {"limit_input": limit}, [],
         )
-        return result.data or []
+
+    async def get_dashboard_overview(self, days: int = 30, template_limit: int = 10) -> dict:
+        """Every dashboard panel in one call, loaded concurrently. A failing panel is null and listed in ``errors``."""
+        logger.info("get_dashboard_overview", days=days)
+        panels = {
+            "stats": self.get_dashboard_stats(),
+            "revenue": self.get_revenue_timeseries(days),
+            "user_growth": self.get_user_growth_timeseries(days),
+            "generations": self.get_generation_timeseries(days),
+            "template_popularity": self.get_template_popularity(template_limit),
+            "funnel": self.get_funnel_stats(days),
+            "event_stats": self.get_event_stats(days),
+            "wizard_funnel": self.get_wizard_funnel(days),
+            "pdf_stats": self.get_pdf_stats(days),
+        }
+        results = await asyncio.gather(*panels.values(), return_exceptions=True)
+        overview: dict = {"days": days, "errors": []}
+        for name, result in zip(panels, results):
+            if isinstance(result, Exception):
+                logger.warning("dashboard_panel_failed", panel=name, error=str(result))
+                overview[name] = None
+                overview["errors"].append(name)
+            else:
+                overview[name] = result
+        return overview
+
+    # ── Listings ─────────────────────────────────────────────────────────
+
+    async def _list_page(self, table: str, key: str, keyset: Keyset, page: int, per_page: int, cursor: str,
+                         filters: dict | None = None, conditions: list[str] | None = None) -> dict:
+        """One page of an admin listing (see ``keyset_page``) plus its approximate total."""
+        filters = {k: v for k, v in (filters or {}).items() if v}
+        t0 = time.perf_counter()
+        (rows, next_cursor), total = await asyncio.gather(
+            keyset_page(self.supa.db, table, keyset, limit=per_page, cursor=cursor, page=page,
+                        filters=filters, conditions=conditions),
+            approximate_count(self.supa.db, table, filters, conditions),
+        )
+        logger.debug(
+            "admin_list_page",
+            table=table,
+            count=len(rows),
+            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+        return {key: rows, "total": total, "page": page, "next_cursor": next_cursor}
 
     # ── Users ────────────────────────────────────────────────────────────
 
     async def list_users(self, page: int = 1, per_page: int = 20, search: str = "",
-                         plan: str = "", role: str = "", sort: str = "created_at") -> dict:
-        logger.info("list_users", page=page, search=search, plan=plan, role=role, sort=sort)
-        query = self.supa.client.table("profiles").select("*", count="exact")
+                         plan: str = "", role: str = "", sort: str = "created_at", cursor: str = "") -> dict:
+        logger.info("list_users", page=page, search=search, plan=plan, role=role, sort=sort, has_cursor=bool(cursor))
+        desc = sort.startswith("-")
+        sort_col = sort.lstrip("-")
+        if sort_col not in _USER_SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort '{sort_col}'. Use one of: {', '.join(_USER_SORT_COLUMNS)}.")
+        keyset = Keyset.by(sort, "-id" if desc else "id")
 
+        conditions = []
         if search:
-            query = query.or_(f"display_name.ilike.%{search}%,id.eq.{search}" if len(search) == 36 else f"display_name.ilike.%{search}%")
-        if plan:
-            query = query.eq("plan", plan)
-        if role:
-            query = query.eq("role", role)
-
-        desc = sort.startswith("-")
-        sort_col = sort.lstrip("-") if desc else sort
-        query = query.order(sort_col, desc=desc)
-        offset = (page - 1) * per_page
-        query = query.range(offset, offset + per_page - 1)
+            name_match = f"display_name.ilike.{quote(search_pattern(search))}"
+            conditions.append(f"or({name_match},id.eq.{quote(search)})" if len(search) == 36 else name_match)
 
-        result = await self.supa._execute_sync(lambda: query.execute())
-        logger.info("list_users_done", total=result.count or 0, page=page)
-        return {"users": result.data or [], "total": result.count or 0, "page": page}
+        result = await self._list_page("profiles", "users", keyset, page, per_page, cursor,
+                                       filters={"plan": plan, "role": role}, conditions=conditions)
+        logger.info("list_users_done", total=result["total"], page=page)
+        return result
 
     async def get_user_detail(self, user_id: str) -> dict:
         logger.info("get_user_detail", user_id=user_id)
@@ -117,53 +168,34 @@ class AdminService:
 
     async def ban_user(self, user_id: str, reason: str):
         logger.info("ban_user", user_id=user_id, reason=reason)
-        await self.supa._execute_sync(
-            lambda: self.supa.client.table("profiles").update({
-                "banned_at": datetime.now(timezone.utc).isoformat(),
-                "ban_reason": reason,
-            }).eq("id", user_id).execute()
-        )
-        clear_ban_cache(user_id)
+        await self.supa.db.update("profiles", {
+            "banned_at": datetime.now(timezone.utc).isoformat(),
+            "ban_reason": reason,
+        }, {"id": user_id})
+        self.supa.invalidate_profile(user_id)
         logger.info("ban_user_done", user_id=user_id)
 
     async def unban_user(self, user_id: str):
         logger.info("unban_user", user_id=user_id)
-        await self.supa._execute_sync(
-            lambda: self.supa.client.table("profiles").update({
-                "banned_at": None,
-                "ban_reason": None,
-            }).eq("id", user_id).execute()
-        )
-        clear_ban_cache(user_id)
+        await self.supa.db.update("profiles", {"banned_at": None, "ban_reason": None}, {"id": user_id})
+        self.supa.invalidate_profile(user_id)
         logger.info("unban_user_done", user_id=user_id)
 
     async def change_user_role(self, user_id: str, role: str):
         logger.info("change_user_role", user_id=user_id, role=role)
         if role not in ("user", "admin", "moderator"):
             raise ValueError(f"Invalid role: {role}")
-        await self.supa._execute_sync(
-            lambda: self.supa.client.table("profiles").update({"role": role}).eq("id", user_id).execute()
-        )
+        await self.supa.db.update("profiles", {"role": role}, {"id": user_id})
+        self.supa.invalidate_profile(user_id)
         logger.info("change_user_role_done", user_id=user_id, role=role)
 
     # ── Revenue ──────────────────────────────────────────────────────────
 
-    async def list_purchases(self, page: int = 1, per_page: int = 20,
-                             user_id: str = "", status: str = "", plan_id: str = "") -> dict:
-        logger.info("list_purchases", page=page, user_id=user_id, status=status, plan_id=plan_id)
-        query = self.supa.client.table("purchases").select("*", count="exact")
-        if user_id:
-            query = query.eq("user_id", user_id)
-        if status:
-            query = query.eq("status", status)
-        if plan_id:
-            query = query.eq("plan_id", plan_id)
-        query = query.order("created_at", desc=True)
-        offset = (page - 1) * per_page
-        query = query.range(offset, offset + per_page - 1)
-
-        result = await self.supa._execute_sync(lambda: query.execute())
-        return {"purchases": result.data or [], "total": result.count or 0}
+    async def list_purchases(self, page: int = 1, per_page: int = 20, user_id: str = "",
+                             status: str = "", plan_id: str = "", cursor: str = "") -> dict:
+        logger.info("list_purchases", page=page, user_id=user_id, status=status, plan_id=plan_id, has_cursor=bool(cursor))
+        return await self._list_page("purchases", "purchases", _NEWEST_FIRST, page, per_page, cursor,
+                                     filters={"user_id": user_id, "status": status, "plan_id": plan_id})
 
     async def refund_purchase(self, purchase_id: str, reason: str, admin_id: str):
         logger.info("refund_purchase", purchase_id=purchase_id, admin_id=admin_id)
@@ -175,33 +207,22 @@ class AdminService:
                 "refunded_by": admin_id,
             }).eq("id", purchase_id).execute()
         )
+        get_aggregate_cache().invalidate("dashboard_stats", "revenue_timeseries")
         logger.info("refund_purchase_done", purchase_id=purchase_id)
 
-    async def get_payment_audit_log(self, page: int = 1, per_page: int = 20, event_type: str = "") -> dict:
-        logger.info("get_payment_audit_log", page=page, event_type=event_type)
-        query = self.supa.client.table("payment_audit_log").select("*", count="exact")
-        if event_type:
-            query = query.eq("event_type", event_type)
-        query = query.order("created_at", desc=True)
-        offset = (page - 1) * per_page
-        query = query.range(offset, offset + per_page - 1)
-
-        result = await self.supa._execute_sync(lambda: query.execute())
-        return {"entries": result.data or [], "total": result.count or 0}
+    async def get_payment_audit_log(self, page: int = 1, per_page: int = 20, event_type: str = "",
+                                    cursor: str = "") -> dict:
+        logger.info("get_payment_audit_log", page=page, event_type=event_type, has_cursor=bool(cursor))
+        return await self._list_page("payment_audit_log", "entries", _NEWEST_FIRST, page, per_page, cursor,
+                                     filters={"event_type": event_type})
 
     # ── Content ──────────────────────────────────────────────────────────
 
-    async def list_design_submissions(self, page: int = 1, per_page: int = 20, status: str = "") -> dict:
-        logger.info("list_design_submissions", page=page, status=status)
-        query = self.supa.client.table("design_submissions").select("*", count="exact")
-        if status:
-            query = query.eq("status", status)
-        query = query.order("submitted_at", desc=True)
-        offset = (page - 1) * per_page
-        query = query.range(offset, offset + per_page - 1)
-
-        result = await self.supa._execute_sync(lambda: query.execute())
-        return {"submissions": result.data or [], "total": result.count or 0}
+    async def list_design_submissions(self, page: int = 1, per_page: int = 20, status: str = "",
+                                      cursor: str = "") -> dict:
+        logger.info("list_design_submissions", page=page, status=status, has_cursor=bool(cursor))
+        return await self._list_page("design_submissions", "submissions", Keyset.by("-submitted_at", "-id"),
+                                     page, per_page, cursor, filters={"status": status})
 
     async def review_design_submission(self, submission_id: str, action: str, admin_notes: str = ""):
         logger.info("review_design_submission", submission_id=submission_id, action=action)
@@ -214,18 +235,13 @@ class AdminService:
                 "reviewed_at": datetime.now(timezone.utc).isoformat(),
             }).eq("id", submission_id).execute()
         )
+        if action == "approved":
+            get_marketplace_catalog().request_refresh()
 
-    async def list_contacts(self, page: int = 1, per_page: int = 20, status: str = "") -> dict:
-        logger.info("list_contacts", page=page, status=status)
-        query = self.supa.client.table("contact_submissions").select("*", count="exact")
-        if status:
-            query = query.eq("status", status)
-        query = query.order("created_at", desc=True)
-        offset = (page - 1) * per_page
-        query = query.range(offset, offset + per_page - 1)
-
-        result = await self.supa._execute_sync(lambda: query.execute())
-        return {"contacts": result.data or [], "total": result.count or 0}
+    async def list_contacts(self, page: int = 1, per_page: int = 20, status: str = "", cursor: str = "") -> dict:
+        logger.info("list_contacts", page=page, status=status, has_cursor=bool(cursor))
+        return await self._list_page("contact_submissions", "contacts", _NEWEST_FIRST, page, per_page, cursor,
+                                     filters={"status": status})
 
     async def update_contact(self, contact_id: str, status: str, admin_response: str = "", admin_id: str = ""):
         logger.info("update_contact", contact_id=contact_id, status=status, admin_id=admin_id)
@@ -262,44 +278,25 @@ class AdminService:
             }).execute()
         )
 
-    async def list_audit_log(self, page: int = 1, per_page: int = 20, action: str = "") -> dict:
-        logger.info("list_audit_log", page=page, action=action)
-        query = self.supa.client.table("admin_audit_log").select("*", count="exact")
-        if action:
-            query = query.eq("action", action)
-        query = query.order("created_at", desc=True)
-        offset = (page - 1) * per_page
-        query = query.range(offset, offset + per_page - 1)
-
-        result = await self.supa._execute_sync(lambda: query.execute())
-        return {"entries": result.data or [], "total": result.count or 0}
+    async def list_audit_log(self, page: int = 1, per_page: int = 20, action: str = "", cursor: str = "") -> dict:
+        logger.info("list_audit_log", page=page, action=action, has_cursor=bool(cursor))
+        return await self._list_page("admin_audit_log", "entries", _NEWEST_FIRST, page, per_page, cursor,
+                                     filters={"action": action})
 
     # ── Analytics ─────────────────────────────────────────────────────────
 
     async def get_funnel_stats(self, days: int = 30) -> dict:
         logger.info("get_funnel_stats", days=days)
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_funnel_stats", {"days_input": days}).execute()
-        )
-        return result.data or {}
+        return await self._cached_rpc("funnel_stats", (days,), "admin_funnel_stats", {"days_input": days}, {})
 
     async def get_event_stats(self, days: int = 30) -> list:
         logger.info("get_event_stats", days=days)
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_event_stats", {"days_input": days}).execute()
-        )
-        return result.data or []
+        return await self._cached_rpc("event_stats", (days,), "admin_event_stats", {"days_input": days}, [])
 
     async def get_wizard_funnel(self, days: int = 30) -> list:
         logger.info("get_wizard_funnel", days=days)
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_wizard_funnel", {"days_input": days}).execute()
-        )
-        return result.data or []
+        return await self._cached_rpc("wizard_funnel", (days,), "admin_wizard_funnel", {"days_input": days}, [])
 
     async def get_pdf_stats(self, days: int = 30) -> dict:
         logger.info("get_pdf_stats", days=days)
-        result = await self.supa._execute_sync(
-            lambda: self.supa.client.rpc("admin_pdf_stats", {"days_input": days}).execute()
-        )
-        return result.data or {}
+        return await self._cached_rpc("pdf_stats", (days,), "admin_pdf_stats", {"days_input": days}, {})
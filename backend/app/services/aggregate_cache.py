@@ -0,0 +1,126 @@
+"""Stale-while-revalidate cache for admin dashboard aggregates.
+
+Dashboard panels are full-table ``admin_*`` RPCs. Each metric has its own TTL:
+within it the cached value is served as is. Past the TTL (but within
+``stale_factor`` × TTL) the old value is still served while one background
+refresh runs. Only a missing or very old value makes the caller wait, and
+concurrent callers share that load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Default configuration (overridden by Settings)
+DEFAULT_METRIC_TTLS = {
+    "dashboard_stats": 60,
+    "revenue_timeseries": 300,
+    "user_growth_timeseries": 300,
+    "generation_timeseries": 300,
+    "template_popularity": 600,
+    "funnel_stats": 300,
+    "event_stats": 300,
+    "wizard_funnel": 600,
+    "pdf_stats": 300,
+    "list_count": 60,
+}
+_DEFAULT_TTL = 120
+_DEFAULT_STALE_FACTOR = 10
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class AggregateCache:
+    """Per-metric TTL cache with stale-while-revalidate and single-flight loads."""
+
+    def __init__(self, ttls: dict[str, int] | None = None, stale_factor: float = _DEFAULT_STALE_FACTOR) -> None:
+        self._ttls = {**DEFAULT_METRIC_TTLS, **(ttls or {})}
+        self._stale_factor = stale_factor
+        self._entries: dict[tuple[str, Hashable], tuple[float, Any]] = {}
+        self._loading: dict[tuple[str, Hashable], asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get(self, metric: str, args: Hashable, loader: Loader) -> Any:
+        key = (metric, args)
+        ttl = self._ttls.get(metric, _DEFAULT_TTL)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < ttl:
+                self.hits += 1
+                return entry[1]
+            if age < ttl * self._stale_factor:
+                self.stale_hits += 1
+                self._load(key, loader)  # revalidate in the background
+                return entry[1]
+        self.misses += 1
+        return await asyncio.shield(self._load(key, loader))
+
+    def invalidate(self, *metrics: str) -> None:
+        """Drop every cached value of the given metrics (after writes that change them)."""
+        for key in [k for k in self._entries if k[0] in metrics]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+    # ── Private ──────────────────────────────────────────────────────────
+
+    def _load(self, key: tuple[str, Hashable], loader: Loader) -> asyncio.Task:
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_loader(key, loader))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())  # failures are logged in _run_loader
+            self._loading[key] = task
+        return task
+
+    async def _run_loader(self, key: tuple[str, Hashable], loader: Loader) -> Any:
+        t0 = time.perf_counter()
+        try:
+            value = await loader()
+        except Exception:
+            logger.warning("aggregate_refresh_failed", metric=key[0], args=key[1], exc_info=True)
+            raise
+        finally:
+            self._loading.pop(key, None)
+        self._entries[key] = (time.monotonic(), value)
+        logger.info(
+            "aggregate_refreshed",
+            metric=key[0],
+            args=key[1],
+            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+        return value
+
+
+# ── Singleton ────────────────────────────────────────────────────────────
+
+_cache: AggregateCache | None = None
+
+
+def get_aggregate_cache() -> AggregateCache:
+    """Get the global aggregate cache singleton."""
+    global _cache
+    if _cache is None:
+        _cache = AggregateCache()
+    return _cache
+
+
+def init_aggregate_cache(ttls: dict[str, int] | None = None, stale_factor: float = _DEFAULT_STALE_FACTOR) -> AggregateCache:
+    """Initialize the global aggregate cache with custom settings."""
+    global _cache
+    _cache = AggregateCache(ttls=ttls, stale_factor=stale_factor)
+    return _cache
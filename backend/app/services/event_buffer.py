@@ -0,0 +1,426 @@
+"""Buffered bulk inserts for analytics rows (events, PDF downloads).
+
+Callers enqueue rows and return at once. A background task bulk-inserts them
+per table when a table reaches ``flush_rows`` or every ``flush_interval``
+seconds. Memory is bounded by ``max_rows``. When the buffer is full, or a
+flush fails, rows are appended to JSONL spill files, which are replayed once
+inserts succeed again (spill files that are too large → rows are dropped and
+counted). A replay that fails rewrites the file with only the rows still
+unsent. All spill file I/O runs on the io-db pool: a full buffer only queues
+the overflow for a background writer. A claimed file whose worker died is
+re-claimed at startup. A batch the database rejects (a 4xx such as an FK
+violation) is split to isolate the bad rows. Rows rejected on
+``_MAX_REPLAY_ATTEMPTS`` replays go to a dead-letter file. Outages
+(connection errors, 5xx) never use up a row's attempts. Delivery is
+at-least-once: only a replay interrupted by a crash can insert a batch
+twice, which is acceptable for analytics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+import structlog
+
+from app.services.executors import IO_DB, get_executor
+from app.services.postgrest_client import PostgrestError
+
+logger = structlog.get_logger()
+
+# Default configuration (overridden by Settings)
+_DEFAULT_MAX_ROWS = 5000
+_DEFAULT_FLUSH_ROWS = 200
+_DEFAULT_FLUSH_INTERVAL = 2.0
+_DEFAULT_SPILL_DIR = os.path.join(tempfile.gettempdir(), "keepsqueak_events")
+_MAX_SPILL_BYTES = 50 * 1024 * 1024
+_SHUTDOWN_FLUSH_TIMEOUT = 10.0
+_MAX_REPLAY_ATTEMPTS = 5
+_ATTEMPTS_KEY = "_spill_attempts"  # stored in spilled rows, removed before insert
+_RETRYABLE_STATUS = {401, 403, 408, 429}  # 4xx responses that say nothing about the rows
+
+# Spill appends from different pool threads can target the same file
+_WRITE_LOCK = threading.Lock()
+
+# _insert_batch outcomes
+_OK, _REJECTED, _UNAVAILABLE = "ok", "rejected", "unavailable"
+
+InsertFn = Callable[[str, list[dict]], Awaitable[object]]
+
+
+class EventBuffer:
+    """Per-table row queues drained in bulk by one background task."""
+
+    def __init__(
+        self,
+        insert: InsertFn | None,
+        max_rows: int = _DEFAULT_MAX_ROWS,
+        flush_rows: int = _DEFAULT_FLUSH_ROWS,
+        flush_interval: float = _DEFAULT_FLUSH_INTERVAL,
+        spill_dir: str = _DEFAULT_SPILL_DIR,
+    ) -> None:
+        self._insert = insert
+        self._max_rows = max_rows
+        self._flush_rows = max(1, flush_rows)
+        self._flush_interval = flush_interval
+        self._spill_dir = spill_dir or _DEFAULT_SPILL_DIR
+        self._queues: dict[str, deque[dict]] = {}
+        self._size = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        # Overflow rows waiting for the spill writer (bounded like the buffer itself)
+        self._pending_spill: deque[tuple[str, list[dict]]] = deque()
+        self._pending_spill_rows = 0
+        self._spill_task: asyncio.Task | None = None
+        self.inserted = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def add(self, table: str, row: dict) -> bool:
+        return self.add_many(table, [row]) == 1
+
+    def add_many(self, table: str, rows: list[dict]) -> int:
+        """Queue rows for ``table``; returns how many were buffered (the rest spill or drop)."""
+        if self._insert is None or not rows:
+            return 0
+        room = max(0, self._max_rows - self._size)
+        accepted, overflow = rows[:room], rows[room:]
+        if accepted:
+            queue = self._queues.setdefault(table, deque())
+            queue.extend(accepted)
+            self._size += len(accepted)
+            if len(queue) >= self._flush_rows:
+                self._wakeup.set()
+        if overflow:
+            logger.warning("event_buffer_full", table=table, overflow=len(overflow), buffered=self._size)
+            self._queue_spill(table, overflow)
+        return len(accepted)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def stats(self) -> dict:
+        return {
+            "buffered": self._size,
+            "pending_spill": self._pending_spill_rows,
+            "inserted": self.inserted,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    def start(self) -> None:
+        """Start the background flush loop. Call once at app startup."""
+        if self._insert is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the loop and flush what is left (spilling it if the flush fails or times out)."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await asyncio.wait_for(self.flush(), _SHUTDOWN_FLUSH_TIMEOUT)
+        except Exception:
+            logger.warning("event_buffer_shutdown_flush_failed", exc_info=True)
+        for table, queue in list(self._queues.items()):
+            if queue:
+                rows = list(queue)
+                self._size -= len(queue)
+                queue.clear()
+                await self._spill(table, rows)
+        if self._spill_task:
+            await asyncio.gather(self._spill_task, return_exceptions=True)
+        await self._drain_spill_queue()  # anything queued after the writer finished
+        logger.info("event_buffer_stopped", **self.stats())
+
+    async def flush(self) -> None:
+        """Insert everything buffered now, ``flush_rows`` at a time; failed batches are spilled."""
+        for table, queue in list(self._queues.items()):  # new tables may appear while inserting
+            while queue:
+                batch = [queue.popleft() for _ in range(min(self._flush_rows, len(queue)))]
+                self._size -= len(batch)
+                if await self._insert_batch(table, batch) != _OK:
+                    await self._spill(table, batch)
+
+    # ── Private ──────────────────────────────────────────────────────────
+
+    async def _insert_batch(self, table: str, batch: list[dict]) -> str:
+        t0 = time.perf_counter()
+        try:
+            await self._insert(table, batch)
+        except asyncio.CancelledError:
+            raise
+        except PostgrestError as exc:
+            rejected = 400 <= exc.status_code < 500 and exc.status_code not in _RETRYABLE_STATUS
+            logger.warning("event_buffer_insert_failed", table=table, count=len(batch), error=str(exc))
+            return _REJECTED if rejected else _UNAVAILABLE
+        except Exception:
+            logger.warning("event_buffer_insert_failed", table=table, count=len(batch), exc_info=True)
+            return _UNAVAILABLE
+        self.inserted += len(batch)
+        logger.debug(
+            "event_buffer_flushed",
+            table=table,
+            count=len(batch),
+            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+        return _OK
+
+    async def _flush_loop(self) -> None:
+        await self._recover_claims()
+        await self._replay_spills()
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                spilled_before = self.spilled
+                await self.flush()
+                if self.spilled == spilled_before:
+                    await self._replay_spills()
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.warning("event_buffer_loop_error", exc_info=True)
+                await asyncio.sleep(self._flush_interval)
+
+    def _spill_path(self, table: str, suffix: str = "") -> str:
+        return os.path.join(self._spill_dir, f"{table}-{os.getpid()}{suffix}.jsonl")
+
+    def _queue_spill(self, table: str, rows: list[dict]) -> None:
+        """Hand overflow rows to the background spill writer (called on the request path)."""
+        if self._pending_spill_rows + len(rows) > self._max_rows:
+            self.dropped += len(rows)
+            logger.warning("event_rows_dropped", table=table, count=len(rows), reason="spill queue full")
+            return
+        self._pending_spill.append((table, rows))
+        self._pending_spill_rows += len(rows)
+        if self._spill_task is None or self._spill_task.done():
+            self._spill_task = asyncio.create_task(self._drain_spill_queue())
+
+    async def _drain_spill_queue(self) -> None:
+        while self._pending_spill:
+            table, rows = self._pending_spill.popleft()
+            self._pending_spill_rows -= len(rows)
+            await self._spill(table, rows)
+
+    async def _spill(self, table: str, rows: list[dict]) -> None:
+        if await self._append_rows(table, rows, self._spill_path(table)):
+            self.spilled += len(rows)
+
+    async def _append_rows(self, table: str, rows: list[dict], path: str) -> bool:
+        """Append rows to a JSONL file on the io-db pool; rows that can't be written are dropped and counted."""
+        try:
+            await get_executor(IO_DB).run(_write_rows, rows, path)
+            return True
+        except (OSError, TypeError, ValueError):
+            self.dropped += len(rows)
+            logger.warning("event_rows_dropped", table=table, count=len(rows), reason="spill failed")
+            return False
+
+    async def _recover_claims(self) -> None:
+        """Put back spill files claimed by a worker that died mid-replay (or by this pid's predecessor)."""
+        try:
+            recovered = await get_executor(IO_DB).run(_recover_claimed_files, self._spill_dir)
+        except OSError:
+            logger.warning("event_spill_recovery_failed", exc_info=True)
+            return
+        if recovered:
+            logger.info("event_spill_claims_recovered", count=recovered)
+
+    async def _replay_spills(self) -> None:
+        """Insert rows from spill files (any worker's); a file is claimed by renaming it."""
+        for table, claimed in await get_executor(IO_DB).run(_claim_spill_files, self._spill_dir):
+            try:
+                ok = await self._replay_file(table, claimed)
+            except asyncio.CancelledError:
+                await asyncio.shield(self._release_claim(table, claimed))
+                raise
+            except Exception:
+                logger.warning("event_spill_replay_failed", table=table, path=claimed, exc_info=True)
+                await self._release_claim(table, claimed)
+                return
+            if not ok:
+                return  # inserts still failing; try again after the next successful flush
+
+    async def _release_claim(self, table: str, claimed: str) -> None:
+        """Hand a claimed file back as a fresh spill file, so a later replay picks it up."""
+        try:
+            await get_executor(IO_DB).run(os.rename, claimed, self._spill_path(table, f"-{time.time_ns()}"))
+        except OSError:
+            logger.warning("event_spill_release_failed", path=claimed, exc_info=True)
+
+    async def _replay_file(self, table: str, path: str) -> bool:
+        """Replay one claimed spill file; returns False if inserts are unavailable."""
+        rows = await get_executor(IO_DB).run(_read_rows, path)
+        replayed, retry, ok = 0, [], True
+        for i in range(0, len(rows), self._flush_rows):
+            batch = rows[i:i + self._flush_rows]
+            failed, unavailable = await self._insert_isolating(table, batch)
+            replayed += len(batch) - len(failed)
+            if unavailable:
+                retry.extend(failed + rows[i + self._flush_rows:])  # keep the rest for later
+                ok = False
+                break
+            retry.extend(await self._count_attempt(table, failed))
+        if retry:  # only the unsent rows go back; they were counted when first spilled
+            await self._append_rows(table, retry, self._spill_path(table, f"-{time.time_ns()}"))
+        await get_executor(IO_DB).run(os.unlink, path)
+        logger.info("event_spill_replayed", table=table, count=replayed, remaining=len(retry))
+        return ok
+
+    async def _insert_isolating(self, table: str, rows: list[dict]) -> tuple[list[dict], bool]:
+        """Insert ``rows``, halving rejected batches to find the bad rows.
+
+        Returns the rows not inserted and whether inserts are unavailable
+        (in which case the untried rows are returned too).
+        """
+        outcome = await self._insert_batch(table, [self._strip_attempts(r) for r in rows])
+        if outcome == _OK:
+            return [], False
+        if outcome == _UNAVAILABLE:
+            return rows, True
+        if len(rows) == 1:
+            return rows, False
+        mid = len(rows) // 2
+        failed, unavailable = await self._insert_isolating(table, rows[:mid])
+        if unavailable:
+            return failed + rows[mid:], True
+        rest, unavailable = await self._insert_isolating(table, rows[mid:])
+        return failed + rest, unavailable
+
+    @staticmethod
+    def _strip_attempts(row: dict) -> dict:
+        return {k: v for k, v in row.items() if k != _ATTEMPTS_KEY}
+
+    async def _count_attempt(self, table: str, rows: list[dict]) -> list[dict]:
+        """Rejected rows with one more attempt counted; those out of attempts go to the dead-letter file."""
+        retry, dead = [], []
+        for row in rows:
+            row = {**row, _ATTEMPTS_KEY: row.get(_ATTEMPTS_KEY, 0) + 1}
+            (dead if row[_ATTEMPTS_KEY] >= _MAX_REPLAY_ATTEMPTS else retry).append(row)
+        if dead:
+            dead_path = os.path.join(self._spill_dir, "dead", f"{table}-{os.getpid()}.jsonl")
+            if await self._append_rows(table, dead, dead_path):
+                self.dead_lettered += len(dead)
+            logger.warning("event_rows_dead_lettered", table=table, count=len(dead), path=dead_path)
+        return retry
+
+
+# ── Spill files (run on the io-db pool) ──────────────────────────────────
+
+def _write_rows(rows: list[dict], path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path) and os.path.getsize(path) > _MAX_SPILL_BYTES:
+        raise OSError("spill file full")
+    payload = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+    with _WRITE_LOCK, open(path, "a", encoding="utf-8") as f:
+        f.write(payload)
+
+
+def _read_rows(path: str) -> list[dict]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+    return rows
+
+
+def _claim_spill_files(spill_dir: str) -> list[tuple[str, str]]:
+    """Rename every spill file to ``{name}.{pid}.replay``; returns (table, claimed path) pairs."""
+    try:
+        names = [n for n in os.listdir(spill_dir) if n.endswith(".jsonl")]
+    except FileNotFoundError:
+        return []
+    claimed = []
+    for name in names:
+        path = os.path.join(spill_dir, f"{name}.{os.getpid()}.replay")
+        try:
+            os.rename(os.path.join(spill_dir, name), path)
+        except OSError:
+            continue  # another worker got it
+        claimed.append((name.split("-", 1)[0], path))
+    return claimed
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def _recover_claimed_files(spill_dir: str) -> int:
+    """Rename ``*.{pid}.replay`` files of dead workers back to spill files; returns how many."""
+    try:
+        names = [n for n in os.listdir(spill_dir) if n.endswith(".replay")]
+    except FileNotFoundError:
+        return 0
+    recovered = 0
+    for name in names:
+        original, _, pid = name[: -len(".replay")].rpartition(".")
+        if not pid.isdigit():
+            continue
+        # Called before this process claims anything, so its own pid means a predecessor's file
+        if int(pid) != os.getpid() and _pid_alive(int(pid)):
+            continue
+        table = original.split("-", 1)[0]
+        target = os.path.join(spill_dir, f"{table}-{os.getpid()}-recovered-{time.time_ns()}.jsonl")
+        try:
+            os.rename(os.path.join(spill_dir, name), target)
+            recovered += 1
+        except OSError:
+            continue  # another worker recovered it first
+    return recovered
+
+
+# ── Singleton ────────────────────────────────────────────────────────────
+
+_buffer: EventBuffer | None = None
+
+
+def get_event_buffer() -> EventBuffer:
+    """Get the global event buffer (rows are discarded until it is initialised)."""
+    global _buffer
+    if _buffer is None:
+        _buffer = EventBuffer(insert=None)
+    return _buffer
+
+
+def init_event_buffer(
+    insert: InsertFn | None,
+    max_rows: int = _DEFAULT_MAX_ROWS,
+    flush_rows: int = _DEFAULT_FLUSH_ROWS,
+    flush_interval: float = _DEFAULT_FLUSH_INTERVAL,
+    spill_dir: str = _DEFAULT_SPILL_DIR,
+) -> EventBuffer:
+    """Initialize the global event buffer with custom settings."""
+    global _buffer
+    _buffer = EventBuffer(
+        insert=insert,
+        max_rows=max_rows,
+        flush_rows=flush_rows,
+        flush_interval=flush_interval,
+        spill_dir=spill_dir,
+    )
+    return _buffer
@@ -0,0 +1,182 @@
+"""Named, bounded thread pools for blocking work.
+
+All blocking work runs on one of three shared pools instead of ad-hoc
+executors or the loop's default pool:
+
+- ``cpu-image`` — Pillow decode/resize/encode, scoring, font subsetting
+- ``io-db``     — synchronous Supabase/PostgREST calls and local disk/SQLite I/O
+- ``stt``       — Whisper transcription
+
+Each pool has its own worker limit, so a burst of slow database calls cannot
+hold every thread that image encoding needs (and the reverse), and total CPU
+concurrency on the host stays capped. Every pool tracks queue depth, active
+workers and wait time for the health/metrics endpoints.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import structlog
+
+from app.services.metrics import EXECUTOR_WAIT
+
+logger = structlog.get_logger()
+
+CPU_IMAGE = "cpu-image"
+IO_DB = "io-db"
+STT = "stt"
+
+# Default configuration (overridden by Settings)
+_DEFAULT_LIMITS = {
+    CPU_IMAGE: min(8, os.cpu_count() or 4),
+    IO_DB: 16,
+    STT: 1,
+}
+
+
+class BoundedExecutor:
+    """A named ThreadPoolExecutor that counts queued/active tasks and queue wait."""
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_s_total = 0.0
+        self._run_s_total = 0.0
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> asyncio.Future:
+        """Schedule ``fn(*args, **kwargs)`` on this pool; await the returned future for its result."""
+        if kwargs:
+            fn = functools.partial(fn, **kwargs)
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        future = self._pool.submit(self._call, fn, args, submitted)
+        future.add_done_callback(self._on_done)
+        return asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "active": self._active,
+                "peak_queued": self._peak_queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._wait_s_total / finished * 1000, 1) if finished else 0.0,
+                "avg_run_ms": round(self._run_s_total / finished * 1000, 1) if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Drop queued tasks and wait for running ones to finish."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _on_done(self, future) -> None:
+        if future.cancelled():  # dropped while still queued; _call never ran
+            with self._lock:
+                self._queued -= 1
+
+    def _call(self, fn: Callable[..., Any], args: tuple, submitted: float) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._wait_s_total += started - submitted
+        EXECUTOR_WAIT.observe((started - submitted) * 1000, pool=self.name)
+        ok = False
+        try:
+            result = fn(*args)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._run_s_total += time.perf_counter() - started
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+
+class ExecutorRegistry:
+    """The process's named pools."""
+
+    def __init__(self, limits: dict[str, int]) -> None:
+        self._pools = {name: BoundedExecutor(name, workers) for name, workers in limits.items()}
+
+    def get(self, name: str) -> BoundedExecutor:
+        try:
+            return self._pools[name]
+        except KeyError:
+            raise ValueError(f"Unknown executor '{name}'. Available: {', '.join(self._pools)}.") from None
+
+    def stats(self) -> dict[str, dict]:
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+    def shutdown(self) -> None:
+        for pool in self._pools.values():
+            pool.shutdown()
+
+
+# ── Singleton ────────────────────────────────────────────────────────────
+
+_registry: ExecutorRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_executor_registry() -> ExecutorRegistry:
+    """Get the global executor registry (created with default limits on first use)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ExecutorRegistry(dict(_DEFAULT_LIMITS))
+    return _registry
+
+
+def init_executor_registry(
+    cpu_image_workers: int = _DEFAULT_LIMITS[CPU_IMAGE],
+    io_db_workers: int = _DEFAULT_LIMITS[IO_DB],
+    stt_workers: int = _DEFAULT_LIMITS[STT],
+) -> ExecutorRegistry:
+    """Initialize the global executor registry with custom limits (0 → default)."""
+    global _registry
+    with _registry_lock:
+        _registry = ExecutorRegistry({
+            CPU_IMAGE: cpu_image_workers or _DEFAULT_LIMITS[CPU_IMAGE],
+            IO_DB: io_db_workers or _DEFAULT_LIMITS[IO_DB],
+            STT: stt_workers or _DEFAULT_LIMITS[STT],
+        })
+    logger.info("executors_started", **{name.replace("-", "_"): s["max_workers"] for name, s in _registry.stats().items()})
+    return _registry
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Shortcut for ``get_executor_registry().get(name)``."""
+    return get_executor_registry().get(name)
+
+
+async def shutdown_executors() -> None:
+    """Shut down every pool (off the event loop, since running tasks are waited for)."""
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        await asyncio.to_thread(registry.shutdown)
+        logger.info("executors_stopped")
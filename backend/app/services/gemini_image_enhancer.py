@@ -7,6 +7,7 @@ from google.genai import types
 from app.constants import IMAGE_LOOK_PROMPTS
 from app.interfaces.image_enhancer import AbstractImageEnhancer
 from app.services.gemini_rate_limiter import with_rate_limit_retry
+from app.services.metrics import GEMINI_DURATION
 
 logger = structlog.get_logger()
 
@@ -18,6 +19,10 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
         self._client = genai.Client(api_key=api_key)
         self._model_name = model_name
 
+    def _observe(self, stage: str, t0: float, outcome: str) -> None:
+        """Record call latency labelled with the model, the call and its outcome (ok / error / blocked)."""
+        GEMINI_DURATION.observe((time.perf_counter() - t0) * 1000, model=self._model_name, stage=stage, outcome=outcome)
+
     async def enhance_photo(
         self,
         image_bytes: bytes,
@@ -59,8 +64,10 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
                 )
             )
         except ValueError:
+            self._observe("enhance_photo", t0, "error")
             raise
         except Exception as exc:
+            self._observe("enhance_photo", t0, "error")
             logger.error("gemini_enhance_photo_failed", exc_info=True)
             raise ValueError(f"AI image enhancement error: {exc}") from exc
 
@@ -68,12 +75,15 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
         logger.info("gemini_enhance_photo_complete", duration_ms=duration_ms)
 
         if not response.parts:
+            self._observe("enhance_photo", t0, "blocked")
             raise ValueError("Gemini returned no content — the response may have been blocked by safety filters.")
 
         for part in response.parts:
             if part.inline_data is not None:
+                self._observe("enhance_photo", t0, "ok")
                 return part.inline_data.data
 
+        self._observe("enhance_photo", t0, "error")
         raise ValueError("Gemini did not return an enhanced image")
 
     async def generate_image_from_text(self, prompt: str) -> bytes:
@@ -90,8 +100,10 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
                 )
             )
         except ValueError:
+            self._observe("generate_image", t0, "error")
             raise
         except Exception as exc:
+            self._observe("generate_image", t0, "error")
             logger.error("gemini_generate_image_failed", exc_info=True)
             raise ValueError(f"AI image generation error: {exc}") from exc
 
@@ -99,12 +111,15 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
         logger.info("gemini_generate_image_complete", duration_ms=duration_ms)
 
         if not response.parts:
+            self._observe("generate_image", t0, "blocked")
             raise ValueError("Gemini returned no content — the response may have been blocked by safety filters.")
 
         for part in response.parts:
             if part.inline_data is not None:
+                self._observe("generate_image", t0, "ok")
                 return part.inline_data.data
 
+        self._observe("generate_image", t0, "error")
         raise ValueError("Gemini did not return a generated image")
 
     async def generate_cartoon(
@@ -140,8 +155,10 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
                 )
             )
         except ValueError:
+            self._observe("generate_cartoon", t0, "error")
             raise
         except Exception as exc:
+            self._observe("generate_cartoon", t0, "error")
             logger.error("gemini_generate_cartoon_failed", exc_info=True)
             raise ValueError(f"AI cartoon generation error: {exc}") from exc
 
@@ -149,12 +166,15 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
         logger.info("gemini_generate_cartoon_complete", duration_ms=duration_ms)
 
         if not response.parts:
+            self._observe("generate_cartoon", t0, "blocked")
             raise ValueError("Gemini returned no content for cartoon generation.")
 
         for part in response.parts:
             if part.inline_data is not None:
+                self._observe("generate_cartoon", t0, "ok")
                 return part.inline_data.data
 
+        self._observe("generate_cartoon", t0, "error")
         raise ValueError("Gemini did not return a cartoon image")
 
     async def blend_with_template(
@@ -190,8 +210,10 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
                 )
             )
         except ValueError:
+            self._observe("blend_with_template", t0, "error")
             raise
         except Exception as exc:
+            self._observe("blend_with_template", t0, "error")
             logger.error("gemini_blend_with_template_failed", exc_info=True)
             raise ValueError(f"AI photo blending error: {exc}") from exc
 
@@ -199,10 +221,13 @@ class GeminiImageEnhancer(AbstractImageEnhancer):
         logger.info("gemini_blend_with_template_complete", duration_ms=duration_ms)
 
         if not response.parts:
+            self._observe("blend_with_template", t0, "blocked")
             raise ValueError("Gemini returned no content for photo blending.")
 
         for part in response.parts:
             if part.inline_data is not None:
+                self._observe("blend_with_template", t0, "ok")
                 return part.inline_data.data
 
+        self._observe("blend_with_template", t0, "error")
         raise ValueError("Gemini did not return a blended image")
@@ -7,6 +7,7 @@ from google.genai import types
 from app.interfaces.ai_service import AbstractAIService
 from app.models.ai_result import AIServiceResult
 from app.services.gemini_rate_limiter import with_rate_limit_retry
+from app.services.metrics import GEMINI_DURATION, GEMINI_TOKENS, current_stage
 
 logger = structlog.get_logger()
 
@@ -54,12 +55,15 @@ class GeminiService(AbstractAIService):
                 )
             )
         except ValueError:
+            self._observe(t0, "error")
             raise
         except Exception as exc:
+            self._observe(t0, "error")
             logger.error("gemini_api_call_failed", exc_info=True)
             raise ValueError(f"AI service error: {exc}") from exc
 
         if not response.parts:
+            self._observe(t0, "blocked")
             raise ValueError("Gemini returned no content — the response may have been blocked by safety filters.")
 
         text_parts: list[str] = []
@@ -91,10 +95,12 @@ class GeminiService(AbstractAIService):
             hasattr(response, "prompt_feedback") and response.prompt_feedback
         )
 
+        self._observe(t0, "ok", usage)
         logger.info(
             "gemini_api_call_complete",
             duration_ms=duration_ms,
             model=self._model_name,
+            stage=current_stage(),
             num_output_parts=len(response.parts),
             num_input_images=len(images),
             prompt_chars=len(prompt),
@@ -108,4 +114,14 @@ class GeminiService(AbstractAIService):
             text=combined_text,
             images=output_images,
             image_mime_types=output_mime_types,
+            usage=usage,
         )
+
+    def _observe(self, t0: float, outcome: str, usage: dict | None = None) -> None:
+        """Record call latency and token counts, labelled with the model and pipeline stage."""
+        stage = current_stage()
+        GEMINI_DURATION.observe((time.perf_counter() - t0) * 1000, model=self._model_name, stage=stage, outcome=outcome)
+        for kind in ("prompt", "output"):
+            tokens = (usage or {}).get(f"{kind}_tokens")
+            if tokens is not None:
+                GEMINI_TOKENS.observe(tokens, model=self._model_name, stage=stage, kind=kind)
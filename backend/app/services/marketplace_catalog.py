@@ -0,0 +1,219 @@
+"""In-memory snapshot of the marketplace catalogue.
+
+The catalogue is a few hundred rows that change only when a design is
+published, so browsing does not need the database. The whole
+``marketplace_designs`` table is loaded into an immutable snapshot, which is
+refreshed on a timer and right after an admin approves a submission. Listing,
+filtering, search and pagination all run against it.
+
+Every snapshot has a content hash. Listing responses use it as their ETag,
+and each design gets its own hash for the detail endpoint, so browsers and
+CDNs can revalidate with ``If-None-Match`` and get a 304 until the content
+actually changes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import structlog
+
+from app.services.pagination import Keyset
+
+logger = structlog.get_logger()
+
+# Default configuration (overridden by Settings)
+_DEFAULT_REFRESH_INTERVAL = 300
+_DEFAULT_CACHE_MAX_AGE = 60
+
+# Listing order: curated sort_order first, newest first within it
+DESIGN_ORDER = Keyset.by("sort_order", "-created_at", "-id")
+
+LoadFn = Callable[[], Awaitable[list[dict]]]
+
+
+def _content_hash(value) -> str:
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison, ``*`` allowed)."""
+    if not if_none_match:
+        return False
+    bare = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == bare:
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One immutable copy of the catalogue, sorted in listing order."""
+
+    designs: tuple[dict, ...]
+    etag: str
+    loaded_at: float = field(default_factory=time.time)
+    by_slug: dict[str, dict] = field(default_factory=dict)
+    design_etags: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, rows: list[dict]) -> "CatalogSnapshot":
+        rows = DESIGN_ORDER.sort(rows)
+        return cls(
+            designs=tuple(rows),
+            etag=f'"{_content_hash(rows)}"',
+            by_slug={row["slug"]: row for row in rows if row.get("slug")},
+            design_etags={row["slug"]: f'"{_content_hash(row)}"' for row in rows if row.get("slug")},
+        )
+
+    def query(
+        self,
+        category: str | None = None,
+        search: str | None = None,
+        free_only: bool = False,
+        page: int = 1,
+        page_size: int = 20,
+        cursor: str = "",
+    ) -> tuple[list[dict], int, str | None]:
+        """Filter and page the snapshot; returns ``(designs, total, next_cursor)``.
+
+        Same contract as the database listing: rows after ``cursor`` when
+        given, otherwise page ``page`` by offset.
+        """
+        term = (search or "").strip().lower()
+        matches = [
+            d for d in self.designs
+            if (not category or d.get("category") == category)
+            and (not free_only or d.get("is_free"))
+            and (not term or term in (d.get("name") or "").lower())
+        ]
+        if cursor:
+            after = DESIGN_ORDER.decode_cursor(cursor)
+            start = next((i for i, d in enumerate(matches) if DESIGN_ORDER.follows(d, after)), len(matches))
+        else:
+            start = (page - 1) * page_size
+        rows = matches[start:start + page_size]
+        next_cursor = DESIGN_ORDER.encode_cursor(rows[-1]) if rows and start + page_size < len(matches) else None
+        return rows, len(matches), next_cursor
+
+
+class MarketplaceCatalog:
+    """Holds the current snapshot and keeps it fresh."""
+
+    def __init__(
+        self,
+        load: LoadFn | None,
+        refresh_interval: float = _DEFAULT_REFRESH_INTERVAL,
+        cache_max_age: int = _DEFAULT_CACHE_MAX_AGE,
+    ) -> None:
+        self._load = load
+        self._refresh_interval = refresh_interval
+        self.cache_control = f"public, max-age={cache_max_age}, stale-while-revalidate={cache_max_age * 5}"
+        self._snapshot: CatalogSnapshot | None = None
+        self._refreshing: asyncio.Task | None = None
+        self._task: asyncio.Task | None = None
+        self.refreshes = 0
+        self.failures = 0
+
+    async def snapshot(self) -> CatalogSnapshot:
+        """The current snapshot, loading the first one if needed."""
+        if self._snapshot is None:
+            return await self.refresh()
+        return self._snapshot
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Reload the catalogue (concurrent callers share one load)."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._reload())
+        return await asyncio.shield(self._refreshing)
+
+    def request_refresh(self) -> None:
+        """Schedule a reload in the background, e.g. after a design is published."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._reload())
+            self._refreshing.add_done_callback(lambda t: t.cancelled() or t.exception())  # logged in _reload
+
+    def start(self) -> None:
+        """Start the periodic refresh loop. Call once at app startup."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "designs": len(snapshot.designs) if snapshot else 0,
+            "age_s": round(time.time() - snapshot.loaded_at) if snapshot else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+    # ── Private ──────────────────────────────────────────────────────────
+
+    async def _reload(self) -> CatalogSnapshot:
+        t0 = time.perf_counter()
+        try:
+            rows = await self._load() if self._load else []
+        except Exception:
+            self.failures += 1
+            logger.warning("marketplace_catalog_refresh_failed", has_snapshot=self._snapshot is not None, exc_info=True)
+            if self._snapshot is None:
+                raise
+            return self._snapshot  # keep serving the previous catalogue
+        snapshot = CatalogSnapshot.build(rows)
+        changed = self._snapshot is None or snapshot.etag != self._snapshot.etag
+        self._snapshot = snapshot
+        self.refreshes += 1
+        logger.info(
+            "marketplace_catalog_refreshed",
+            designs=len(snapshot.designs),
+            changed=changed,
+            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+        return snapshot
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                await asyncio.sleep(self._refresh_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                await asyncio.sleep(min(self._refresh_interval, 30))
+
+
+# ── Singleton ────────────────────────────────────────────────────────────
+
+_catalog: MarketplaceCatalog | None = None
+
+
+def get_marketplace_catalog() -> MarketplaceCatalog:
+    """Get the global marketplace catalogue (empty until it is initialised)."""
+    global _catalog
+    if _catalog is None:
+        _catalog = MarketplaceCatalog(load=None)
+    return _catalog
+
+
+def init_marketplace_catalog(
+    load: LoadFn | None,
+    refresh_interval: float = _DEFAULT_REFRESH_INTERVAL,
+    cache_max_age: int = _DEFAULT_CACHE_MAX_AGE,
+) -> MarketplaceCatalog:
+    """Initialize the global marketplace catalogue with custom settings."""
+    global _catalog
+    _catalog = MarketplaceCatalog(load=load, refresh_interval=refresh_interval, cache_max_age=cache_max_age)
+    return _catalog
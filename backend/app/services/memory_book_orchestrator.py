@@ -23,8 +23,11 @@ from app.models.schemas import (
     PlanResult,
     RegenerateTextRequest,
 )
+from app.prompts.compact import estimate_tokens
 from app.services.duplicate_detector import detect_duplicates
+from app.services.executors import CPU_IMAGE, get_executor
 from app.services.image_comparator import ImageComparator
+from app.services.metrics import STAGE_DURATION, pipeline_stage
 from app.services.photo_metadata_extractor import extract_photo_metadata
 from app.services.photo_quality_scorer import score_photos
 from app.services.template_service import get_structure_template
@@ -82,9 +85,11 @@ class MemoryBookOrchestrator:
         for m in metadata_dicts:
             o = m.get("orientation", "unknown")
             orientations[o] = orientations.get(o, 0) + 1
+        duration_ms = round((time.perf_counter() - t0) * 1000, 1)
+        STAGE_DURATION.observe(duration_ms, stage="stage_a")
         log.info(
             "stage_a_complete",
-            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            duration_ms=duration_ms,
             dates_found=dates_found,
             orientations=orientations,
         )
@@ -96,15 +101,17 @@ class MemoryBookOrchestrator:
         await _progress({"stage": "scoring", "message": "Scoring quality & detecting duplicates...", "progress": 5})
 
         async def _score():
-            return await asyncio.to_thread(score_photos, metadata_list)
+            return await get_executor(CPU_IMAGE).run(score_photos, metadata_list)
 
         async def _dedup():
-            return await asyncio.to_thread(detect_duplicates, metadata_list)
+            return await get_executor(CPU_IMAGE).run(detect_duplicates, metadata_list)
 
         quality_scores, duplicate_groups = await asyncio.gather(_score(), _dedup())
+        duration_ms = round((time.perf_counter() - t0) * 1000, 1)
+        STAGE_DURATION.observe(duration_ms, stage="stage_a1_a2")
         log.info(
             "stage_a1_a2_complete",
-            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            duration_ms=duration_ms,
             num_duplicate_groups=len(duplicate_groups),
         )
 
@@ -214,9 +221,11 @@ class MemoryBookOrchestrator:
                     "notes": "Detected by image comparison",
                 })
 
+        duration_ms = round((time.perf_counter() - t0) * 1000, 1)
+        STAGE_DURATION.observe(duration_ms, stage="stage_b")
         log.info(
             "stage_b_complete",
-            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            duration_ms=duration_ms,
             num_analyses=len(photo_analyses_raw),
             num_clusters=len(clusters),
         )
@@ -252,16 +261,19 @@ class MemoryBookOrchestrator:
         planning_prompt = self._builder.build_planning_prompt(
             request, analyze_result.photo_analyses, analyze_result.clusters, quality_score_dicts,
         )
-        log.info("stage_c_ai_call", prompt_chars=len(planning_prompt))
-        plan_ai_result = await self._ai.generate_content(
-            planning_prompt, [], [], max_output_tokens=16384,
-        )
-        log.info("stage_c_ai_response", response_chars=len(plan_ai_result.text))
+        log.info("stage_c_ai_call", prompt_chars=len(planning_prompt), prompt_tokens_est=estimate_tokens(planning_prompt))
+        with pipeline_stage("stage_c"):
+            plan_ai_result = await self._ai.generate_content(
+                planning_prompt, [], [], max_output_tokens=16384,
+            )
+        log.info("stage_c_ai_response", response_chars=len(plan_ai_result.text), **plan_ai_result.usage)
         plan_dict = self._parser.parse_plan(plan_ai_result.text)
         num_plan_spreads = sum(len(ch.get("spreads", [])) for ch in plan_dict.get("chapters", []))
+        duration_ms = round((time.perf_counter() - t0) * 1000, 1)
+        STAGE_DURATION.observe(duration_ms, stage="stage_c")
         log.info(
             "stage_c_complete",
-            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            duration_ms=duration_ms,
             num_plan_chapters=len(plan_dict.get("chapters", [])),
             num_plan_spreads=num_plan_spreads,
         )
@@ -295,11 +307,12 @@ class MemoryBookOrchestrator:
         writing_prompt = self._builder.build_writing_prompt(
             request, plan_result.plan, analyze_result.photo_analyses,
         )
-        log.info("stage_d_ai_call", prompt_chars=len(writing_prompt))
-        writing_result = await self._ai.generate_content(
-            writing_prompt, [], [], max_output_tokens=65536,
-        )
-        log.info("stage_d_ai_response", response_chars=len(writing_result.text))
+        log.info("stage_d_ai_call", prompt_chars=len(writing_prompt), prompt_tokens_est=estimate_tokens(writing_prompt))
+        with pipeline_stage("stage_d"):
+            writing_result = await self._ai.generate_content(
+                writing_prompt, [], [], max_output_tokens=65536,
+            )
+        log.info("stage_d_ai_response", response_chars=len(writing_result.text), **writing_result.usage)
         await _progress({"stage": "writing", "message": "Finalizing your story...", "progress": 70})
         draft = self._parser.parse_narrative(writing_result.text, num_photos, analyze_result.photo_analyses)
 
@@ -312,9 +325,10 @@ class MemoryBookOrchestrator:
                 request, analyze_result.photo_analyses, analyze_result.clusters,
                 structure_guide, template_config,
             )
-            narrative_result = await self._ai.generate_content(
-                narrative_prompt, [], [], max_output_tokens=self._STAGE_B_MAX_TOKENS,
-            )
+            with pipeline_stage("stage_d_fallback"):
+                narrative_result = await self._ai.generate_content(
+                    narrative_prompt, [], [], max_output_tokens=self._STAGE_B_MAX_TOKENS,
+                )
             draft_fallback = self._parser.parse_narrative(
                 narrative_result.text, num_photos, analyze_result.photo_analyses,
             )
@@ -322,9 +336,11 @@ class MemoryBookOrchestrator:
                 log.info("single_pass_fallback_succeeded", num_chapters=len(draft_fallback.chapters))
                 draft = draft_fallback
 
+        duration_ms = round((time.perf_counter() - t0) * 1000, 1)
+        STAGE_DURATION.observe(duration_ms, stage="stage_d")
         log.info(
             "stage_d_complete",
-            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            duration_ms=duration_ms,
             num_chapters=len(draft.chapters),
             num_pages=len(draft.pages),
             title=draft.title,
@@ -404,7 +420,8 @@ class MemoryBookOrchestrator:
             photo_analyses_raw, partner_names, relationship_type,
             locale=locale, question_count=question_count,
         )
-        questions_result = await self._ai.generate_content(questions_prompt, [], [])
+        with pipeline_stage("questions"):
+            questions_result = await self._ai.generate_content(questions_prompt, [], [])
         return self._parser.parse_questions(questions_result.text)
 
     async def generate_image(
@@ -420,7 +437,8 @@ class MemoryBookOrchestrator:
 
     async def regenerate_text(self, request: RegenerateTextRequest) -> str:
         prompt = self._builder.build_regenerate_text_prompt(request)
-        result = await self._ai.generate_content(prompt, [], [])
+        with pipeline_stage("regenerate_text"):
+            result = await self._ai.generate_content(prompt, [], [])
         return self._parser.parse_regenerated_text(result.text)
 
     async def enhance_image(
@@ -459,8 +477,30 @@ class MemoryBookOrchestrator:
         photo_analyses: list[dict] | None = None,
         overrides: dict | None = None,
         on_progress=None,
-    ) -> bytes:
-        return await self._pdf_gen.generate(draft, photo_data, template_config, design_scale, photo_analyses, overrides, on_progress)
+        export_profile: str | None = None,
+        output_path: str | None = None,
+    ) -> bytes | int:
+        """The PDF bytes, or only its size when it was streamed to ``output_path``."""
+        return await self._pdf_gen.generate(
+            draft, photo_data, template_config, design_scale, photo_analyses, overrides, on_progress,
+            export_profile=export_profile, output_path=output_path,
+        )
+
+    async def render_page_images(
+        self,
+        draft: MemoryBookDraft,
+        photo_data: dict[int, bytes],
+        page_indices: list[int],
+        design_scale: dict | None = None,
+        photo_analyses: list[dict] | None = None,
+        overrides: dict | None = None,
+        image_format: str = "webp",
+        width_px: int = 480,
+    ) -> list:
+        return await self._pdf_gen.render_page_images(
+            draft, photo_data, page_indices, design_scale, photo_analyses, overrides,
+            image_format=image_format, width_px=width_px,
+        )
 
     # ── Private helpers ──────────────────────────────────────────────────
 
@@ -575,14 +615,17 @@ class MemoryBookOrchestrator:
             local_meta.append({**m, "photo_index": i})
 
         analysis_prompt = self._builder.build_photo_analysis_prompt(num_photos, local_meta)
-        analysis_result = await self._ai.generate_content(
-            analysis_prompt, image_bytes, mime_types,
-            max_output_tokens=self._STAGE_B_MAX_TOKENS,
-        )
+        with pipeline_stage("stage_b"):
+            analysis_result = await self._ai.generate_content(
+                analysis_prompt, image_bytes, mime_types,
+                max_output_tokens=self._STAGE_B_MAX_TOKENS,
+            )
         logger.info(
             "stage_b_ai_response",
             response_length=len(analysis_result.text),
             offset=offset,
+            prompt_tokens_est=estimate_tokens(analysis_prompt),
+            **analysis_result.usage,
         )
 
         photo_analyses_raw = self._parser.parse_photo_analysis(analysis_result.text)
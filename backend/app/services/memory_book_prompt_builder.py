@@ -1,69 +1,93 @@
 import json
+from functools import lru_cache
+from typing import Mapping
 
 import structlog
 
 from app.interfaces.prompt_builder import AbstractPromptBuilder
 from app.models.schemas import BookGenerationRequest, RegenerateTextRequest
 from app.prompts import load_system_prompt
+from app.prompts.compact import PLANNING_COLUMNS, WRITING_COLUMNS, encode_analyses, encode_plan
 from app.prompts.layout_rules import LAYOUT_PALETTE
 from app.prompts.structure_guides import STRUCTURE_GUIDES
 from app.prompts.vibe_guides import VIBE_GUIDES
-from app.prompts.yaml_loader import load_yaml, load_all_yaml_dir
+from app.prompts.yaml_loader import get_prompt_registry, register_reload_hook
 from app.constants import IMAGE_LOOK_PROMPTS
 
 
 logger = structlog.get_logger()
 
 
+# ── Pre-rendered prompt blocks (cleared by yaml_loader.reload()) ─────────
+
+@lru_cache(maxsize=32)
+def _few_shot_block(vibe: str) -> str:
+    vibe_examples = get_prompt_registry().yaml_dir("few_shot_examples").get(vibe) or {}
+    examples = vibe_examples.get("examples") or ()
+    if not examples:
+        return ""
+
+    lines = ["\nFEW-SHOT EXAMPLES (match this quality and tone):"]
+    for i, ex in enumerate(examples, 1):
+        expected = ex.get("expected", {})
+        lines.append(f"\n  Example {i}: {ex.get('context', '')}")
+        lines.append(f"    Layout: {expected.get('layout', '?')}")
+        if expected.get("heading_text"):
+            lines.append(f"    Heading: \"{expected['heading_text']}\"")
+        if expected.get("body_text"):
+            lines.append(f"    Body: \"{expected['body_text']}\"")
+        if expected.get("caption_text"):
+            lines.append(f"    Caption: \"{expected['caption_text']}\"")
+        if expected.get("quote_text"):
+            lines.append(f"    Quote: \"{expected['quote_text']}\"")
+
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=8)
+def _density_hint(density: str) -> str:
+    guides = get_prompt_registry().data("density_guides.yaml")
+    guide = guides.get(density, guides.get("balanced", {}))
+    return (
+        f"DENSITY GUIDE ({density}):\n"
+        f"- Photos per spread: {guide.get('photos_per_spread', '1-2')}\n"
+        f"- Preferred layouts: {guide.get('preferred_layouts', 'balanced mix')}\n"
+        f"- Whitespace: {guide.get('whitespace', 'moderate')}"
+    )
+
+
+register_reload_hook(_few_shot_block.cache_clear)
+register_reload_hook(_density_hint.cache_clear)
+
+
 class MemoryBookPromptBuilder(AbstractPromptBuilder):
     """Builds prompts for the memory book pipeline."""
 
+    def __init__(self, compact_analyses: bool = True) -> None:
+        # Compact: columnar analyses and plan text in the planning/writing prompts (see app.prompts.compact)
+        self._compact_analyses = compact_analyses
+
+    def _dump_json(self, value) -> str:
+        if self._compact_analyses:
+            return json.dumps(value, separators=(",", ":"))
+        return json.dumps(value, indent=2)
+
     # ── Helpers ──────────────────────────────────────────────────────────
 
     @staticmethod
     def _compose_section(section_name: str, variables: dict | None = None) -> str:
-        """Load prompt fragment from prompt_sections.yaml and fill template variables."""
-        sections = load_yaml("prompt_sections.yaml")
-        text = sections.get(section_name, "")
-        if variables:
-            try:
-                text = text.format(**variables)
-            except (KeyError, IndexError):
-                pass  # Leave unreplaced placeholders
-        return text
+        """Prompt fragment from prompt_sections.yaml with template variables filled in."""
+        return get_prompt_registry().section(section_name, variables)
 
     @staticmethod
     def _load_few_shot_examples(vibe: str) -> str:
-        """Load few-shot examples for a given vibe from YAML."""
-        all_examples = load_all_yaml_dir("few_shot_examples")
-        vibe_examples = all_examples.get(vibe, {})
-        if not vibe_examples:
-            return ""
-
-        examples = vibe_examples.get("examples", [])
-        if not examples:
-            return ""
-
-        lines = ["\nFEW-SHOT EXAMPLES (match this quality and tone):"]
-        for i, ex in enumerate(examples, 1):
-            expected = ex.get("expected", {})
-            lines.append(f"\n  Example {i}: {ex.get('context', '')}")
-            lines.append(f"    Layout: {expected.get('layout', '?')}")
-            if expected.get("heading_text"):
-                lines.append(f"    Heading: \"{expected['heading_text']}\"")
-            if expected.get("body_text"):
-                lines.append(f"    Body: \"{expected['body_text']}\"")
-            if expected.get("caption_text"):
-                lines.append(f"    Caption: \"{expected['caption_text']}\"")
-            if expected.get("quote_text"):
-                lines.append(f"    Quote: \"{expected['quote_text']}\"")
-
-        return "\n".join(lines)
+        """Few-shot examples block for a given vibe (rendered once per vibe)."""
+        return _few_shot_block(vibe)
 
     @staticmethod
-    def _load_density_guide(density: str) -> dict:
-        """Load density guide from YAML."""
-        guides = load_yaml("density_guides.yaml")
+    def _load_density_guide(density: str) -> Mapping:
+        """Density guide from YAML (frozen)."""
+        guides = get_prompt_registry().data("density_guides.yaml")
         return guides.get(density, guides.get("balanced", {}))
 
     @staticmethod
@@ -98,14 +122,7 @@ class MemoryBookPromptBuilder(AbstractPromptBuilder):
     @staticmethod
     def _build_density_hint(request: BookGenerationRequest) -> str:
         density = request.image_density.value if request.image_density else "balanced"
-        guides = load_yaml("density_guides.yaml")
-        guide = guides.get(density, guides.get("balanced", {}))
-        return (
-            f"DENSITY GUIDE ({density}):\n"
-            f"- Photos per spread: {guide.get('photos_per_spread', '1-2')}\n"
-            f"- Preferred layouts: {guide.get('preferred_layouts', 'balanced mix')}\n"
-            f"- Whitespace: {guide.get('whitespace', 'moderate')}"
-        )
+        return _density_hint(density)
 
     @staticmethod
     def _build_addons_hint(request: BookGenerationRequest) -> str:
@@ -285,22 +302,25 @@ Do NOT translate proper nouns or names. Keep layout_id values and JSON keys in E
         vibe_affinity_text = "\n".join(vibe_affinities)
 
         # Photo analyses summary
-        analyses_text = "\n".join(
-            f"Photo {a.get('photo_index', i)} "
-            f"(cluster={a.get('cluster_id', '?')}, "
-            f"hero={a.get('hero_candidate', False)}, "
-            f"quality={a.get('quality_score', '?')}, "
-            f"role={a.get('narrative_role', '?')}, "
-            f"worthy={a.get('is_book_worthy', True)}, "
-            f"dup={a.get('is_duplicate', False)}, "
-            f"aspect={a.get('aspect_ratio', '?')}): "
-            f"{a.get('description', '')[:80]}"
-            for i, a in enumerate(photo_analyses)
-        )
+        if self._compact_analyses:
+            analyses_text = encode_analyses(photo_analyses, PLANNING_COLUMNS)
+        else:
+            analyses_text = "\n".join(
+                f"Photo {a.get('photo_index', i)} "
+                f"(cluster={a.get('cluster_id', '?')}, "
+                f"hero={a.get('hero_candidate', False)}, "
+                f"quality={a.get('quality_score', '?')}, "
+                f"role={a.get('narrative_role', '?')}, "
+                f"worthy={a.get('is_book_worthy', True)}, "
+                f"dup={a.get('is_duplicate', False)}, "
+                f"aspect={a.get('aspect_ratio', '?')}): "
+                f"{a.get('description', '')[:80]}"
+                for i, a in enumerate(photo_analyses)
+            )
 
         clusters_text = ""
         if clusters:
-            clusters_text = "\n\nCLUSTERS:\n" + json.dumps(clusters, indent=2)
+            clusters_text = "\n\nCLUSTERS:\n" + self._dump_json(clusters)
 
         # Layout distribution from structure guide
         layout_dist = struct_guide.get("layout_distribution", {})
@@ -436,16 +456,18 @@ Respond ONLY with valid JSON:
             if lines:
                 answers_hint = "\n\nANSWERS FROM THE COUPLE:\n" + "\n".join(lines)
 
-        # Photo analyses lookup
-        analyses_text = "\n".join(
-            f"Photo {a.get('photo_index', i)}: {a.get('description', '')} | "
-            f"Emotion: {a.get('emotion', '')} | Mood: {a.get('mood', '')} | "
-            f"Activity: {a.get('activity', '')}"
-            for i, a in enumerate(photo_analyses)
-        )
-
-        # The plan structure
-        plan_text = json.dumps(plan, indent=2)
+        # Photo analyses lookup and the plan structure
+        if self._compact_analyses:
+            analyses_text = encode_analyses(photo_analyses, WRITING_COLUMNS)
+            plan_text = encode_plan(plan)
+        else:
+            analyses_text = "\n".join(
+                f"Photo {a.get('photo_index', i)}: {a.get('description', '')} | "
+                f"Emotion: {a.get('emotion', '')} | Mood: {a.get('mood', '')} | "
+                f"Activity: {a.get('activity', '')}"
+                for i, a in enumerate(photo_analyses)
+            )
+            plan_text = json.dumps(plan, indent=2)
 
         addons_hint = self._build_addons_hint(request)
 
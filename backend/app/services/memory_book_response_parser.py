@@ -16,9 +16,10 @@ from app.models.schemas import (
     SystemNotes,
     normalize_layout,
 )
+from app.prompts.compact import expand_shared_refs, shared_values
 from app.services.parsing.chapter_parser import parse_chapters, safe_str
 from app.services.parsing.fallback_builder import fallback
-from app.services.parsing.json_extractor import extract_json, repair_json
+from app.services.parsing.json_extractor import extract_json, parse_json, repair_json
 from app.services.parsing.page_flattener import flatten_chapters_to_pages
 
 logger = structlog.get_logger()
@@ -31,21 +32,10 @@ class MemoryBookResponseParser(AbstractResponseParser):
 
     def parse_photo_analysis(self, raw_text: str) -> list[dict]:
         try:
-            json_str = extract_json(raw_text)
-            data = json.loads(json_str)
-            return self._extract_photo_list(data)
+            return self._extract_photo_list(parse_json(raw_text))
         except Exception:
-            logger.warning("parse_photo_analysis_failed_initial")
-            try:
-                json_str = extract_json(raw_text)
-                repaired = repair_json(json_str)
-                data = json.loads(repaired)
-                result = self._extract_photo_list(data)
-                logger.info("parse_photo_analysis_repair_succeeded", item_count=len(result))
-                return result
-            except Exception:
-                logger.error("parse_photo_analysis_repair_failed", exc_info=True)
-                return []
+            logger.error("parse_photo_analysis_repair_failed", exc_info=True)
+            return []
 
     @staticmethod
     def _extract_photo_list(data) -> list[dict]:
@@ -65,8 +55,7 @@ class MemoryBookResponseParser(AbstractResponseParser):
 
     def parse_clusters_from_analysis(self, raw_text: str) -> list[dict]:
         try:
-            json_str = extract_json(raw_text)
-            data = json.loads(json_str)
+            data = parse_json(raw_text)
             if isinstance(data, dict) and "clusters" in data:
                 return data["clusters"]
         except Exception:
@@ -107,21 +96,18 @@ class MemoryBookResponseParser(AbstractResponseParser):
         num_photos: int,
         photo_analyses: list[dict] | None = None,
     ) -> MemoryBookDraft:
+        # Compact prompts reference repeated analysis values as §N; put the values back
+        # (JSON-escaped, since the references sit inside JSON strings)
+        if photo_analyses:
+            shared = {ref: json.dumps(v, ensure_ascii=False)[1:-1] for ref, v in shared_values(photo_analyses).items()}
+            raw_text = expand_shared_refs(raw_text, shared)
         try:
-            json_str = extract_json(raw_text)
-            data = json.loads(json_str)
-            return self._build_draft_from_data(data, num_photos)
+            data = parse_json(raw_text)
         except json.JSONDecodeError:
-            logger.warning("parse_narrative_json_failed")
-            try:
-                json_str = extract_json(raw_text)
-                repaired = repair_json(json_str)
-                data = json.loads(repaired)
-                logger.info("parse_narrative_repair_succeeded")
-                return self._build_draft_from_data(data, num_photos)
-            except Exception:
-                logger.warning("parse_narrative_repair_failed_partial")
-                return self._partial_parse(raw_text, num_photos, photo_analyses)
+            logger.warning("parse_narrative_repair_failed_partial")
+            return self._partial_parse(raw_text, num_photos, photo_analyses)
+        try:
+            return self._build_draft_from_data(data, num_photos)
         except Exception:
             logger.error("parse_narrative_failed", exc_info=True)
             return self._partial_parse(raw_text, num_photos, photo_analyses)
@@ -129,29 +115,18 @@ class MemoryBookResponseParser(AbstractResponseParser):
     def parse_plan(self, raw_text: str) -> dict:
         """Parse structural plan from Stage C. Strip reasoning field."""
         try:
-            json_str = extract_json(raw_text)
-            data = json.loads(json_str)
+            data = parse_json(raw_text)
             if isinstance(data, dict):
                 # Remove reasoning field (chain-of-thought) from output
                 data.pop("reasoning", None)
                 return data
         except Exception:
-            logger.warning("parse_plan_initial_failed")
-            try:
-                json_str = extract_json(raw_text)
-                repaired = repair_json(json_str)
-                data = json.loads(repaired)
-                if isinstance(data, dict):
-                    data.pop("reasoning", None)
-                    return data
-            except Exception:
-                logger.error("parse_plan_repair_failed", exc_info=True)
+            logger.error("parse_plan_repair_failed", exc_info=True)
         return {"chapters": []}
 
     def parse_questions(self, raw_text: str) -> list[dict]:
         try:
-            json_str = extract_json(raw_text)
-            data = json.loads(json_str)
+            data = parse_json(raw_text)
             if isinstance(data, list):
                 return data
             if isinstance(data, dict) and "questions" in data:
@@ -0,0 +1,253 @@
+"""In-process metrics: latency/token histograms and live gauges.
+
+Stage timings used to exist only as ``duration_ms`` log lines. The
+histograms here aggregate them per process:
+- generation stage latency;
+- Gemini latency and tokens, per model and stage;
+- PDF export stage latency;
+- executor queue wait.
+
+Gauges (executor queue depth, session store occupancy, PDF job queue) are
+read when metrics are collected. ``render_prometheus`` serves the
+Prometheus text format on ``/metrics``. ``snapshot`` gives the admin JSON
+view, with bucket-estimated percentiles.
+
+Gemini calls don't know which pipeline stage they belong to. Callers wrap
+them in ``with pipeline_stage("stage_c"):``. The stage is held in a
+ContextVar, so concurrent batches started inside the block carry it too.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+_current_stage: ContextVar[str] = ContextVar("pipeline_stage", default="other")
+
+GaugeFn = Callable[[], dict[tuple[str, ...], float]]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label combination."""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...], buckets: tuple[float, ...]) -> None:
+        self.name = name
+        self.help = description
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, ...], list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> dict[tuple[str, ...], tuple[list[int], int, float]]:
+        """Per series: cumulative bucket counts, total count and sum."""
+        with self._lock:
+            raw = {key: list(series) for key, series in self._series.items()}
+        result = {}
+        for key, series in raw.items():
+            cumulative, running = [], 0
+            for count in series[:-1]:
+                running += count
+                cumulative.append(running)
+            result[key] = (cumulative, running, series[-1])
+        return result
+
+    def quantile(self, q: float, cumulative: list[int], count: int) -> float | None:
+        """Estimate a quantile by linear interpolation inside its bucket (as Prometheus does)."""
+        if not count:
+            return None
+        rank = q * count
+        lower, prev = 0.0, 0
+        for bound, running in zip(self.buckets, cumulative):
+            if running >= rank:
+                if running == prev:
+                    return bound
+                return lower + (bound - lower) * (rank - prev) / (running - prev)
+            lower, prev = bound, running
+        return self.buckets[-1]  # in the +Inf bucket: report the largest finite bound
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Gauge:
+    """A value read at collection time from ``collect``."""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...], collect: GaugeFn) -> None:
+        self.name = name
+        self.help = description
+        self.labels = labels
+        self._collect = collect
+
+    def collect(self) -> dict[tuple[str, ...], float]:
+        try:
+            return self._collect()
+        except Exception:
+            return {}  # a source that isn't initialised yet reports nothing
+
+
+class MetricsRegistry:
+    """Named histograms and gauges for one process."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, Histogram] = {}
+        self._gauges: dict[str, Gauge] = {}
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS_MS,
+    ) -> Histogram:
+        """The histogram called ``name``, created on first use."""
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, description, labels, buckets)
+        return self._histograms[name]
+
+    def gauge(self, name: str, description: str, labels: tuple[str, ...], collect: GaugeFn) -> Gauge:
+        """Register (or replace) a gauge whose values come from ``collect``."""
+        self._gauges[name] = Gauge(name, description, labels, collect)
+        return self._gauges[name]
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines: list[str] = []
+        for h in self._histograms.values():
+            lines += [f"# HELP {h.name} {h.help}", f"# TYPE {h.name} histogram"]
+            for key, (cumulative, count, total) in sorted(h.collect().items()):
+                for bound, running in zip((*h.buckets, math.inf), cumulative):
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{h.name}_bucket{_format_labels(h.labels, key, le)} {running}")
+                lines.append(f"{h.name}_sum{_format_labels(h.labels, key)} {_format_value(round(total, 3))}")
+                lines.append(f"{h.name}_count{_format_labels(h.labels, key)} {count}")
+        for g in self._gauges.values():
+            lines += [f"# HELP {g.name} {g.help}", f"# TYPE {g.name} gauge"]
+            for key, value in sorted(g.collect().items()):
+                lines.append(f"{g.name}{_format_labels(g.labels, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """JSON view: count/avg/p50/p95/p99 per histogram series plus current gauge values."""
+        histograms = {}
+        for h in self._histograms.values():
+            series = []
+            for key, (cumulative, count, total) in sorted(h.collect().items()):
+                entry = dict(zip(h.labels, key))
+                entry.update(count=count, sum=round(total, 1), avg=round(total / count, 1) if count else None)
+                for q in (0.5, 0.95, 0.99):
+                    value = h.quantile(q, cumulative, count)
+                    entry[f"p{round(q * 100)}"] = round(value, 1) if value is not None else None
+                series.append(entry)
+            histograms[h.name] = series
+        gauges = {
+            g.name: [{**dict(zip(g.labels, key)), "value": value} for key, value in sorted(g.collect().items())]
+            for g in self._gauges.values()
+        }
+        return {"histograms": histograms, "gauges": gauges}
+
+    def reset(self) -> None:
+        """Clear every histogram (gauges are live and have nothing to reset)."""
+        for h in self._histograms.values():
+            h.reset()
+
+
+# ── Singleton ────────────────────────────────────────────────────────────
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the global metrics registry."""
+    return _registry
+
+
+STAGE_DURATION = _registry.histogram(
+    "generation_stage_duration_ms", "Book generation pipeline stage latency", ("stage",),
+)
+GEMINI_DURATION = _registry.histogram(
+    "gemini_call_duration_ms", "Gemini API call latency", ("model", "stage", "outcome"),
+)
+GEMINI_TOKENS = _registry.histogram(
+    "gemini_tokens", "Gemini tokens per call", ("model", "stage", "kind"), TOKEN_BUCKETS,
+)
+PDF_STAGE_DURATION = _registry.histogram(
+    "pdf_stage_duration_ms", "PDF export stage latency", ("stage",),
+)
+EXECUTOR_WAIT = _registry.histogram(
+    "executor_queue_wait_ms", "Time a task waited for an executor worker", ("pool",),
+)
+
+
+def current_stage() -> str:
+    """The pipeline stage of the running task ("other" outside any ``pipeline_stage`` block)."""
+    return _current_stage.get()
+
+
+@contextmanager
+def pipeline_stage(name: str) -> Iterator[None]:
+    """Label metrics recorded inside the block (e.g. Gemini calls) with pipeline stage ``name``."""
+    token = _current_stage.set(name)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+def register_runtime_gauges() -> None:
+    """Gauges for executor queues, session store and PDF job queue. Call once at app startup."""
+    from app.services.executors import get_executor_registry
+    from app.services.pdf_job_queue import get_pdf_job_queue
+    from app.services.session_store import get_session_store
+
+    def executor_stat(field: str) -> GaugeFn:
+        return lambda: {(name,): s[field] for name, s in get_executor_registry().stats().items()}
+
+    _registry.gauge("executor_queued", "Tasks waiting for an executor worker", ("pool",), executor_stat("queued"))
+    _registry.gauge("executor_active", "Executor workers running a task", ("pool",), executor_stat("active"))
+    _registry.gauge("executor_max_workers", "Executor worker limit", ("pool",), executor_stat("max_workers"))
+
+    def session_stat(field: str) -> GaugeFn:
+        return lambda: {(): get_session_store().occupancy()[field]}
+
+    _registry.gauge("session_store_sessions", "Sessions held in memory", (), session_stat("sessions"))
+    _registry.gauge("session_store_image_sessions", "Sessions still holding uploaded image bytes", (), session_stat("with_images"))
+    _registry.gauge("session_store_capacity", "Sessions held before the oldest is evicted", (), session_stat("capacity"))
+    _registry.gauge(
+        "pdf_jobs", "PDF export jobs by state", ("state",),
+        lambda: {("queued",): get_pdf_job_queue().queued_count, ("running",): get_pdf_job_queue().running_count},
+    )
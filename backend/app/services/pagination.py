@@ -0,0 +1,197 @@
+"""Keyset (cursor) pagination and approximate counts for PostgREST listings.
+
+Offset pagination with ``count=exact`` makes every page count the whole
+result and scan past ``offset`` rows. A keyset page instead continues after the
+last row of the previous one: ``sort < last_sort OR (sort = last_sort AND id <
+last_id)``, plus a plain ``sort <= last_sort`` bound the planner can turn into
+an index range on ``(sort, id)`` (it can't use the OR alone). NULLs are placed
+as Postgres orders them by default (last ascending, first descending), with
+``is.null`` terms since no comparison matches them. The client gets
+an opaque ``next_cursor`` that holds those values. Totals are PostgREST ``count=estimated`` results, cached
+in the aggregate cache, because listing UIs only need a rough size.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from app.services.aggregate_cache import get_aggregate_cache
+from app.services.postgrest_client import AsyncPostgrest
+
+# Shortest search term matched anywhere in the text; shorter terms only match a
+# prefix, since pg_trgm can't use the index for a 1–2 character infix
+_MIN_INFIX_SEARCH = 3
+
+
+def quote(value: Any) -> str:
+    """A value quoted for a PostgREST logic tree (``or=(...)`` / ``and=(...)``)."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return str(value).lower()
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def search_pattern(term: str) -> str:
+    """``ilike`` pattern for a search box: infix for 3+ characters, else prefix.
+
+    LIKE wildcards typed in the box (``%``, ``_``) match literally.
+    """
+    term = term.strip().replace("*", "")
+    infix = len(term) >= _MIN_INFIX_SEARCH
+    term = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"*{term}*" if infix else f"{term}*"
+
+
+def where_params(conditions: list[str]) -> dict[str, str]:
+    """Combine logic-tree conditions (``col.op.val`` / ``or(...)``) into one ``and`` param."""
+    return {"and": f"({','.join(conditions)})"} if conditions else {}
+
+
+def _sort_value(value: Any) -> tuple:
+    # NULLs sort after every value, as in Postgres' default ascending order
+    return (value is None, value if value is not None else 0)
+
+
+def _equal(col: str, value: Any) -> str:
+    return f"{col}.is.null" if value is None else f"{col}.eq.{quote(value)}"
+
+
+def _beyond(col: str, desc: bool, value: Any) -> str | None:
+    """Condition for ``col`` sorting strictly after ``value``; None when nothing can."""
+    if value is None:
+        return f"{col}.not.is.null" if desc else None
+    if desc:
+        return f"{col}.lt.{quote(value)}"
+    return f"or({col}.gt.{quote(value)},{col}.is.null)"
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """A sort order ending in a unique column, e.g. ``(("created_at", True), ("id", True))``."""
+
+    columns: tuple[tuple[str, bool], ...]
+
+    @classmethod
+    def by(cls, *columns: str) -> "Keyset":
+        """``Keyset.by("-created_at", "-id")``: a leading ``-`` means descending."""
+        return cls(tuple((c.lstrip("-"), c.startswith("-")) for c in columns))
+
+    @property
+    def signature(self) -> str:
+        return self.order_param()
+
+    def order_param(self) -> str:
+        return ",".join(f"{col}.{'desc' if desc else 'asc'}" for col, desc in self.columns)
+
+    def after(self, values: list) -> list[str]:
+        """Logic-tree conditions selecting rows strictly after ``values`` in this order.
+
+        The last is exact. Before it may come a redundant bound on the leading
+        column, which is what lets the planner start an index range scan. There
+        is none after a non-NULL ascending value, since the NULLs still to come
+        fall outside any range that starts there.
+        """
+        terms = []
+        for i, (col, desc) in enumerate(self.columns):
+            beyond = _beyond(col, desc, values[i])
+            if beyond is None:
+                continue
+            parts = [_equal(c, values[j]) for j, (c, _) in enumerate(self.columns[:i])]
+            parts.append(beyond)
+            terms.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+        conditions = [f"or({','.join(terms)})"]
+        (lead, desc), value = self.columns[0], values[0]
+        if value is not None and desc:
+            conditions.insert(0, f"{lead}.lte.{quote(value)}")
+        elif value is None and not desc:
+            conditions.insert(0, f"{lead}.is.null")
+        return conditions
+
+    def follows(self, row: dict, values: list) -> bool:
+        """In-memory counterpart of ``after``: whether ``row`` sorts strictly after ``values``."""
+        for (col, desc), value in zip(self.columns, values):
+            current, bound = _sort_value(row.get(col)), _sort_value(value)
+            if current != bound:
+                return current < bound if desc else current > bound
+        return False
+
+    def sort(self, rows: list[dict]) -> list[dict]:
+        """``rows`` in this order (as the database would return them)."""
+        rows = list(rows)
+        for col, desc in reversed(self.columns):
+            rows.sort(key=lambda r: _sort_value(r.get(col)), reverse=desc)
+        return rows
+
+    def encode_cursor(self, row: dict) -> str:
+        payload = [self.signature, *(row.get(col) for col, _ in self.columns)]
+        raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> list:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor") from None
+        if not isinstance(payload, list) or len(payload) != len(self.columns) + 1 or payload[0] != self.signature:
+            raise ValueError("Invalid cursor (it belongs to a different listing or sort order)")
+        return payload[1:]
+
+
+async def keyset_page(
+    db: AsyncPostgrest,
+    table: str,
+    keyset: Keyset,
+    *,
+    limit: int,
+    cursor: str = "",
+    page: int = 1,
+    columns: str = "*",
+    filters: dict[str, Any] | None = None,
+    conditions: list[str] | None = None,
+) -> tuple[list[dict], str | None]:
+    """One page of ``table``; returns ``(rows, next_cursor)`` (None on the last page).
+
+    Rows follow ``cursor`` when given. Without one, ``page`` > 1 is read by
+    offset so clients that still send page numbers keep working.
+    """
+    conditions = list(conditions or [])
+    offset = None
+    if cursor:
+        conditions.extend(keyset.after(keyset.decode_cursor(cursor)))
+    elif page > 1:
+        offset = (page - 1) * limit
+    rows = await db.select(
+        table,
+        columns,
+        filters,
+        limit=limit + 1,
+        offset=offset,
+        params={"order": keyset.order_param(), **where_params(conditions)},
+    )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, keyset.encode_cursor(rows[-1])
+
+
+async def approximate_count(
+    db: AsyncPostgrest,
+    table: str,
+    filters: dict[str, Any] | None = None,
+    conditions: list[str] | None = None,
+) -> int:
+    """Planner-estimated row count, cached (stale-while-revalidate) per table and filter set."""
+    filters = dict(filters or {})
+    conditions = list(conditions or [])
+
+    async def load():
+        return await db.count(table, filters, params=where_params(conditions))
+
+    args = (table, tuple(sorted(filters.items())), tuple(conditions))
+    return await get_aggregate_cache().get("list_count", args, load)
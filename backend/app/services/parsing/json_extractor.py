@@ -1,186 +1,168 @@
-"""Pure functions for extracting and repairing JSON from AI responses."""
+"""Pure functions for extracting and repairing JSON from AI responses.
+
+``parse_json`` is the one-call entry point. It finds the JSON in a response
+and decodes it with the C decoder (``raw_decode``), so well-formed output is
+never scanned in Python. Only when that fails does one tolerant pass over
+the tokens strip control characters and trailing commas, close any
+structures left open by a truncated response, and decode the result.
+"""
 
 import json
 import re
+from typing import Any
 
 import structlog
 
 logger = structlog.get_logger()
 
+_FENCE = "```"
+_OPEN_RE = re.compile(r"[\[{]")
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<str>"[^"\\]*(?:\\.[^"\\]*)*")
+  | (?P<punct>[{}\[\],:])
+  | (?P<word>[^\s{}\[\],:"]+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+# A bare word cut off by the end of the text is only kept if it is already complete
+_LITERAL_RE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+_CLOSERS = {"{": "}", "[": "]"}
+
+# strict=False: AI output often has raw newlines/tabs inside strings
+_DECODER = json.JSONDecoder(strict=False)
+
+
+def _locate(text: str) -> tuple[str, int]:
+    """The text holding the JSON (fenced block or whole text) and the index of its first ``{``/``[``."""
+    # str.find rather than a lazy regex, which costs a backtracking step per character of the body
+    fence = text.find(_FENCE)
+    if fence >= 0:
+        body_start = fence + len(_FENCE)
+        if text.startswith("json", body_start):
+            body_start += len("json")
+        close = text.find(_FENCE, body_start)
+        if close >= 0:
+            text = text[body_start:close].strip()
+    start = _OPEN_RE.search(text)
+    return text, start.start() if start else -1
+
+
+def _scan(text: str, start: int) -> tuple[str, int | None]:
+    """One tolerant pass over the JSON value starting at ``text[start]``.
+
+    Returns the repaired JSON and the index just past the value, or None for
+    the index when the text ends before the value is closed (truncation).
+    In that case everything after the last complete value is dropped and
+    the open structures are closed in order.
+    """
+    out: list[str] = []
+    stack: list[str] = []
+    pending_comma = False
+    after_colon = False
+    safe_len, safe_stack = 0, []  # last point where closing the stack gives valid JSON
+    pos, n = start, len(text)
+
+    while pos < n:
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            break  # unterminated string: the response was cut off inside it
+        pos = m.end()
+        kind, token = m.lastgroup, m.group()
+        if kind == "ws":
+            continue
+
+        if token == ",":
+            pending_comma = True
+            continue
+        if token in "}]" and kind == "punct":
+            pending_comma = False  # trailing comma
+            if not stack:
+                break
+            out.append(stack.pop())  # the expected closer, even if the model wrote the other one
+            after_colon = False
+            if not stack:
+                return "".join(out), pos
+            safe_len, safe_stack = len(out), stack[:]
+            continue
+
+        if pending_comma:
+            out.append(",")
+            pending_comma = False
+        if kind == "str":
+            out.append(_CONTROL_RE.sub("", token))
+            is_key = stack[-1:] == ["}"] and not after_colon
+            after_colon = False
+            if not is_key:
+                safe_len, safe_stack = len(out), stack[:]
+        elif token == ":":
+            out.append(token)
+            after_colon = True
+        elif token in _CLOSERS:
+            out.append(token)
+            stack.append(_CLOSERS[token])
+            after_colon = False
+            safe_len, safe_stack = len(out), stack[:]
+        else:
+            word = _CONTROL_RE.sub("", token)
+            out.append(word)
+            after_colon = False
+            if pos < n or _LITERAL_RE.fullmatch(word):
+                safe_len, safe_stack = len(out), stack[:]
+
+    closers = "".join(reversed(safe_stack))
+    logger.debug("json_truncation_repaired", num_closers=len(closers), closers=closers)
+    return "".join(out[:safe_len]) + closers, None
+
+
+def parse_json(text: str) -> Any:
+    """Extract, repair and decode the JSON object or array in an AI response.
+
+    Raises ``json.JSONDecodeError`` when nothing decodable can be recovered.
+    """
+    body, start = _locate(text)
+    if start < 0:
+        raise json.JSONDecodeError("No JSON object or array found", text, 0)
+    try:
+        return _DECODER.raw_decode(body, start)[0]
+    except json.JSONDecodeError:
+        pass
+    repaired, end = _scan(body, start)
+    data = _DECODER.decode(repaired)
+    logger.info("json_repaired", length=len(body) - start, truncated=end is None)
+    return data
+
 
 def extract_json(text: str) -> str:
     """Extract a JSON object or array from raw text that may contain markdown fences."""
-    # Try markdown fences first
-    match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", text)
-    if match:
-        extracted = match.group(1)
-        logger.debug("json_extracted_from_fence", length=len(extracted))
-        return extracted
-
-    # Try balanced brace extraction
-    start = -1
-    for i, c in enumerate(text):
-        if c in "{[":
-            start = i
-            break
-    if start >= 0:
-        open_char = text[start]
-        close_char = "}" if open_char == "{" else "]"
-        depth = 0
-        in_string = False
-        escape = False
-        for i in range(start, len(text)):
-            c = text[i]
-            if escape:
-                escape = False
-                continue
-            if c == "\\":
-                escape = True
-                continue
-            if c == '"':
-                in_string = not in_string
-                continue
-            if in_string:
-                continue
-            if c == open_char:
-                depth += 1
-            elif c == close_char:
-                depth -= 1
-                if depth == 0:
-                    extracted = text[start:i + 1]
-                    logger.debug("json_balanced_extraction", length=len(extracted))
-                    return extracted
-
-    # Fallback: greedy regex
-    match = re.search(r"[\[{][\s\S]*[\]}]", text)
-    if match:
-        return match.group(0)
-    return text
+    body, start = _locate(text)
+    if start < 0:
+        return body
+    try:
+        end = _DECODER.raw_decode(body, start)[1]
+        return body[start:end]
+    except json.JSONDecodeError:
+        pass
+    end = _scan(body, start)[1]
+    return body[start:end] if end is not None else body[start:]
 
 
 def repair_json(text: str) -> str:
     """Attempt to fix common JSON issues from AI responses."""
-    # Remove control characters except \n \r \t
-    text = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", "", text)
-    # Strip trailing commas before } and ]
-    text = re.sub(r",\s*([\]}])", r"\1", text)
-
-    # Try parsing as-is first
-    try:
-        json.loads(text)
+    start = _OPEN_RE.search(text)
+    if start is None:
         return text
+    try:
+        if _DECODER.raw_decode(text, start.start())[1] == len(text.rstrip()):
+            return text
     except json.JSONDecodeError:
         pass
-
-    # Truncation repair: AI hit output token limit mid-response
-    text = repair_truncated_json(text)
-    return text
+    return _scan(text, start.start())[0]
 
 
 def repair_truncated_json(text: str) -> str:
     """Fix JSON truncated mid-response by closing open structures."""
-    # Strip trailing partial string value (cut mid-"value...)
-    # Find last complete value boundary
-    stripped = text.rstrip()
-
-    # If we're inside an unterminated string, back up to last complete element
-    in_string = False
-    escape = False
-    last_good = 0
-    for i, c in enumerate(stripped):
-        if escape:
-            escape = False
-            continue
-        if c == '\\':
-            escape = True
-            continue
-        if c == '"':
-            in_string = not in_string
-            if not in_string:
-                last_good = i  # end of a complete string
-            continue
-        if not in_string and c in ('}', ']', '0', '1', '2', '3', '4', '5',
-                                    '6', '7', '8', '9', 'e', 'l', 'u'):
-            # End of a complete value (object, array, number, true/false/null)
-            last_good = i
-
-    if in_string:
-        # We're inside an unterminated string — truncate to before this string started
-        # Find the opening quote by scanning backward
-        for j in range(last_good, -1, -1):
-            if stripped[j] == '"':
-                # Back up past the key too if this was a value
-                stripped = stripped[:j].rstrip().rstrip(',').rstrip(':')
-                # Now back up past the key string
-                stripped = stripped.rstrip()
-                if stripped.endswith('"'):
-                    # Find the key's opening quote
-                    k = stripped.rfind('"', 0, len(stripped) - 1)
-                    if k >= 0:
-                        stripped = stripped[:k].rstrip().rstrip(',')
-                break
-    else:
-        # Trim any trailing comma or colon
-        stripped = stripped.rstrip().rstrip(',').rstrip(':')
-
-    # Count unclosed braces/brackets
-    open_braces = 0
-    open_brackets = 0
-    in_str = False
-    esc = False
-    for c in stripped:
-        if esc:
-            esc = False
-            continue
-        if c == '\\':
-            esc = True
-            continue
-        if c == '"':
-            in_str = not in_str
-            continue
-        if in_str:
-            continue
-        if c == '{':
-            open_braces += 1
-        elif c == '}':
-            open_braces -= 1
-        elif c == '[':
-            open_brackets += 1
-        elif c == ']':
-            open_brackets -= 1
-
-    # Append missing closers
-    closers = ']' * max(0, open_brackets) + '}' * max(0, open_braces)
-
-    # We need to close in the right order — track nesting
-    if closers:
-        # Re-scan to find the nesting order
-        stack = []
-        in_str = False
-        esc = False
-        for c in stripped:
-            if esc:
-                esc = False
-                continue
-            if c == '\\':
-                esc = True
-                continue
-            if c == '"':
-                in_str = not in_str
-                continue
-            if in_str:
-                continue
-            if c in ('{', '['):
-                stack.append('}' if c == '{' else ']')
-            elif c in ('}', ']') and stack:
-                stack.pop()
-
-        closers = ''.join(reversed(stack))
-        logger.debug("json_truncation_repaired", num_closers=len(closers), closers=closers)
-
-    result = stripped + closers
-
-    # Final trailing comma cleanup after truncation repair
-    result = re.sub(r",\s*([\]}])", r"\1", result)
-
-    return result
+    start = _OPEN_RE.search(text)
+    return _scan(text, start.start())[0] if start else text
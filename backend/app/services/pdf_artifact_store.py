@@ -0,0 +1,271 @@
+"""Disk-backed store for finished PDFs, indexed by download token.
+
+PDF files live in one directory next to a small SQLite index
+(token → path, title, owner, expiry). Every worker process opens the same
+index, so a token issued by one worker downloads from any other and survives
+restarts. The index also records the state of each PDF job, so a job queued
+on one worker can be polled and downloaded through any other. Lookups go by primary key, and expired artifacts are removed in
+expiry order by a background task instead of a scan on every request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import structlog
+
+from app.services.executors import IO_DB, get_executor
+
+logger = structlog.get_logger()
+
+# Default configuration (overridden by Settings)
+_DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "keepsqueak_pdfs")
+_DEFAULT_TTL_SECONDS = 10 * 60  # 10 minutes
+_CLEANUP_INTERVAL = 60
+_PURGE_BATCH = 500
+_JOB_RECORD_TTL_SECONDS = 60 * 60
+
+# Job states only move forward; a late write of an earlier one is ignored
+_JOB_STAGES = {"queued": 0, "running": 1}
+_JOB_STAGE_FINISHED = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_artifacts (
+    token      TEXT PRIMARY KEY,
+    path       TEXT NOT NULL,
+    title      TEXT NOT NULL,
+    user_id    TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pdf_artifacts_expires_at ON pdf_artifacts (expires_at);
+CREATE TABLE IF NOT EXISTS pdf_jobs (
+    job_id     TEXT PRIMARY KEY,
+    user_id    TEXT,
+    status     TEXT NOT NULL,
+    stage      INTEGER NOT NULL,
+    result     TEXT,
+    error      TEXT,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pdf_jobs_expires_at ON pdf_jobs (expires_at);
+"""
+
+
+@dataclass(frozen=True)
+class PdfArtifact:
+    token: str
+    path: str
+    title: str
+    user_id: str | None
+    expires_at: float
+
+
+@dataclass(frozen=True)
+class PdfJobRecord:
+    """A PDF job's state as last saved by the worker process that runs it."""
+
+    job_id: str
+    user_id: str | None
+    status: str
+    result: str | None
+    error: str | None
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class PdfArtifactStore:
+    """Token-indexed PDF files with a shared SQLite index and TTL cleanup."""
+
+    def __init__(self, directory: str = _DEFAULT_DIR, ttl_seconds: int = _DEFAULT_TTL_SECONDS) -> None:
+        self._dir = directory or _DEFAULT_DIR
+        self._ttl = ttl_seconds
+        os.makedirs(self._dir, exist_ok=True)
+        # One connection per process, serialised by a lock; WAL lets other workers read meanwhile
+        self._conn = sqlite3.connect(
+            os.path.join(self._dir, "index.sqlite3"),
+            timeout=5.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db_lock = threading.Lock()
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        self._cleanup_task: asyncio.Task | None = None
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def path_for(self, token: str) -> str:
+        """Where the PDF for ``token`` should be written before it is registered."""
+        return os.path.join(self._dir, f"{token}.pdf")
+
+    async def put(self, token: str, path: str, title: str, user_id: str | None) -> None:
+        """Register a finished PDF (already on disk) under its download token."""
+        now = time.time()
+        await get_executor(IO_DB).run(
+            self._execute,
+            "INSERT OR REPLACE INTO pdf_artifacts (token, path, title, user_id, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (token, path, title, user_id, now, now + self._ttl),
+        )
+
+    async def get(self, token: str) -> PdfArtifact | None:
+        """Look up an unexpired artifact without consuming it."""
+        rows = await get_executor(IO_DB).run(
+            self._execute,
+            "SELECT token, path, title, user_id, expires_at FROM pdf_artifacts "
+            "WHERE token = ? AND expires_at > ?",
+            (token, time.time()),
+        )
+        return PdfArtifact(*rows[0]) if rows else None
+
+    async def consume(self, token: str) -> bool:
+        """Remove the index entry. Only one caller across all workers gets True."""
+        rows = await get_executor(IO_DB).run(
+            self._execute,
+            "DELETE FROM pdf_artifacts WHERE token = ? RETURNING token",
+            (token,),
+        )
+        return bool(rows)
+
+    async def record_job(
+        self,
+        job_id: str,
+        user_id: str | None,
+        status: str,
+        result: str | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Save a PDF job's state (``result`` is its download token once done)."""
+        await get_executor(IO_DB).run(
+            self._execute,
+            "INSERT INTO pdf_jobs (job_id, user_id, status, stage, result, error, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (job_id) DO UPDATE SET status = excluded.status, stage = excluded.stage, "
+            "result = excluded.result, error = excluded.error, expires_at = excluded.expires_at "
+            "WHERE excluded.stage > pdf_jobs.stage",
+            (
+                job_id, user_id, status, _JOB_STAGES.get(status, _JOB_STAGE_FINISHED),
+                result, error, time.time() + _JOB_RECORD_TTL_SECONDS,
+            ),
+        )
+
+    async def get_job(self, job_id: str) -> PdfJobRecord | None:
+        rows = await get_executor(IO_DB).run(
+            self._execute,
+            "SELECT job_id, user_id, status, result, error FROM pdf_jobs WHERE job_id = ? AND expires_at > ?",
+            (job_id, time.time()),
+        )
+        return PdfJobRecord(*rows[0]) if rows else None
+
+    async def count(self) -> int:
+        rows = await get_executor(IO_DB).run(
+            self._execute,
+            "SELECT COUNT(*) FROM pdf_artifacts WHERE expires_at > ?",
+            (time.time(),),
+        )
+        return rows[0][0]
+
+    async def purge_expired(self) -> int:
+        """Delete expired artifacts, oldest first, in bounded batches (and expired job records)."""
+        await get_executor(IO_DB).run(self._execute, "DELETE FROM pdf_jobs WHERE expires_at <= ?", (time.time(),))
+        removed = 0
+        while True:
+            rows = await get_executor(IO_DB).run(
+                self._execute,
+                "DELETE FROM pdf_artifacts WHERE token IN ("
+                "SELECT token FROM pdf_artifacts WHERE expires_at <= ? ORDER BY expires_at LIMIT ?"
+                ") RETURNING path",
+                (time.time(), _PURGE_BATCH),
+            )
+            for (path,) in rows:
+                _unlink_quietly(path)
+            removed += len(rows)
+            if len(rows) < _PURGE_BATCH:
+                return removed
+
+    def start_cleanup_task(self) -> None:
+        """Start the background cleanup loop. Call once at app startup."""
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    def stop_cleanup_task(self) -> None:
+        """Stop the background cleanup loop."""
+        if self._cleanup_task and not self._cleanup_task.done():
+            self._cleanup_task.cancel()
+
+    # ── Private ──────────────────────────────────────────────────────────
+
+    def _execute(self, sql: str, params: tuple) -> list[tuple]:
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _sweep_orphans(self) -> int:
+        """Delete PDFs with no index entry (renders interrupted by a crash or restart)."""
+        cutoff = time.time() - self._ttl
+        with self._db_lock:
+            known = {row[0] for row in self._conn.execute("SELECT path FROM pdf_artifacts")}
+        removed = 0
+        for entry in os.scandir(self._dir):
+            if not entry.name.endswith(".pdf") or entry.path in known:
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    _unlink_quietly(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    async def _cleanup_loop(self) -> None:
+        """Background task that removes expired artifacts and orphaned files."""
+        try:
+            orphans = await get_executor(IO_DB).run(self._sweep_orphans)
+            if orphans:
+                logger.info("pdf_artifact_orphans_removed", count=orphans)
+        except Exception:
+            logger.warning("pdf_artifact_orphan_sweep_error", exc_info=True)
+        while True:
+            try:
+                expired = await self.purge_expired()
+                if expired:
+                    logger.info("pdf_artifact_cleanup", expired_count=expired)
+                await asyncio.sleep(_CLEANUP_INTERVAL)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.warning("pdf_artifact_cleanup_error", exc_info=True)
+                await asyncio.sleep(_CLEANUP_INTERVAL)
+
+
+# ── Singleton ────────────────────────────────────────────────────────────
+
+_store: PdfArtifactStore | None = None
+
+
+def get_pdf_artifact_store() -> PdfArtifactStore:
+    """Get the global PDF artifact store singleton."""
+    global _store
+    if _store is None:
+        _store = PdfArtifactStore()
+    return _store
+
+
+def init_pdf_artifact_store(directory: str = _DEFAULT_DIR, ttl_seconds: int = _DEFAULT_TTL_SECONDS) -> PdfArtifactStore:
+    """Initialize the global PDF artifact store with custom settings."""
+    global _store
+    _store = PdfArtifactStore(directory=directory, ttl_seconds=ttl_seconds)
+    return _store
@@ -0,0 +1,298 @@
+"""Bounded PDF job queue.
+
+Every PDF export runs as a job so only a fixed number of Chromium renders
+happen at once. Jobs wait in a bounded priority queue (paid users first, then
+FIFO), publish progress and queue-position events to listeners, and can be
+cancelled while queued or running. Finished jobs are kept for a while so their
+status can still be polled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Default configuration (overridden by Settings)
+_DEFAULT_WORKERS = 2
+_DEFAULT_MAX_QUEUED = 20
+_FINISHED_RETENTION_S = 600  # keep finished jobs pollable for 10 minutes
+
+PRIORITY_PAID = 0
+PRIORITY_FREE = 1
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+_FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class PdfQueueFull(Exception):
+    """Raised when the queue already holds the maximum number of waiting jobs."""
+
+
+class PdfJob:
+    """One PDF export: its work coroutine, state, and event listeners."""
+
+    __slots__ = (
+        "job_id", "user_id", "priority", "seq", "created_at", "started_at", "finished_at",
+        "status", "result", "error", "last_event",
+        "_work", "_cleanup", "_task", "_listeners", "_done", "_cancel_requested",
+    )
+
+    def __init__(
+        self,
+        job_id: str,
+        user_id: str | None,
+        priority: int,
+        seq: int,
+        work: Callable[["PdfJob"], Awaitable[Any]],
+        cleanup: Callable[["PdfJob"], Awaitable[None]] | None = None,
+    ) -> None:
+        self.job_id = job_id
+        self.user_id = user_id
+        self.priority = priority
+        self.seq = seq
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: str | None = None
+        self.last_event: dict | None = None
+        self._work = work
+        self._cleanup = cleanup
+        self._task: asyncio.Task | None = None
+        self._listeners: list[asyncio.Queue] = []
+        self._done = asyncio.Event()
+        self._cancel_requested = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def subscribe(self) -> asyncio.Queue:
+        """Return a queue that receives every event emitted from now on."""
+        queue: asyncio.Queue = asyncio.Queue()
+        if self.last_event is not None:
+            queue.put_nowait(self.last_event)
+        self._listeners.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._listeners:
+            self._listeners.remove(queue)
+
+    async def emit(self, event: dict) -> None:
+        """Publish an event (progress, queue position, completion) to all listeners."""
+        self.last_event = event
+        for queue in self._listeners:
+            queue.put_nowait(event)
+
+    async def wait(self) -> Any:
+        """Wait for the job to finish and return its result, re-raising failures."""
+        await self._done.wait()
+        if self.status == CANCELLED:
+            raise asyncio.CancelledError()
+        if self.status == FAILED:
+            raise RuntimeError(self.error or "PDF generation failed")
+        return self.result
+
+
+class PdfJobQueue:
+    """Priority queue of PDF jobs drained by a fixed pool of asyncio workers."""
+
+    def __init__(self, workers: int = _DEFAULT_WORKERS, max_queued: int = _DEFAULT_MAX_QUEUED) -> None:
+        self._worker_count = max(1, workers)
+        self._max_queued = max_queued
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._jobs: dict[str, PdfJob] = {}
+        self._seq = itertools.count()
+        self._workers: list[asyncio.Task] = []
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def submit(
+        self,
+        work: Callable[[PdfJob], Awaitable[Any]],
+        user_id: str | None = None,
+        priority: int = PRIORITY_FREE,
+        cleanup: Callable[[PdfJob], Awaitable[None]] | None = None,
+    ) -> PdfJob:
+        """Enqueue ``work(job)``. Raises PdfQueueFull when the waiting list is full.
+
+        ``cleanup(job)`` runs once the job finishes in any state, including a
+        cancel while it is still queued (when ``work`` never runs).
+        """
+        self._prune_finished()
+        if self.queued_count >= self._max_queued:
+            logger.warning("pdf_queue_full", queued=self.queued_count, user_id=user_id)
+            raise PdfQueueFull()
+        job = PdfJob(uuid.uuid4().hex, user_id, priority, next(self._seq), work, cleanup)
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait((job.priority, job.seq, job.job_id))
+        position = self.position(job)
+        job.last_event = self._queued_event(position)
+        logger.info("pdf_job_queued", job_id=job.job_id, user_id=user_id, priority=priority, position=position)
+        return job
+
+    def get(self, job_id: str) -> PdfJob | None:
+        return self._jobs.get(job_id)
+
+    def position(self, job: PdfJob) -> int:
+        """1-based position among waiting jobs (0 once the job has left the queue)."""
+        if job.status != QUEUED:
+            return 0
+        ahead = sum(
+            1 for j in self._jobs.values()
+            if j.status == QUEUED and (j.priority, j.seq) < (job.priority, job.seq)
+        )
+        return ahead + 1
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it had already finished."""
+        job = self._jobs.get(job_id)
+        if not job or job.finished:
+            return False
+        if job.status == RUNNING and job._task:
+            job._cancel_requested = True
+            job._task.cancel()
+        else:
+            self._finish(job, CANCELLED)
+            await job.emit({"stage": "cancelled", "job_id": job.job_id})
+            await self._broadcast_positions()
+            await self._run_cleanup(job)
+        logger.info("pdf_job_cancelled", job_id=job_id)
+        return True
+
+    @property
+    def queued_count(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status == QUEUED)
+
+    @property
+    def running_count(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status == RUNNING)
+
+    def start(self) -> None:
+        """Start the worker tasks. Call once at app startup."""
+        self._workers = [t for t in self._workers if not t.done()]
+        while len(self._workers) < self._worker_count:
+            self._workers.append(asyncio.create_task(self._worker_loop(len(self._workers))))
+
+    async def stop(self) -> None:
+        """Cancel workers (and with them any running job), then drop queued jobs."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                await self.cancel(job.job_id)
+
+    # ── Private ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _queued_event(position: int) -> dict:
+        return {
+            "stage": "queued",
+            "message": "Waiting for a free export slot..." if position > 1 else "Starting soon...",
+            "progress": 0,
+            "queue_position": position,
+        }
+
+    async def _broadcast_positions(self) -> None:
+        waiting = sorted(
+            (j for j in self._jobs.values() if j.status == QUEUED),
+            key=lambda j: (j.priority, j.seq),
+        )
+        for position, job in enumerate(waiting, start=1):
+            await job.emit(self._queued_event(position))
+
+    def _finish(self, job: PdfJob, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job._done.set()
+
+    @staticmethod
+    async def _run_cleanup(job: PdfJob) -> None:
+        cleanup, job._cleanup = job._cleanup, None
+        if cleanup is None:
+            return
+        try:
+            await cleanup(job)
+        except Exception:
+            logger.warning("pdf_job_cleanup_failed", job_id=job.job_id, exc_info=True)
+
+    def _prune_finished(self) -> None:
+        cutoff = time.time() - _FINISHED_RETENTION_S
+        stale = [jid for jid, j in self._jobs.items() if j.finished and (j.finished_at or 0) < cutoff]
+        for jid in stale:
+            del self._jobs[jid]
+
+    async def _worker_loop(self, worker_id: int) -> None:
+        while True:
+            try:
+                _, _, job_id = await self._queue.get()
+            except asyncio.CancelledError:
+                break
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue  # cancelled while waiting
+            await self._run(job, worker_id)
+
+    async def _run(self, job: PdfJob, worker_id: int) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        await self._broadcast_positions()
+        logger.info(
+            "pdf_job_started",
+            job_id=job.job_id,
+            worker=worker_id,
+            wait_ms=round((job.started_at - job.created_at) * 1000, 1),
+        )
+        job._task = asyncio.create_task(job._work(job))
+        try:
+            job.result = await job._task
+            self._finish(job, DONE)
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED)
+            await job.emit({"stage": "cancelled", "job_id": job.job_id})
+            if not job._cancel_requested:
+                raise  # the worker itself is being cancelled (shutdown)
+        except Exception as exc:
+            job.error = str(exc)
+            self._finish(job, FAILED)
+            logger.error("pdf_job_failed", job_id=job.job_id, exc_info=True)
+        finally:
+            job._task = None
+            await asyncio.shield(self._run_cleanup(job))
+        logger.info(
+            "pdf_job_finished",
+            job_id=job.job_id,
+            status=job.status,
+            duration_ms=round((job.finished_at - job.started_at) * 1000, 1),
+        )
+
+
+# ── Singleton ────────────────────────────────────────────────────────────
+
+_queue: PdfJobQueue | None = None
+
+
+def get_pdf_job_queue() -> PdfJobQueue:
+    """Get the global PDF job queue singleton."""
+    global _queue
+    if _queue is None:
+        _queue = PdfJobQueue()
+    return _queue
+
+
+def init_pdf_job_queue(workers: int = _DEFAULT_WORKERS, max_queued: int = _DEFAULT_MAX_QUEUED) -> PdfJobQueue:
+    """Initialize the global PDF job queue with custom settings."""
+    global _queue
+    _queue = PdfJobQueue(workers=workers, max_queued=max_queued)
+    return _queue
@@ -2,12 +2,12 @@
 
 import asyncio
 import io
-from concurrent.futures import ThreadPoolExecutor
 
 import structlog
 from PIL import Image, ExifTags, ImageFilter
 
 from app.models.schemas import PhotoMetadata
+from app.services.executors import CPU_IMAGE, get_executor
 
 logger = structlog.get_logger()
 
@@ -22,20 +22,16 @@ _EXIF_ISO_TAG = 0x8827  # ISOSpeedRatings
 _EXIF_EXPOSURE_TAG = 0x829A  # ExposureTime
 _EXIF_FNUMBER_TAG = 0x829D  # FNumber
 
-# Reusable thread pool for CPU-bound PIL work
-_POOL = ThreadPoolExecutor(max_workers=8)
-
 
 async def extract_photo_metadata(
     image_bytes_list: list[bytes],
     mime_types: list[str],
 ) -> list[PhotoMetadata]:
     logger.info("extract_photo_metadata_start", num_photos=len(image_bytes_list))
-    # Process all photos in parallel using thread pool
-    loop = asyncio.get_running_loop()
+    # Process all photos in parallel on the shared image pool
+    pool = get_executor(CPU_IMAGE)
     futures = [
-        loop.run_in_executor(
-            _POOL,
+        pool.run(
             _extract_single,
             idx,
             raw,
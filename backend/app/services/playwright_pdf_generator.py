@@ -6,19 +6,27 @@ visual parity with the React frontend.
 
 Optimizations:
 - Browser instance pooling (reuse across requests)
-- Parallel image encoding with ThreadPoolExecutor
-- Inlined CSS/fonts (no CDN dependencies)
+- Parallel image encoding on the shared cpu-image pool
+- DPI-aware resampling: each photo is encoded once per distinct slot size
+- Export profiles (print / screen / preview) trading quality for speed and size
+- Inlined CSS; fonts limited to the template's families and subset to the draft's glyphs
+- Precompiled base template: the document is assembled with a single join
 - Skip resize for pre-compressed images
 - Granular progress streaming with ETA
+- Page thumbnails (png / jpeg / webp) on the same browser, with cached photo encodes
 """
 
 from __future__ import annotations
 
 import asyncio
 import base64
+import hashlib
 import io
+import math
+import re
 import time
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Any, Callable
 
@@ -28,7 +36,16 @@ from playwright.async_api import async_playwright
 
 from app.interfaces.pdf_generator import AbstractPdfGenerator
 from app.models.schemas import MemoryBookDraft
-from app.pdf_templates.page_renderer import render_page
+from app.pdf_templates.export_profiles import (
+    DEFAULT_EXPORT_PROFILE,
+    PDF_EXPORT_PROFILES,
+    PdfExportProfile,
+    get_export_profile,
+)
+from app.pdf_templates.font_subsetting import build_fonts_css
+from app.services.executors import CPU_IMAGE, IO_DB, get_executor
+from app.services.metrics import PDF_STAGE_DURATION
+from app.pdf_templates.page_renderer import RenderContext, TemplateAssets, render_page
 
 logger = structlog.get_logger()
 
@@ -42,7 +59,77 @@ PAGE_SIZES_MM = {
 TEMPLATES_DIR = Path(__file__).parent.parent / "pdf_templates"
 BASE_TEMPLATE_PATH = TEMPLATES_DIR / "base.html"
 PDF_STYLES_PATH = TEMPLATES_DIR / "pdf_styles.css"
-PDF_FONTS_PATH = TEMPLATES_DIR / "pdf_fonts.css"
+
+# Photo resampling (DPI, size ceiling and JPEG settings come from the export profile)
+_SLOT_BUCKET_PX = 64         # slot sizes are rounded up to this grid so near-equal slots share one encode
+_PDF_STREAM_CHUNK = 1024 * 1024  # bytes per CDP IO.read when streaming a PDF to disk
+_VIEWPORT_PX_PER_MM = 4       # layout viewport for PDF rendering (does not change output resolution)
+
+# ── Precompiled document template ───────────────────────────────────
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*(.+?)\s*\}\}")
+
+
+class _DocumentTemplate:
+    """base.html split once into literal chunks and placeholder names.
+
+    The stylesheet is inlined at compile time; per-document values and the page
+    content are spliced in by a single join, so page HTML is copied exactly once.
+    """
+
+    def __init__(self, source: str, static_values: dict[str, str]):
+        self._chunks: list[tuple[bool, str]] = []  # (is_placeholder, literal_or_name)
+        literal: list[str] = []
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(source):
+            literal.append(source[pos:match.start()])
+            name = match.group(1)
+            if name in static_values:
+                literal.append(static_values[name])
+            else:
+                self._chunks.append((False, "".join(literal)))
+                self._chunks.append((True, name))
+                literal = []
+            pos = match.end()
+        literal.append(source[pos:])
+        self._chunks.append((False, "".join(literal)))
+
+    def render(self, values: dict[str, str], content: list[str]) -> str:
+        """Assemble the document; ``content`` is the list of page fragments."""
+        parts: list[str] = []
+        for is_placeholder, text in self._chunks:
+            if not is_placeholder:
+                parts.append(text)
+            elif text == "content":
+                for i, fragment in enumerate(content):
+                    if i:
+                        parts.append("\n")
+                    parts.append(fragment)
+            else:
+                parts.append(values[text])
+        return "".join(parts)
+
+
+_document_template: _DocumentTemplate | None = None
+
+
+def _get_document_template() -> _DocumentTemplate:
+    """Compile base.html (with the stylesheet inlined) once."""
+    global _document_template
+    if _document_template is None:
+        tailwind_css = PDF_STYLES_PATH.read_text(encoding="utf-8")
+        _document_template = _DocumentTemplate(
+            BASE_TEMPLATE_PATH.read_text(encoding="utf-8"),
+            {"tailwind_css": tailwind_css},
+        )
+    return _document_template
+
+
+def preload_templates() -> None:
+    """Load the PDF base template and CSS ahead of the first request. Call on app startup."""
+    t0 = time.perf_counter()
+    _get_document_template()
+    logger.info("pdf_templates_loaded", duration_ms=round((time.perf_counter() - t0) * 1000, 1))
+
 
 # ── Browser instance pool ───────────────────────────────────────────────
 _browser_instance = None
@@ -94,30 +181,197 @@ async def shutdown_browser():
     logger.info("playwright_browser_shutdown")
 
 
-def _encode_single_photo(idx: int, raw_bytes: bytes) -> tuple[int, str | None, int, int]:
-    """Encode a single photo to base64 data URI — runs in thread pool.
-    Returns (index, data_uri, original_bytes, output_bytes).
+def _page_geometry(design_scale: dict | None) -> tuple[float, float, float]:
+    """(page width mm, page height mm, bleed mm) from the design scale, custom sizes included."""
+    ds = design_scale or {}
+    page_size_key = ds.get("page_size", "a4")
+    if page_size_key == "custom":
+        custom_w = ds.get("custom_width_mm")
+        custom_h = ds.get("custom_height_mm")
+        if custom_w and custom_h:
+            return float(custom_w), float(custom_h), ds.get("bleed_mm", 3.0)
+        page_w_mm, page_h_mm = PAGE_SIZES_MM["a4"]
+    else:
+        page_w_mm, page_h_mm = PAGE_SIZES_MM.get(page_size_key, PAGE_SIZES_MM["a4"])
+    return page_w_mm, page_h_mm, ds.get("bleed_mm", 3.0)
+
+
+def _slot_px(size_mm: tuple[float, float], dpi: int) -> tuple[int, int]:
+    """Convert a slot size in mm to a bucketed (width, height) pixel box at ``dpi``."""
+    def bucket(mm: float) -> int:
+        px = mm / 25.4 * dpi
+        return max(_SLOT_BUCKET_PX, math.ceil(px / _SLOT_BUCKET_PX) * _SLOT_BUCKET_PX)
+    return bucket(size_mm[0]), bucket(size_mm[1])
+
+
+def _cover_size(image_size: tuple[int, int], box_px: tuple[int, int], max_px: int) -> tuple[int, int]:
+    """Smallest size that still covers ``box_px`` (object-fit: cover) — never upscales."""
+    w, h = image_size
+    scale = min(1.0, max(box_px[0] / w, box_px[1] / h))
+    if max(w, h) * scale > max_px:
+        scale = max_px / max(w, h)
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def _encode_photo_variants(
+    idx: int,
+    raw_bytes: bytes,
+    boxes_px: list[tuple[int, int]],
+    profile: PdfExportProfile,
+) -> tuple[int, dict[tuple[int, int], str], int, int]:
+    """Encode one photo for every slot box it is placed in — runs in thread pool.
+
+    The source is decoded once (JPEG decodes straight to the largest needed size
+    via draft mode) and each distinct output size is JPEG-encoded once.
+    Returns (index, {box_px: data_uri}, original_bytes, output_bytes).
     """
     try:
         original_size = len(raw_bytes)
         img = Image.open(io.BytesIO(raw_bytes))
-        # Skip resize for pre-compressed images (already <= 2400px from frontend)
-        max_dim = 2400
-        if max(img.size) > max_dim:
-            ratio = max_dim / max(img.size)
-            new_size = (int(img.width * ratio), int(img.height * ratio))
-            img = img.resize(new_size, Image.LANCZOS)
-
-        buf = io.BytesIO()
+        targets = {box: _cover_size(img.size, box, profile.max_photo_px) for box in boxes_px}
+        largest = max(targets.values(), key=lambda s: s[0] * s[1])
+        img.draft("RGB", largest)
         if img.mode in ("RGBA", "LA", "P"):
             img = img.convert("RGB")
-        img.save(buf, format="JPEG", quality=92, optimize=True)
-        output_bytes = buf.getvalue()
-        b64 = base64.b64encode(output_bytes).decode("ascii")
-        return idx, f"data:image/jpeg;base64,{b64}", original_size, len(output_bytes)
+
+        resample = Image.BILINEAR if profile.fast_resample else Image.LANCZOS
+        encoded: dict[tuple[int, int], str] = {}
+        uris: dict[tuple[int, int], str] = {}
+        output_total = 0
+        for box, size in targets.items():
+            if size not in encoded:
+                variant = img if img.size == size else img.resize(size, resample)
+                buf = io.BytesIO()
+                variant.save(buf, format="JPEG", quality=profile.jpeg_quality, optimize=profile.jpeg_optimize)
+                output_bytes = buf.getvalue()
+                output_total += len(output_bytes)
+                b64 = base64.b64encode(output_bytes).decode("ascii")
+                encoded[size] = f"data:image/jpeg;base64,{b64}"
+            uris[box] = encoded[size]
+        return idx, uris, original_size, output_total
     except Exception:
         logger.warning("photo_encode_failed", photo_index=idx)
-        return idx, None, len(raw_bytes), 0
+        return idx, {}, len(raw_bytes), 0
+
+
+class _SlotRecorder:
+    """Photo source used for a measuring render pass — records each slot's pixel box."""
+
+    def __init__(self, available: set[int], profile: PdfExportProfile):
+        self._available = available
+        self._dpi = profile.image_dpi
+        self._max_box = (profile.max_photo_px, profile.max_photo_px)
+        self.boxes: dict[int, set[tuple[int, int]]] = {}
+
+    def has(self, idx: int) -> bool:
+        return idx in self._available
+
+    def resolve(self, idx: int, size_mm: tuple[float, float] | None) -> str:
+        if idx not in self._available:
+            return ""
+        if size_mm:
+            self.boxes.setdefault(idx, set()).add(_slot_px(size_mm, self._dpi))
+        else:
+            self.boxes.setdefault(idx, set()).add(self._max_box)
+        return "#"
+
+
+class _SlotPhotoSources:
+    """Photo source for the real render pass — serves the variant encoded for each slot."""
+
+    def __init__(self, variants: dict[int, dict[tuple[int, int], str]], profile: PdfExportProfile):
+        self._variants = variants
+        self._dpi = profile.image_dpi
+        self._max_box = (profile.max_photo_px, profile.max_photo_px)
+
+    def __len__(self) -> int:
+        return len(self._variants)
+
+    def has(self, idx: int) -> bool:
+        return bool(self._variants.get(idx))
+
+    def resolve(self, idx: int, size_mm: tuple[float, float] | None) -> str:
+        by_box = self._variants.get(idx)
+        if not by_box:
+            return ""
+        box = _slot_px(size_mm, self._dpi) if size_mm else self._max_box
+        uri = by_box.get(box)
+        if uri is None:
+            # Slot not seen in the measuring pass — fall back to the largest variant
+            uri = by_box[max(by_box, key=lambda b: b[0] * b[1])]
+        return uri
+
+
+# ── Page thumbnails ─────────────────────────────────────────────────────
+_THUMBNAIL_FORMATS = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+_THUMBNAIL_MAX_CONCURRENT = 2          # thumbnail renders share the pooled browser with PDF exports
+_THUMBNAIL_ENCODE_CACHE_BYTES = 64 * 1024 * 1024
+_CSS_PX_PER_MM = 96 / 25.4
+
+
+@dataclass(frozen=True)
+class PageImage:
+    """One rendered page thumbnail."""
+    page_index: int
+    width: int
+    height: int
+    media_type: str
+    data: bytes
+
+
+class _EncodeCache:
+    """LRU of encoded photo data URIs keyed by (photo digest, JPEG quality, slot box px), bounded by size.
+
+    Thumbnails of the same book are requested again and again (editor, sharing
+    cards, listings), so their small photo encodes are kept between requests.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._items: OrderedDict[tuple, str] = OrderedDict()
+
+    def get(self, key: tuple) -> str | None:
+        uri = self._items.get(key)
+        if uri is not None:
+            self._items.move_to_end(key)
+        return uri
+
+    def put(self, key: tuple, uri: str) -> None:
+        if key in self._items:
+            return
+        self._items[key] = uri
+        self._bytes += len(uri)
+        while self._bytes > self._max_bytes and self._items:
+            _, evicted = self._items.popitem(last=False)
+            self._bytes -= len(evicted)
+
+
+_thumbnail_encode_cache = _EncodeCache(_THUMBNAIL_ENCODE_CACHE_BYTES)
+_thumbnail_semaphore = asyncio.Semaphore(_THUMBNAIL_MAX_CONCURRENT)
+
+
+def _thumbnail_profile(page_w_mm: float, width_px: int) -> PdfExportProfile:
+    """Preview-quality photo encodes at the thumbnail's effective DPI, with the template fonts."""
+    dpi = max(24, math.ceil(width_px / (page_w_mm / 25.4)))
+    return replace(
+        PDF_EXPORT_PROFILES["preview"],
+        name="thumbnail",
+        image_dpi=dpi,
+        max_photo_px=max(256, width_px * 2),
+        embed_fonts=True,
+    )
+
+
+def _convert_screenshot(shot: bytes, image_format: str) -> tuple[bytes, int, int]:
+    """Final image bytes and size; PNG screenshots become WebP here (not a Chromium screenshot format)."""
+    img = Image.open(io.BytesIO(shot))
+    width, height = img.size
+    if image_format != "webp":
+        return shot, width, height
+    buf = io.BytesIO()
+    img.save(buf, format="WEBP", quality=80, method=4)
+    return buf.getvalue(), width, height
 
 
 class _StepTimer:
@@ -150,18 +404,8 @@ class _StepTimer:
 class PlaywrightPdfGenerator(AbstractPdfGenerator):
     """Generates PDF by rendering HTML in headless Chromium — same CSS as frontend."""
 
-    # Cache loaded CSS files
-    _tailwind_css: str | None = None
-    _fonts_css: str | None = None
-
-    @classmethod
-    def _load_css(cls) -> tuple[str, str]:
-        """Load and cache CSS files."""
-        if cls._tailwind_css is None:
-            cls._tailwind_css = PDF_STYLES_PATH.read_text(encoding="utf-8")
-        if cls._fonts_css is None:
-            cls._fonts_css = PDF_FONTS_PATH.read_text(encoding="utf-8")
-        return cls._tailwind_css, cls._fonts_css
+    def __init__(self, default_profile: str = DEFAULT_EXPORT_PROFILE) -> None:
+        self._default_profile = get_export_profile(default_profile)
 
     async def generate(
         self,
@@ -172,28 +416,30 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
         photo_analyses: list[dict] | None = None,
         overrides: dict | None = None,
         on_progress: Callable[[dict], Any] | None = None,
-    ) -> bytes:
-        ds = design_scale or {}
-        page_size_key = ds.get("page_size", "a4")
-        bleed_mm = ds.get("bleed_mm", 3.0)
-        margin_mm = ds.get("margin_mm", 12.0)
-
-        # Support custom page sizes
-        if page_size_key == "custom":
-            custom_w = ds.get("custom_width_mm")
-            custom_h = ds.get("custom_height_mm")
-            if custom_w and custom_h:
-                page_w_mm, page_h_mm = float(custom_w), float(custom_h)
-            else:
-                page_w_mm, page_h_mm = PAGE_SIZES_MM["a4"]
-        else:
-            page_w_mm, page_h_mm = PAGE_SIZES_MM.get(page_size_key, PAGE_SIZES_MM["a4"])
+        export_profile: str | None = None,
+        output_path: str | None = None,
+    ) -> bytes | int:
+        """Render the book to PDF.
+
+        With ``output_path`` the PDF is streamed to that file and only its
+        size in bytes is returned, so the document never sits in Python
+        memory. Without it the PDF bytes are returned.
+        """
+        profile = get_export_profile(export_profile) if export_profile else self._default_profile
+        page_size_key = (design_scale or {}).get("page_size", "a4")
+        page_w_mm, page_h_mm, bleed_mm = _page_geometry(design_scale)
 
         template_slug = book.template_slug or "romantic"
         page_count = len(book.pages)
-        photo_count = len(photo_data)
+        page_mm = (page_w_mm - 2 * bleed_mm, page_h_mm - 2 * bleed_mm)
+        render_ctx = RenderContext(template_slug, photo_analyses, overrides, page_mm)
         timer = _StepTimer()
 
+        # Measuring pass: find every slot each photo lands in, so photos are
+        # resampled for their physical size instead of a fixed maximum.
+        slot_boxes = self._plan_photo_slots(book, photo_data, render_ctx, profile)
+        photo_count = len(slot_boxes)
+
         logger.info(
             "pdf_generation_start",
             page_count=page_count,
@@ -203,6 +449,9 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
             page_w_mm=page_w_mm,
             page_h_mm=page_h_mm,
             bleed_mm=bleed_mm,
+            export_profile=profile.name,
+            image_dpi=profile.image_dpi,
+            unused_photo_count=len(photo_data) - photo_count,
         )
 
         # ── Stage 1: Encode photos (0-30%) ──────────────────────────────
@@ -216,15 +465,20 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
                 "total": photo_count,
                 "elapsed_ms": timer.elapsed_ms,
             })
-        photo_b64, encode_stats = await self._encode_photos_parallel(photo_data, on_progress, timer, photo_count)
+        photo_variants, encode_stats = await self._encode_photos_parallel(
+            photo_data, slot_boxes, profile, on_progress, timer, photo_count,
+        )
+        photo_sources = _SlotPhotoSources(photo_variants, profile)
         enc_ms = round((time.perf_counter() - t_enc) * 1000, 1)
+        PDF_STAGE_DURATION.observe(enc_ms, stage="encoding")
         timer.record_step(weight=30)
         logger.info(
             "photo_encoding_complete",
             duration_ms=enc_ms,
             photo_count=photo_count,
-            encoded_count=len(photo_b64),
-            failed_count=photo_count - len(photo_b64),
+            encoded_count=len(photo_variants),
+            failed_count=photo_count - len(photo_variants),
+            variant_count=sum(len(set(v.values())) for v in photo_variants.values()),
             total_input_bytes=encode_stats.get("total_input", 0),
             total_output_bytes=encode_stats.get("total_output", 0),
         )
@@ -248,7 +502,7 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
                     "elapsed_ms": timer.elapsed_ms,
                     "estimated_remaining_ms": timer.estimate_remaining_ms(100 - progress_pct),
                 })
-            html = render_page(page, photo_b64, template_slug, photo_analyses, overrides)
+            html = render_page(page, photo_sources, render_ctx)
             pages_html.append(html)
             page_ms = round((time.perf_counter() - t_page) * 1000, 1)
             logger.debug(
@@ -261,6 +515,7 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
             )
 
         render_ms = round((time.perf_counter() - t_render) * 1000, 1)
+        PDF_STAGE_DURATION.observe(render_ms, stage="rendering")
         timer.record_step(weight=40)
         logger.info(
             "page_rendering_complete",
@@ -281,13 +536,19 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
                 "elapsed_ms": timer.elapsed_ms,
                 "estimated_remaining_ms": timer.estimate_remaining_ms(28),
             })
-        full_html = self._build_document(pages_html, page_w_mm, page_h_mm, bleed_mm)
+        fonts_css = ""
+        if profile.embed_fonts:
+            fonts_css = await get_executor(CPU_IMAGE).run(build_fonts_css, template_slug, book)
+        full_html = self._build_document(pages_html, page_w_mm, page_h_mm, bleed_mm, fonts_css, render_ctx.assets)
+        pages_html.clear()  # the assembled document holds the only copy we still need
         build_ms = round((time.perf_counter() - t_build) * 1000, 1)
+        PDF_STAGE_DURATION.observe(build_ms, stage="assembling")
         timer.record_step(weight=5)
         logger.info(
             "document_assembled",
             duration_ms=build_ms,
             html_size_bytes=len(full_html),
+            fonts_css_bytes=len(fonts_css),
             page_count=total_pages,
         )
 
@@ -302,19 +563,24 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
                 "elapsed_ms": timer.elapsed_ms,
                 "estimated_remaining_ms": timer.estimate_remaining_ms(22),
             })
-        pdf_bytes = await self._render_pdf(full_html, page_w_mm, page_h_mm, total_pages, on_progress, timer)
+        pdf = await self._render_pdf(
+            full_html, page_w_mm, page_h_mm, total_pages, on_progress, timer, output_path,
+        )
+        pdf_size = pdf if isinstance(pdf, int) else len(pdf)
         timer.record_step(weight=20)
 
         # ── Stage 5: Complete (95-100%) ─────────────────────────────────
         total_ms = timer.elapsed_ms
-        pdf_size_mb = round(len(pdf_bytes) / (1024 * 1024), 2)
+        PDF_STAGE_DURATION.observe(total_ms, stage="total")
+        pdf_size_mb = round(pdf_size / (1024 * 1024), 2)
         logger.info(
             "pdf_generation_complete",
             duration_ms=total_ms,
-            size_bytes=len(pdf_bytes),
+            size_bytes=pdf_size,
             size_mb=pdf_size_mb,
             page_count=page_count,
             photo_count=photo_count,
+            export_profile=profile.name,
         )
         if on_progress:
             await on_progress({
@@ -327,35 +593,146 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
                 "estimated_remaining_ms": 0,
             })
 
-        return pdf_bytes
+        return pdf
+
+    async def render_page_images(
+        self,
+        book: MemoryBookDraft,
+        photo_data: dict[int, bytes],
+        page_indices: list[int],
+        design_scale: dict | None = None,
+        photo_analyses: list[dict] | None = None,
+        overrides: dict | None = None,
+        image_format: str = "webp",
+        width_px: int = 480,
+    ) -> list[PageImage]:
+        """Render selected pages to images (png / jpeg / webp), all in one browser page.
+
+        Photos are encoded at the thumbnail's DPI and cached across calls, so
+        repeated previews of a book skip the decode and resize work.
+        """
+        if image_format not in _THUMBNAIL_FORMATS:
+            raise ValueError(f"Unsupported image format '{image_format}'. Allowed: {', '.join(_THUMBNAIL_FORMATS)}.")
+        for i in page_indices:
+            if not 0 <= i < len(book.pages):
+                raise ValueError(f"Page index {i} is out of range (book has {len(book.pages)} pages).")
+
+        t0 = time.perf_counter()
+        page_w_mm, page_h_mm, bleed_mm = _page_geometry(design_scale)
+        page_mm = (page_w_mm - 2 * bleed_mm, page_h_mm - 2 * bleed_mm)
+        template_slug = book.template_slug or "romantic"
+        render_ctx = RenderContext(template_slug, photo_analyses, overrides, page_mm)
+        profile = _thumbnail_profile(page_mm[0], width_px)
+        selected = book.model_copy(update={"pages": [book.pages[i] for i in page_indices]})
+
+        slot_boxes = self._plan_photo_slots(selected, photo_data, render_ctx, profile)
+        variants, cache_hits = await self._encode_cached(photo_data, slot_boxes, profile)
+        photo_sources = _SlotPhotoSources(variants, profile)
+        pages_html = [render_page(page, photo_sources, render_ctx) for page in selected.pages]
+        fonts_css = await get_executor(CPU_IMAGE).run(build_fonts_css, template_slug, selected)
+        html = self._build_document(pages_html, page_w_mm, page_h_mm, bleed_mm, fonts_css, render_ctx.assets)
+        del pages_html
+
+        async with _thumbnail_semaphore:
+            shots = await self._screenshot_pages(html, page_mm, width_px, image_format)
+        images = []
+        for page_index, shot in zip(page_indices, shots):
+            data, width, height = await get_executor(CPU_IMAGE).run(_convert_screenshot, shot, image_format)
+            images.append(PageImage(page_index, width, height, _THUMBNAIL_FORMATS[image_format], data))
+
+        logger.info(
+            "page_images_rendered",
+            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            page_count=len(images),
+            image_format=image_format,
+            width_px=width_px,
+            photo_slots=sum(len(b) for b in slot_boxes.values()),
+            encode_cache_hits=cache_hits,
+            total_bytes=sum(len(img.data) for img in images),
+        )
+        return images
+
+    async def _encode_cached(
+        self,
+        photo_data: dict[int, bytes],
+        slot_boxes: dict[int, list[tuple[int, int]]],
+        profile: PdfExportProfile,
+    ) -> tuple[dict[int, dict[tuple[int, int], str]], int]:
+        """Thumbnail encodes through the shared cache; only missing (photo, box) pairs are encoded."""
+        variants: dict[int, dict[tuple[int, int], str]] = {}
+        pending = []
+        hits = 0
+        for idx, boxes in slot_boxes.items():
+            digest = hashlib.sha1(photo_data[idx]).hexdigest()
+            uris = {}
+            missing = []
+            for box in boxes:
+                uri = _thumbnail_encode_cache.get((digest, profile.jpeg_quality, box))
+                if uri is None:
+                    missing.append(box)
+                else:
+                    uris[box] = uri
+                    hits += 1
+            variants[idx] = uris
+            if missing:
+                pending.append((idx, digest, missing))
+
+        pool = get_executor(CPU_IMAGE)
+        results = await asyncio.gather(*[
+            pool.run(_encode_photo_variants, idx, photo_data[idx], missing, profile)
+            for idx, _digest, missing in pending
+        ])
+        for (idx, digest, _missing), (_, uris, _in, _out) in zip(pending, results):
+            for box, uri in uris.items():
+                _thumbnail_encode_cache.put((digest, profile.jpeg_quality, box), uri)
+            variants[idx].update(uris)
+        return {idx: uris for idx, uris in variants.items() if uris}, hits
+
+    def _plan_photo_slots(
+        self,
+        book: MemoryBookDraft,
+        photo_data: dict[int, bytes],
+        render_ctx: RenderContext,
+        profile: PdfExportProfile,
+    ) -> dict[int, list[tuple[int, int]]]:
+        """Render every page against a recorder to collect each photo's slot boxes (px at target DPI).
+
+        Photos that no page places are left out, so they are never encoded.
+        """
+        recorder = _SlotRecorder(set(photo_data), profile)
+        for page in book.pages:
+            render_page(page, recorder, render_ctx)
+        return {idx: sorted(boxes) for idx, boxes in recorder.boxes.items()}
 
     async def _encode_photos_parallel(
         self,
         photo_data: dict[int, bytes],
+        slot_boxes: dict[int, list[tuple[int, int]]],
+        profile: PdfExportProfile,
         on_progress: Callable[[dict], Any] | None,
         timer: _StepTimer,
         total_photos: int,
-    ) -> tuple[dict[int, str], dict]:
-        """Convert raw photo bytes to base64 data URIs using parallel processing."""
+    ) -> tuple[dict[int, dict[tuple[int, int], str]], dict]:
+        """Resample raw photo bytes per slot box and encode to base64 data URIs in parallel."""
         result = {}
-        total = len(photo_data)
-        loop = asyncio.get_running_loop()
+        total = len(slot_boxes)
+        pool = get_executor(CPU_IMAGE)
         total_input_bytes = 0
         total_output_bytes = 0
 
-        with ThreadPoolExecutor(max_workers=4) as pool:
-            futures = {
-                loop.run_in_executor(pool, _encode_single_photo, idx, raw_bytes): idx
-                for idx, raw_bytes in photo_data.items()
-            }
+        futures = [
+            pool.run(_encode_photo_variants, idx, photo_data[idx], boxes, profile)
+            for idx, boxes in slot_boxes.items()
+        ]
+        try:
             completed = 0
             for coro in asyncio.as_completed(futures):
-                idx, data_uri, in_bytes, out_bytes = await coro
+                idx, uris, in_bytes, out_bytes = await coro
                 completed += 1
                 total_input_bytes += in_bytes
                 total_output_bytes += out_bytes
-                if data_uri:
-                    result[idx] = data_uri
+                if uris:
+                    result[idx] = uris
                 if on_progress:
                     progress_pct = 1 + int((completed / max(total, 1)) * 29)
                     await on_progress({
@@ -366,6 +743,9 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
                         "total": total,
                         "elapsed_ms": timer.elapsed_ms,
                     })
+        finally:
+            for future in futures:
+                future.cancel()  # cancelled export: drop encodes that have not started
 
         stats = {"total_input": total_input_bytes, "total_output": total_output_bytes}
         return result, stats
@@ -376,23 +756,25 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
         page_w_mm: float,
         page_h_mm: float,
         bleed_mm: float,
+        fonts_css: str = "",
+        assets: TemplateAssets | None = None,
     ) -> str:
-        """Build the complete HTML document from the base template and page content."""
-        base_template = BASE_TEMPLATE_PATH.read_text(encoding="utf-8")
-        tailwind_css, fonts_css = self._load_css()
-        content = "\n".join(pages_html)
-
-        # Template variable substitution
-        html = base_template.replace("{{ tailwind_css }}", tailwind_css)
-        html = html.replace("{{ fonts_css }}", fonts_css)
-        html = html.replace("{{ page_width_mm }}", str(page_w_mm))
-        html = html.replace("{{ page_height_mm }}", str(page_h_mm))
-        html = html.replace("{{ bleed_mm }}", str(bleed_mm))
-        html = html.replace("{{ 2 * bleed_mm }}", str(2 * bleed_mm))
-        html = html.replace("{{ page_width_mm - 2 * bleed_mm }}", str(page_w_mm - 2 * bleed_mm))
-        html = html.replace("{{ page_height_mm - 2 * bleed_mm }}", str(page_h_mm - 2 * bleed_mm))
-        html = html.replace("{{ content }}", content)
-        return html
+        """Build the complete HTML document from the precompiled base template and page content."""
+        template = _get_document_template()
+        values = {
+            # Without fonts CSS the font stacks fall back to system fonts
+            "fonts_css": fonts_css,
+            # Ornament symbols and pattern classes, defined once and referenced from every page
+            "template_css": assets.css if assets else "",
+            "template_defs": assets.defs if assets else "",
+            "page_width_mm": str(page_w_mm),
+            "page_height_mm": str(page_h_mm),
+            "bleed_mm": str(bleed_mm),
+            "2 * bleed_mm": str(2 * bleed_mm),
+            "page_width_mm - 2 * bleed_mm": str(page_w_mm - 2 * bleed_mm),
+            "page_height_mm - 2 * bleed_mm": str(page_h_mm - 2 * bleed_mm),
+        }
+        return template.render(values, pages_html)
 
     async def _render_pdf(
         self,
@@ -402,21 +784,26 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
         page_count: int = 1,
         on_progress: Callable[[dict], Any] | None = None,
         timer: _StepTimer | None = None,
-    ) -> bytes:
-        """Use pooled Chromium browser to render HTML to PDF."""
+        output_path: str | None = None,
+    ) -> bytes | int:
+        """Use pooled Chromium browser to render HTML to PDF.
+
+        With ``output_path`` the PDF is streamed from Chromium to that file in
+        chunks and only its size is returned; otherwise the PDF bytes are.
+        """
         t_browser = time.perf_counter()
         browser = await _get_browser()
         browser_ms = round((time.perf_counter() - t_browser) * 1000, 1)
+        PDF_STAGE_DURATION.observe(browser_ms, stage="browser_acquire")
         logger.info("playwright_browser_acquired", duration_ms=browser_ms)
 
         context = await browser.new_context()
         try:
             page = await context.new_page()
 
-            # Set viewport to match page proportions at 4x for quality
-            scale = 4  # px per mm
-            viewport_w = int(page_w_mm * scale)
-            viewport_h = int(page_h_mm * scale)
+            # Set viewport to match page proportions (the PDF itself is vector; this only sizes the layout)
+            viewport_w = int(page_w_mm * _VIEWPORT_PX_PER_MM)
+            viewport_h = int(page_h_mm * _VIEWPORT_PX_PER_MM)
             await page.set_viewport_size({"width": viewport_w, "height": viewport_h})
 
             # Scale timeout with page count: min 2min, +10s per page
@@ -434,6 +821,7 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
                 })
             await page.set_content(html, wait_until="load", timeout=timeout_ms)
             load_ms = round((time.perf_counter() - t_load) * 1000, 1)
+            PDF_STAGE_DURATION.observe(load_ms, stage="content_load")
             logger.info("playwright_content_loaded", duration_ms=load_ms)
 
             # Generate PDF
@@ -445,18 +833,94 @@ class PlaywrightPdfGenerator(AbstractPdfGenerator):
                     "progress": 90,
                     "elapsed_ms": timer.elapsed_ms if timer else 0,
                 })
-            pdf_bytes = await page.pdf(
-                width=f"{page_w_mm}mm",
-                height=f"{page_h_mm}mm",
-                print_background=True,
-                prefer_css_page_size=True,
-            )
+            if output_path:
+                result = size = await self._stream_pdf(context, page, page_w_mm, page_h_mm, output_path)
+            else:
+                result = await page.pdf(
+                    width=f"{page_w_mm}mm",
+                    height=f"{page_h_mm}mm",
+                    print_background=True,
+                    prefer_css_page_size=True,
+                )
+                size = len(result)
             pdf_ms = round((time.perf_counter() - t_pdf) * 1000, 1)
+            PDF_STAGE_DURATION.observe(pdf_ms, stage="print")
             logger.info(
                 "playwright_pdf_exported",
                 duration_ms=pdf_ms,
-                pdf_size_bytes=len(pdf_bytes),
+                pdf_size_bytes=size,
+                streamed=bool(output_path),
             )
-            return pdf_bytes
+            return result
+        finally:
+            await context.close()
+
+    @staticmethod
+    async def _stream_pdf(context, page, page_w_mm: float, page_h_mm: float, output_path: str) -> int:
+        """Print via CDP with ``transferMode: ReturnAsStream`` and copy the stream to ``output_path``.
+
+        ``page.pdf()`` returns the whole document as one base64 string, so a
+        200 MB book needs several hundred MB of Python heap. Here at most
+        one ``_PDF_STREAM_CHUNK`` is held at a time.
+        """
+        cdp = await context.new_cdp_session(page)
+        try:
+            printed = await cdp.send("Page.printToPDF", {
+                "paperWidth": page_w_mm / 25.4,
+                "paperHeight": page_h_mm / 25.4,
+                "marginTop": 0,
+                "marginBottom": 0,
+                "marginLeft": 0,
+                "marginRight": 0,
+                "printBackground": True,
+                "preferCSSPageSize": True,
+                "transferMode": "ReturnAsStream",
+            })
+            handle = printed["stream"]
+            io_pool = get_executor(IO_DB)
+            size = 0
+            f = await io_pool.run(open, output_path, "wb")
+            try:
+                while True:
+                    chunk = await cdp.send("IO.read", {"handle": handle, "size": _PDF_STREAM_CHUNK})
+                    data = chunk.get("data", "")
+                    if data:
+                        raw = base64.b64decode(data) if chunk.get("base64Encoded") else data.encode("latin-1")
+                        await io_pool.run(f.write, raw)
+                        size += len(raw)
+                    if chunk.get("eof"):
+                        break
+            finally:
+                await io_pool.run(f.close)
+                await cdp.send("IO.close", {"handle": handle})
+            return size
+        finally:
+            await cdp.detach()
+
+    async def _screenshot_pages(
+        self,
+        html: str,
+        page_mm: tuple[float, float],
+        width_px: int,
+        image_format: str,
+    ) -> list[bytes]:
+        """Screenshot every .book-page element of ``html`` at ``width_px`` wide (PNG, or JPEG directly)."""
+        css_w = page_mm[0] * _CSS_PX_PER_MM
+        css_h = page_mm[1] * _CSS_PX_PER_MM
+        browser = await _get_browser()
+        context = await browser.new_context(
+            viewport={"width": math.ceil(css_w), "height": math.ceil(css_h)},
+            device_scale_factor=width_px / css_w,
+        )
+        try:
+            page = await context.new_page()
+            await page.set_content(html, wait_until="load", timeout=60_000)
+            shots = []
+            for element in await page.query_selector_all(".book-page"):
+                if image_format == "jpeg":
+                    shots.append(await element.screenshot(type="jpeg", quality=82))
+                else:
+                    shots.append(await element.screenshot(type="png"))
+            return shots
         finally:
             await context.close()
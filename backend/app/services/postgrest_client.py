@@ -0,0 +1,179 @@
+"""Async PostgREST client for Supabase tables and RPCs.
+
+One pooled ``httpx.AsyncClient`` (HTTP/2, keep-alive) talks to
+``{supabase_url}/rest/v1`` directly from the event loop, so database calls no
+longer occupy io-db threads. Only the small subset of PostgREST that
+SupabaseService needs is covered: equality filters, ordering, limits,
+insert/upsert/update/delete, RPC calls and estimated counts. Raw PostgREST
+query params (logic trees, multi-column order) can be passed through.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+import httpx
+import structlog
+
+logger = structlog.get_logger()
+
+_DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+
+class PostgrestError(Exception):
+    """A non-2xx PostgREST response."""
+
+    def __init__(self, status_code: int, message: str, code: str | None = None) -> None:
+        super().__init__(f"{status_code} {code or ''} {message}".strip())
+        self.status_code = status_code
+        self.message = message
+        self.code = code
+
+
+def _eq_params(filters: dict[str, Any] | None) -> dict[str, str]:
+    params = {}
+    for column, value in (filters or {}).items():
+        if value is None:
+            params[column] = "is.null"
+        elif isinstance(value, bool):
+            params[column] = f"is.{str(value).lower()}"
+        else:
+            params[column] = f"eq.{value}"
+    return params
+
+
+class AsyncPostgrest:
+    """Minimal async PostgREST client with a shared HTTP/2 connection pool."""
+
+    def __init__(
+        self,
+        url: str,
+        service_key: str,
+        max_connections: int = 20,
+        http2: bool = True,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._client = httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": service_key,
+                "Authorization": f"Bearer {service_key}",
+            },
+            http2=http2 and transport is None,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=_DEFAULT_TIMEOUT,
+            transport=transport,
+        )
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: dict[str, Any] | None = None,
+        order: str | None = None,
+        desc: bool = False,
+        limit: int | None = None,
+        offset: int | None = None,
+        params: dict[str, str] | None = None,
+    ) -> list[dict]:
+        query = {"select": columns, **_eq_params(filters)}
+        if order:
+            query["order"] = f"{order}.{'desc' if desc else 'asc'}"
+        if limit is not None:
+            query["limit"] = str(limit)
+        if offset:
+            query["offset"] = str(offset)
+        query.update(params or {})
+        return await self._request("GET", f"/{table}", params=query) or []
+
+    async def select_one(self, table: str, columns: str = "*", filters: dict[str, Any] | None = None) -> dict | None:
+        """First matching row, or None (unlike ``.single()``, no rows is not an error)."""
+        rows = await self.select(table, columns, filters, limit=1)
+        return rows[0] if rows else None
+
+    async def count(
+        self,
+        table: str,
+        filters: dict[str, Any] | None = None,
+        params: dict[str, str] | None = None,
+        estimated: bool = True,
+    ) -> int:
+        """Matching row count; ``estimated`` uses the planner's estimate above PostgREST's max-rows."""
+        response = await self._send(
+            "HEAD",
+            f"/{table}",
+            params={"select": "*", "limit": "1", **_eq_params(filters), **(params or {})},
+            headers={"Prefer": f"count={'estimated' if estimated else 'exact'}"},
+        )
+        total = response.headers.get("content-range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else 0
+
+    async def insert(self, table: str, rows: dict | list[dict], returning: bool = False) -> list[dict]:
+        return await self._write("POST", table, rows, None, returning)
+
+    async def upsert(self, table: str, rows: dict | list[dict], on_conflict: str, returning: bool = False) -> list[dict]:
+        return await self._write("POST", table, rows, None, returning, on_conflict=on_conflict)
+
+    async def update(
+        self, table: str, values: dict, filters: dict[str, Any], returning: bool = False,
+    ) -> list[dict]:
+        return await self._write("PATCH", table, values, filters, returning)
+
+    async def delete(self, table: str, filters: dict[str, Any]) -> None:
+        await self._request("DELETE", f"/{table}", params=_eq_params(filters), headers={"Prefer": "return=minimal"})
+
+    async def rpc(self, function: str, params: dict | None = None) -> Any:
+        return await self._request("POST", f"/rpc/{function}", json=params or {})
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # ── Private ──────────────────────────────────────────────────────────
+
+    async def _write(
+        self,
+        method: str,
+        table: str,
+        body: dict | list[dict],
+        filters: dict[str, Any] | None,
+        returning: bool,
+        on_conflict: str | None = None,
+    ) -> list[dict]:
+        prefer = ["return=representation" if returning else "return=minimal"]
+        params = _eq_params(filters)
+        if on_conflict:
+            prefer.append("resolution=merge-duplicates")
+            params["on_conflict"] = on_conflict
+        if isinstance(body, list) and body:
+            # Bulk insert: PostgREST needs every row to have the same keys
+            params["columns"] = ",".join(dict.fromkeys(k for row in body for k in row))
+        result = await self._request(method, f"/{table}", params=params, json=body, headers={"Prefer": ",".join(prefer)})
+        return result or []
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        response = await self._send(method, path, **kwargs)
+        if not response.content:
+            return None
+        return response.json()
+
+    async def _send(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        t0 = time.perf_counter()
+        response = await self._client.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            try:
+                detail = response.json()
+            except ValueError:
+                detail = {"message": response.text}
+            logger.warning(
+                "postgrest_error",
+                method=method,
+                path=path,
+                status=response.status_code,
+                code=detail.get("code"),
+                duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            )
+            raise PostgrestError(response.status_code, detail.get("message", ""), detail.get("code"))
+        return response
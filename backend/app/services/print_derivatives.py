@@ -0,0 +1,170 @@
+"""Print-resolution copies of session photos, kept on disk for PDF export.
+
+Uploaded originals are evicted from the session once analysis is done. Before
+that, each photo is saved as an upright JPEG capped at print size, so a later
+PDF export can resolve photos server-side instead of having the client upload
+them again.
+
+Queued PDF jobs spool their photos into the same root (``job-{id}``) so a
+waiting job holds file paths instead of image bytes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import structlog
+from PIL import Image, ImageOps
+
+from app.services.executors import CPU_IMAGE, IO_DB, get_executor
+
+logger = structlog.get_logger()
+
+_ROOT_DIR = os.path.join(tempfile.gettempdir(), "keepsqueak_sessions")
+
+# Matches what the frontend sends for PDF export (compressImagesForPDF)
+PRINT_MAX_PX = 2400
+PRINT_JPEG_QUALITY = 92
+
+# Longest a live session's directory goes without its mtime being refreshed
+TOUCH_INTERVAL_S = 60
+
+
+def _print_derivative(raw: bytes) -> bytes:
+    """Upright JPEG with the long edge capped at PRINT_MAX_PX (raw bytes if undecodable)."""
+    try:
+        img = Image.open(io.BytesIO(raw))
+        img.draft("RGB", (PRINT_MAX_PX, PRINT_MAX_PX))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((PRINT_MAX_PX, PRINT_MAX_PX), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=PRINT_JPEG_QUALITY)
+        return buf.getvalue()
+    except Exception:
+        return raw
+
+
+def _write_derivative(path: str, raw: bytes) -> int:
+    data = _print_derivative(raw)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def _session_dir(session_id: str) -> str:
+    return os.path.join(_ROOT_DIR, session_id)
+
+
+async def save_print_derivatives(session_id: str, image_bytes: list[bytes]) -> str:
+    """Write a print derivative per photo (``{index}.jpg``) and return the directory."""
+    t0 = time.perf_counter()
+    directory = _session_dir(session_id)
+    os.makedirs(directory, exist_ok=True)
+    pool = get_executor(CPU_IMAGE)
+    sizes = await asyncio.gather(*[
+        pool.run(_write_derivative, os.path.join(directory, f"{i}.jpg"), raw)
+        for i, raw in enumerate(image_bytes)
+    ])
+    logger.info(
+        "print_derivatives_saved",
+        session_id=session_id,
+        photo_count=len(sizes),
+        total_bytes=sum(sizes),
+        duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+    )
+    return directory
+
+
+def _write_files(directory: str, photos: dict[int, bytes]) -> int:
+    os.makedirs(directory, exist_ok=True)
+    for idx, data in photos.items():
+        with open(os.path.join(directory, f"{idx}.jpg"), "wb") as f:
+            f.write(data)
+    return sum(len(data) for data in photos.values())
+
+
+async def spool_photos(photo_data: dict[int, bytes]) -> str:
+    """Write PDF job photos to a fresh directory (read back with ``load_print_derivatives``)."""
+    directory = os.path.join(_ROOT_DIR, f"job-{uuid.uuid4().hex}")
+    try:
+        total = await get_executor(IO_DB).run(_write_files, directory, photo_data)
+    except BaseException:
+        await discard_directory(directory)
+        raise
+    logger.info("pdf_job_photos_spooled", directory=directory, photo_count=len(photo_data), total_bytes=total)
+    return directory
+
+
+async def discard_directory(directory: str) -> None:
+    """Delete a derivative or spool directory on the io-db pool."""
+    await get_executor(IO_DB).run(shutil.rmtree, directory, ignore_errors=True)
+
+
+def _read_files(directory: str, indices: set[int]) -> dict[int, bytes]:
+    photos: dict[int, bytes] = {}
+    for idx in sorted(indices):
+        try:
+            with open(os.path.join(directory, f"{idx}.jpg"), "rb") as f:
+                photos[idx] = f.read()
+        except FileNotFoundError:
+            pass
+    return photos
+
+
+def _existing_files(directory: str, indices: set[int]) -> set[int]:
+    return {idx for idx in indices if os.path.exists(os.path.join(directory, f"{idx}.jpg"))}
+
+
+async def stored_print_derivatives(directory: str, indices: set[int]) -> set[int]:
+    """Which of ``indices`` have a derivative in ``directory`` (without reading them)."""
+    return await get_executor(IO_DB).run(_existing_files, directory, indices)
+
+
+async def load_print_derivatives(directory: str, indices: set[int]) -> dict[int, bytes]:
+    """Read the derivatives for ``indices``; missing photos are left out."""
+    return await get_executor(IO_DB).run(_read_files, directory, indices)
+
+
+def touch_print_derivatives(directory: str) -> None:
+    """Mark a session's directory as in use, so another worker's startup purge keeps it."""
+    try:
+        os.utime(directory)
+    except OSError:
+        pass
+
+
+def discard_print_derivatives(session_id: str) -> None:
+    """Delete a session's derivatives on the io-db pool (no-op if none were saved); doesn't wait."""
+    get_executor(IO_DB).run(shutil.rmtree, _session_dir(session_id), ignore_errors=True)
+
+
+def purge_stale_print_derivatives(max_age_s: float) -> int:
+    """Delete directories untouched for ``max_age_s`` (left over from a previous process).
+
+    Workers share the root, so this also sees other live workers' sessions.
+    Their session store touches a directory at least every
+    ``TOUCH_INTERVAL_S`` while the session is in use, so a directory is only
+    purged once its session must have expired.
+    """
+    cutoff = time.time() - max_age_s - TOUCH_INTERVAL_S
+    removed = 0
+    try:
+        entries = list(os.scandir(_ROOT_DIR))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,149 @@
+"""Profile cache: per-request memo in front of a short process-wide TTL cache.
+
+A single request can ask for the same profile several times (ban check, plan
+check, credit use, credit balance). The first lookup fetches the row; later
+ones in the same request reuse it, and other requests reuse it until the TTL
+runs out. Concurrent misses for one user share a single fetch.
+
+Every write that changes a profile invalidates both layers in this process.
+Other worker processes see the change once their TTL expires, so keep the TTL
+short.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterator
+
+# Default configuration (overridden by Settings)
+_DEFAULT_TTL_SECONDS = 30
+_DEFAULT_MAX_ENTRIES = 1000
+
+_MISSING = object()
+
+# user_id → profile (or None) for the current request; unset outside requests
+_request_profiles: ContextVar[dict[str, dict | None] | None] = ContextVar("request_profiles", default=None)
+
+
+@contextmanager
+def profile_request_scope() -> Iterator[None]:
+    """Memoise profile lookups for the duration of one request."""
+    token = _request_profiles.set({})
+    try:
+        yield
+    finally:
+        _request_profiles.reset(token)
+
+
+class ProfileCache:
+    """TTL + LRU cache of profile rows (``None`` for users without one)."""
+
+    def __init__(self, ttl_seconds: int = _DEFAULT_TTL_SECONDS, max_entries: int = _DEFAULT_MAX_ENTRIES) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict | None]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: str, fetch: Callable[[str], Awaitable[dict | None]]) -> dict | None:
+        """Cached profile for ``user_id``, calling ``fetch`` on a miss. Returns a copy."""
+        scoped = _request_profiles.get()
+        if scoped is not None:
+            profile = scoped.get(user_id, _MISSING)
+            if profile is not _MISSING:
+                self.hits += 1
+                return dict(profile) if profile else None
+
+        profile = self._lookup(user_id)
+        if profile is _MISSING:
+            self.misses += 1
+            profile = await self._fetch_once(user_id, fetch)
+        else:
+            self.hits += 1
+        if scoped is not None:
+            scoped[user_id] = profile
+        return dict(profile) if profile else None
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop ``user_id`` from the process cache and the current request's memo."""
+        self._entries.pop(user_id, None)
+        self._inflight.pop(user_id, None)
+        scoped = _request_profiles.get()
+        if scoped is not None:
+            scoped.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    # ── Private ──────────────────────────────────────────────────────────
+
+    def _lookup(self, user_id: str):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return _MISSING
+        ts, profile = entry
+        if time.monotonic() - ts > self._ttl:
+            del self._entries[user_id]
+            return _MISSING
+        self._entries.move_to_end(user_id)
+        return profile
+
+    async def _fetch_once(self, user_id: str, fetch: Callable[[str], Awaitable[dict | None]]) -> dict | None:
+        pending = self._inflight.get(user_id)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this caller was cancelled, not the shared fetch
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        try:
+            profile = await fetch(user_id)
+        except BaseException as exc:
+            if self._inflight.get(user_id) is future:
+                del self._inflight[user_id]
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        # An invalidate() during the fetch removed our in-flight entry: the row may be stale, don't cache it
+        if self._inflight.get(user_id) is future:
+            del self._inflight[user_id]
+            self._entries[user_id] = (time.monotonic(), profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(profile)
+        return profile
+
+
+# ── Singleton ────────────────────────────────────────────────────────────
+
+_cache: ProfileCache | None = None
+
+
+def get_profile_cache() -> ProfileCache:
+    """Get the global profile cache singleton."""
+    global _cache
+    if _cache is None:
+        _cache = ProfileCache()
+    return _cache
+
+
+def init_profile_cache(ttl_seconds: int = _DEFAULT_TTL_SECONDS, max_entries: int = _DEFAULT_MAX_ENTRIES) -> ProfileCache:
+    """Initialize the global profile cache with custom settings."""
+    global _cache
+    _cache = ProfileCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+    return _cache
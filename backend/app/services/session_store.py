@@ -12,6 +12,8 @@ import uuid
 
 import structlog
 
+from app.services.print_derivatives import TOUCH_INTERVAL_S, discard_print_derivatives, touch_print_derivatives
+
 logger = structlog.get_logger()
 
 # Default configuration (overridden by Settings)
@@ -28,7 +30,7 @@ class Session:
         "image_bytes", "mime_types",
         "photo_analyses", "clusters", "quality_scores",
         "duplicate_groups", "metadata", "plan", "draft",
-        "template_config", "num_photos",
+        "template_config", "num_photos", "print_dir", "print_dir_touched_at",
         "_lock",
     )
 
@@ -43,6 +45,10 @@ class Session:
         self.mime_types: list[str] = []
         self.num_photos: int = 0
 
+        # Print-resolution photo copies on disk (kept after image bytes are evicted)
+        self.print_dir: str | None = None
+        self.print_dir_touched_at = 0.0
+
         # Stage A outputs (cached)
         self.metadata: list[dict] = []
         self.quality_scores: list[dict] = []
@@ -66,6 +72,10 @@ class Session:
 
     def touch(self) -> None:
         self.last_accessed = time.time()
+        # Refresh the directory mtime now and then; startup purges go by it
+        if self.print_dir and self.last_accessed - self.print_dir_touched_at > TOUCH_INTERVAL_S:
+            self.print_dir_touched_at = self.last_accessed
+            touch_print_derivatives(self.print_dir)
 
     def evict_image_bytes(self) -> None:
         """Drop raw image data to free memory after analysis is cached."""
@@ -95,6 +105,10 @@ class Session:
     def has_draft(self) -> bool:
         return self.draft is not None
 
+    @property
+    def has_print_photos(self) -> bool:
+        return self.print_dir is not None
+
 
 class SessionStore:
     """In-memory store for generation sessions with TTL and cleanup."""
@@ -139,6 +153,14 @@ class SessionStore:
     def count(self) -> int:
         return len(self._sessions)
 
+    def occupancy(self) -> dict:
+        """Session counts for the metrics endpoints (image bytes dominate memory use)."""
+        return {
+            "sessions": len(self._sessions),
+            "with_images": sum(1 for s in self._sessions.values() if s.has_images),
+            "capacity": self._max_sessions,
+        }
+
     def start_cleanup_task(self) -> None:
         """Start the background cleanup loop. Call once at app startup."""
         if self._cleanup_task is None or self._cleanup_task.done():
@@ -154,6 +176,7 @@ class SessionStore:
     def _remove(self, session_id: str) -> None:
         session = self._sessions.pop(session_id, None)
         if session:
+            discard_print_derivatives(session_id)
             logger.info("session_removed", session_id=session_id)
 
     def _evict_oldest(self) -> None:
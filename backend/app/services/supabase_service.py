@@ -1,130 +1,108 @@
-import asyncio
 import secrets
 
 import structlog
 from supabase import create_client, Client
 
+from app.services.event_buffer import get_event_buffer
+from app.services.executors import IO_DB, get_executor
+from app.services.postgrest_client import AsyncPostgrest
+from app.services.profile_cache import get_profile_cache
+
 logger = structlog.get_logger()
 
 
 class SupabaseService:
-    def __init__(self, url: str, service_key: str):
+    """Data access for the app's Supabase project.
+
+    Table reads/writes and RPCs go through the async PostgREST client
+    (``self.db``). Storage, auth admin calls and query builders that have not
+    moved yet use the sync ``self.client`` on the io-db pool.
+    """
+
+    def __init__(self, url: str, service_key: str, max_connections: int = 20, http2: bool = True):
         self.client: Client = create_client(url, service_key) if url and service_key else None
+        self.db: AsyncPostgrest | None = (
+            AsyncPostgrest(url, service_key, max_connections=max_connections, http2=http2)
+            if url and service_key else None
+        )
 
     def _execute_sync(self, fn):
-        """Run a synchronous Supabase call in a thread to avoid blocking the event loop."""
-        return asyncio.to_thread(fn)
+        """Run a synchronous Supabase call on the io-db pool to avoid blocking the event loop."""
+        return get_executor(IO_DB).run(fn)
 
-    async def get_profile(self, user_id: str) -> dict | None:
+    async def aclose(self):
+        if self.db:
+            await self.db.aclose()
+
+    async def get_profile(self, user_id: str, fresh: bool = False) -> dict | None:
+        """Profile row, served from the request memo / TTL cache unless ``fresh`` is set."""
         if not self.client or not user_id:
             return None
-        result = await self._execute_sync(
-            lambda: self.client.table("profiles").select("*").eq("id", user_id).single().execute()
-        )
+        if fresh:
+            get_profile_cache().invalidate(user_id)
+        return await get_profile_cache().get(user_id, self._fetch_profile)
+
+    async def _fetch_profile(self, user_id: str) -> dict | None:
+        profile = await self.db.select_one("profiles", filters={"id": user_id})
         logger.debug("profile_fetched", user_id=user_id)
-        return result.data
+        return profile
+
+    def invalidate_profile(self, user_id: str):
+        """Forget the cached profile after a write (credits, plan, ban, role, ...)."""
+        get_profile_cache().invalidate(user_id)
 
     async def add_credits(self, user_id: str, amount: int, reason: str):
         if not self.client or not user_id:
             return
-        # Atomic increment via RPC
-        await self._execute_sync(
-            lambda: self.client.rpc("increment_credits", {
-                "user_id_input": user_id,
-                "amount_input": amount,
-            }).execute()
-        )
-        # Record in ledger
-        await self._execute_sync(
-            lambda: self.client.table("credit_ledger").insert({
-                "user_id": user_id,
-                "delta": amount,
-                "reason": reason,
-            }).execute()
-        )
+        # Atomic increment + ledger entry in one RPC
+        await self.db.rpc("grant_credits", {
+            "user_id_input": user_id,
+            "amount_input": amount,
+            "reason_input": reason,
+        })
+        self.invalidate_profile(user_id)
         logger.info("credits_added", user_id=user_id, amount=amount, reason=reason)
 
     async def use_credit(self, user_id: str) -> bool:
-        """Deduct 1 credit atomically. Returns True if successful, False if insufficient."""
+        """Deduct 1 credit atomically. Returns True if successful, False if insufficient.
+
+        One RPC checks the plan, decrements credits (paid plans are unlimited),
+        writes the ledger entry and bumps books_created.
+        """
         if not self.client:
             return True  # No auth = no gating
         if not user_id:
             return False
-        profile = await self.get_profile(user_id)
-        if not profile:
-            return False
-        plan = profile.get("plan", "free")
-        if plan in ("monthly_pro", "annual_pro"):
-            # Unlimited plan — just record the generation
-            await self._execute_sync(
-                lambda: self.client.table("credit_ledger").insert({
-                    "user_id": user_id,
-                    "delta": 0,
-                    "reason": "book_generation_pro",
-                }).execute()
-            )
-            return True
-
-        # Atomic decrement: only if credits > 0 (handled in SQL RPC)
-        result = await self._execute_sync(
-            lambda: self.client.rpc("use_credit", {
-                "user_id_input": user_id,
-            }).execute()
-        )
-        success = result.data if result.data is not None else False
-
+        success = bool(await self.db.rpc("consume_generation_credit", {"user_id_input": user_id}))
+        self.invalidate_profile(user_id)
         if success:
             logger.info("credit_used", user_id=user_id)
-            # Record in ledger
-            await self._execute_sync(
-                lambda: self.client.table("credit_ledger").insert({
-                    "user_id": user_id,
-                    "delta": -1,
-                    "reason": "book_generation",
-                }).execute()
-            )
-            # Atomic increment of books_created
-            await self._execute_sync(
-                lambda: self.client.rpc("increment_books_created", {
-                    "user_id_input": user_id,
-                }).execute()
-            )
         else:
             logger.warning("credit_use_failed_insufficient", user_id=user_id)
-
         return success
 
     async def refund_credit(self, user_id: str, reason: str = "generation_failed"):
         """Refund 1 credit atomically (e.g., after a failed generation)."""
         if not self.client or not user_id:
             return
-        await self._execute_sync(
-            lambda: self.client.rpc("refund_credit", {
-                "user_id_input": user_id,
-            }).execute()
-        )
-        await self._execute_sync(
-            lambda: self.client.table("credit_ledger").insert({
-                "user_id": user_id,
-                "delta": 1,
-                "reason": reason,
-            }).execute()
-        )
+        await self.db.rpc("refund_generation_credit", {
+            "user_id_input": user_id,
+            "reason_input": reason,
+        })
+        self.invalidate_profile(user_id)
         logger.info("credit_refunded", user_id=user_id, reason=reason)
 
     async def set_plan(self, user_id: str, plan: str):
         if not self.client:
             return
-        await self._execute_sync(
-            lambda: self.client.table("profiles").update({"plan": plan}).eq("id", user_id).execute()
-        )
+        await self.db.update("profiles", {"plan": plan}, {"id": user_id})
+        self.invalidate_profile(user_id)
 
     async def set_stripe_customer(self, user_id: str, customer_id: str):
         if not self.client:
             return
-        await self._execute_sync(
-            lambda: self.client.table("profiles").update({"stripe_customer_id": customer_id}).eq("id", user_id).execute()
-        )
+        await self.db.update("profiles", {"stripe_customer_id": customer_id}, {"id": user_id})
+        self.invalidate_profile(user_id)
 
     async def get_credits(self, user_id: str) -> int:
         if not self.client:
@@ -140,12 +118,7 @@ class SupabaseService:
     async def record_purchase(self, user_id: str, purchase_data: dict):
         if not self.client:
             return
-        await self._execute_sync(
-            lambda: self.client.table("purchases").insert({
-                "user_id": user_id,
-                **purchase_data,
-            }).execute()
-        )
+        await self.db.insert("purchases", {"user_id": user_id, **purchase_data})
         logger.info("purchase_recorded", user_id=user_id, plan_id=purchase_data.get("plan_id"))
 
     # ── Generation History ────────────────────────────────────────────────
@@ -158,16 +131,14 @@ class SupabaseService:
         if not self.client or not user_id:
             return
         try:
-            await self._execute_sync(
-                lambda: self.client.table("generation_history").insert({
-                    "user_id": user_id,
-                    "generation_id": generation_id,
-                    "template_slug": template_slug,
-                    "num_photos": num_photos,
-                    "status": "started",
-                    "wizard_inputs": wizard_inputs,
-                }).execute()
-            )
+            await self.db.insert("generation_history", {
+                "user_id": user_id,
+                "generation_id": generation_id,
+                "template_slug": template_slug,
+                "num_photos": num_photos,
+                "status": "started",
+                "wizard_inputs": wizard_inputs,
+            })
         except Exception:
             logger.warning("generation_history_insert_failed", exc_info=True)
 
@@ -179,17 +150,12 @@ class SupabaseService:
         if not self.client:
             return
         try:
-            await self._execute_sync(
-                lambda: self.client.table("generation_history")
-                .update({
-                    "status": status,
-                    "num_pages": num_pages,
-                    "duration_ms": duration_ms,
-                    "completed_at": "now()",
-                })
-                .eq("generation_id", generation_id)
-                .execute()
-            )
+            await self.db.update("generation_history", {
+                "status": status,
+                "num_pages": num_pages,
+                "duration_ms": duration_ms,
+                "completed_at": "now()",
+            }, {"generation_id": generation_id})
         except Exception:
             logger.warning("generation_history_update_failed", exc_info=True)
 
@@ -198,16 +164,11 @@ class SupabaseService:
         if not self.client:
             return
         try:
-            await self._execute_sync(
-                lambda: self.client.table("generation_history")
-                .update({
-                    "status": "failed",
-                    "error_message": error_message[:500],
-                    "completed_at": "now()",
-                })
-                .eq("generation_id", generation_id)
-                .execute()
-            )
+            await self.db.update("generation_history", {
+                "status": "failed",
+                "error_message": error_message[:500],
+                "completed_at": "now()",
+            }, {"generation_id": generation_id})
         except Exception:
             logger.warning("generation_history_update_failed", exc_info=True)
 
@@ -218,13 +179,11 @@ class SupabaseService:
         if not self.client:
             return
         try:
-            await self._execute_sync(
-                lambda: self.client.table("payment_audit_log").insert({
-                    "user_id": user_id,
-                    "event_type": event_type,
-                    "payload": payload,
-                }).execute()
-            )
+            await self.db.insert("payment_audit_log", {
+                "user_id": user_id,
+                "event_type": event_type,
+                "payload": payload,
+            })
         except Exception:
             logger.warning("payment_audit_log_failed", exc_info=True)
 
@@ -234,9 +193,8 @@ class SupabaseService:
         if not self.client or not user_id:
             return
         data["updated_at"] = "now()"
-        await self._execute_sync(
-            lambda: self.client.table("profiles").update(data).eq("id", user_id).execute()
-        )
+        await self.db.update("profiles", data, {"id": user_id})
+        self.invalidate_profile(user_id)
         logger.info("profile_updated", user_id=user_id, fields=list(data.keys()))
 
     async def upload_avatar(self, user_id: str, file_bytes: bytes, content_type: str) -> str:
@@ -270,6 +228,7 @@ class SupabaseService:
         await self._execute_sync(
             lambda: self.client.auth.admin.delete_user(user_id)
         )
+        self.invalidate_profile(user_id)
         logger.info("account_deleted", user_id=user_id)
 
     # ── Usage / History ────────────────────────────────────────────────────
@@ -277,39 +236,33 @@ class SupabaseService:
     async def get_generation_history(self, user_id: str, limit: int = 50) -> list:
         if not self.client or not user_id:
             return []
-        result = await self._execute_sync(
-            lambda: self.client.table("generation_history")
-            .select("*")
-            .eq("user_id", user_id)
-            .order("created_at", desc=True)
-            .limit(limit)
-            .execute()
+        return await self.db.select(
+            "generation_history", filters={"user_id": user_id}, order="created_at", desc=True, limit=limit,
         )
-        return result.data or []
 
     async def get_credit_history(self, user_id: str, limit: int = 100) -> list:
         if not self.client or not user_id:
             return []
-        result = await self._execute_sync(
-            lambda: self.client.table("credit_ledger")
-            .select("*")
-            .eq("user_id", user_id)
-            .order("created_at", desc=True)
-            .limit(limit)
-            .execute()
+        return await self.db.select(
+            "credit_ledger", filters={"user_id": user_id}, order="created_at", desc=True, limit=limit,
         )
-        return result.data or []
 
     # ── Contact ────────────────────────────────────────────────────────────
 
     async def create_contact_submission(self, data: dict):
         if not self.client:
             return
-        await self._execute_sync(
-            lambda: self.client.table("contact_submissions").insert(data).execute()
-        )
+        await self.db.insert("contact_submissions", data)
         logger.info("contact_submitted", email=data.get("email"))
 
+    # ── Marketplace ────────────────────────────────────────────────────────
+
+    async def list_marketplace_designs(self) -> list:
+        """Every marketplace design (the catalogue snapshot's source)."""
+        if not self.client:
+            return []
+        return await self.db.select("marketplace_designs")
+
     # ── Referral System ────────────────────────────────────────────────────
 
     async def get_or_create_referral_code(self, user_id: str) -> str:
@@ -320,26 +273,16 @@ class SupabaseService:
             return profile["referral_code"]
 
         code = secrets.token_urlsafe(6)
-        await self._execute_sync(
-            lambda: self.client.table("profiles")
-            .update({"referral_code": code})
-            .eq("id", user_id)
-            .execute()
-        )
+        await self.db.update("profiles", {"referral_code": code}, {"id": user_id})
+        self.invalidate_profile(user_id)
         return code
 
     async def get_referral_stats(self, user_id: str) -> dict:
         if not self.client or not user_id:
             return {"total_referrals": 0, "credits_earned": 0, "referrals": []}
-        result = await self._execute_sync(
-            lambda: self.client.table("referrals")
-            .select("*")
-            .eq("referrer_id", user_id)
-            .order("created_at", desc=True)
-            .limit(50)
-            .execute()
+        referrals = await self.db.select(
+            "referrals", filters={"referrer_id": user_id}, order="created_at", desc=True, limit=50,
         )
-        referrals = result.data or []
         total = len(referrals)
         credits_earned = sum(r.get("credits_awarded", 0) for r in referrals)
         return {
@@ -352,82 +295,76 @@ class SupabaseService:
         if not self.client:
             return False
         try:
-            result = await self._execute_sync(
-                lambda: self.client.rpc("process_referral", {
-                    "referred_user_id_input": referred_user_id,
-                    "referral_code_input": referral_code,
-                    "credits_per_referral": credits,
-                }).execute()
-            )
-            success = result.data if result.data is not None else False
+            result = await self.db.rpc("process_referral", {
+                "referred_user_id_input": referred_user_id,
+                "referral_code_input": referral_code,
+                "credits_per_referral": credits,
+            })
+            success = result if result is not None else False
+            self.invalidate_profile(referred_user_id)
             if success:
-                logger.info("referral_processed", referred_user_id=referred_user_id, code=referral_code)
+                referrer_id = await self._invalidate_referrer(referral_code)
+                logger.info(
+                    "referral_processed",
+                    referred_user_id=referred_user_id,
+                    referrer_id=referrer_id,
+                    code=referral_code,
+                )
             return success
         except Exception:
             logger.warning("referral_processing_failed", exc_info=True)
             return False
 
+    async def _invalidate_referrer(self, referral_code: str) -> str | None:
+        """Forget the cached profile of the code's owner (the referral RPC credited them too)."""
+        try:
+            referrer = await self.db.select_one("profiles", "id", filters={"referral_code": referral_code})
+        except Exception:
+            logger.warning("referrer_lookup_failed", code=referral_code, exc_info=True)
+            return None
+        if not referrer:
+            return None
+        self.invalidate_profile(referrer["id"])
+        return referrer["id"]
+
     # ── Book Drafts ────────────────────────────────────────────────────────
 
     async def list_drafts(self, user_id: str, limit: int = 50) -> list:
         if not self.client or not user_id:
             return []
-        result = await self._execute_sync(
-            lambda: self.client.table("book_drafts")
-            .select("id, title, template_slug, status, num_photos, num_pages, updated_at, created_at")
-            .eq("user_id", user_id)
-            .order("updated_at", desc=True)
-            .limit(limit)
-            .execute()
+        return await self.db.select(
+            "book_drafts",
+            "id, title, template_slug, status, num_photos, num_pages, updated_at, created_at",
+            filters={"user_id": user_id},
+            order="updated_at",
+            desc=True,
+            limit=limit,
         )
-        return result.data or []
 
     async def get_draft(self, draft_id: str, user_id: str) -> dict | None:
         if not self.client:
             return None
-        result = await self._execute_sync(
-            lambda: self.client.table("book_drafts")
-            .select("*")
-            .eq("id", draft_id)
-            .eq("user_id", user_id)
-            .single()
-            .execute()
-        )
-        return result.data
+        return await self.db.select_one("book_drafts", filters={"id": draft_id, "user_id": user_id})
 
     async def create_draft(self, user_id: str, data: dict) -> dict:
         if not self.client:
             return {}
         data["user_id"] = user_id
-        result = await self._execute_sync(
-            lambda: self.client.table("book_drafts").insert(data).execute()
-        )
-        return result.data[0] if result.data else {}
+        rows = await self.db.insert("book_drafts", data, returning=True)
+        return rows[0] if rows else {}
 
     async def update_draft(self, draft_id: str, user_id: str, data: dict) -> dict:
         if not self.client:
             return {}
         data["updated_at"] = "now()"
         data["last_auto_saved_at"] = "now()"
-        result = await self._execute_sync(
-            lambda: self.client.table("book_drafts")
-            .update(data)
-            .eq("id", draft_id)
-            .eq("user_id", user_id)
-            .execute()
-        )
-        return result.data[0] if result.data else {}
+        rows = await self.db.update("book_drafts", data, {"id": draft_id, "user_id": user_id}, returning=True)
+        return rows[0] if rows else {}
 
     async def delete_draft(self, draft_id: str, user_id: str):
         if not self.client:
             return
-        await self._execute_sync(
-            lambda: self.client.table("book_drafts")
-            .delete()
-            .eq("id", draft_id)
-            .eq("user_id", user_id)
-            .execute()
-        )
+        await self.db.delete("book_drafts", {"id": draft_id, "user_id": user_id})
         # Also delete associated photos from storage
         try:
             await self._execute_sync(
@@ -438,74 +375,71 @@ class SupabaseService:
         except Exception:
             logger.warning("draft_photos_cleanup_failed", draft_id=draft_id, exc_info=True)
 
-    async def upload_draft_photo(self, user_id: str, draft_id: str, photo_index: int,
-                                  file_bytes: bytes, content_type: str, original_name: str = "") -> str:
-        if not self.client:
-            return ""
+    @staticmethod
+    def draft_photo_path(user_id: str, draft_id: str, photo_index: int, content_type: str) -> str:
         ext = content_type.split("/")[-1] if "/" in content_type else "jpg"
-        path = f"{user_id}/{draft_id}/{photo_index}.{ext}"
+        return f"{user_id}/{draft_id}/{photo_index}.{ext}"
+
+    async def put_draft_photo_object(self, path: str, file_bytes: bytes, content_type: str):
+        """Upload (or overwrite) one draft photo object in storage."""
+        if not self.client:
+            return
         await self._execute_sync(
             lambda: self.client.storage.from_("book-photos").upload(
                 path, file_bytes,
                 file_options={"content-type": content_type, "upsert": "true"},
             )
         )
-        # Record in book_draft_photos
-        await self._execute_sync(
-            lambda: self.client.table("book_draft_photos").upsert({
-                "draft_id": draft_id,
-                "user_id": user_id,
-                "photo_index": photo_index,
-                "original_name": original_name,
-                "storage_path": path,
-                "mime_type": content_type,
-                "file_size_bytes": len(file_bytes),
-            }, on_conflict="draft_id,photo_index").execute()
+
+    async def upsert_draft_photos(self, rows: list[dict]):
+        """Record uploaded draft photos in ``book_draft_photos`` in one bulk upsert."""
+        if not self.client or not rows:
+            return
+        await self.db.upsert("book_draft_photos", rows, on_conflict="draft_id,photo_index")
+
+    async def list_draft_photos(self, draft_id: str, user_id: str) -> list:
+        if not self.client:
+            return []
+        return await self.db.select(
+            "book_draft_photos",
+            "photo_index, storage_path, mime_type, file_size_bytes, content_sha256",
+            filters={"draft_id": draft_id, "user_id": user_id},
+            order="photo_index",
+        )
+
+    async def download_draft_photo(self, storage_path: str) -> bytes:
+        if not self.client:
+            return b""
+        return await self._execute_sync(
+            lambda: self.client.storage.from_("book-photos").download(storage_path)
         )
-        return path
 
     # ── PDF Download Tracking ──────────────────────────────────────────────
 
     async def record_pdf_download(self, user_id: str | None, data: dict):
+        """Queue a pdf_downloads row; it is bulk-inserted in the background."""
         if not self.client:
             return
-        try:
-            await self._execute_sync(
-                lambda: self.client.table("pdf_downloads").insert({
-                    "user_id": user_id,
-                    **data,
-                }).execute()
-            )
-            logger.info("pdf_download_recorded", user_id=user_id)
-        except Exception:
-            logger.warning("pdf_download_record_failed", exc_info=True)
+        get_event_buffer().add("pdf_downloads", {"user_id": user_id, **data})
+        logger.info("pdf_download_recorded", user_id=user_id)
 
     # ── Event Tracking ─────────────────────────────────────────────────────
 
-    async def batch_insert_events(self, events: list[dict]):
+    async def batch_insert_events(self, events: list[dict]) -> int:
+        """Queue events for background bulk insert; returns how many were buffered."""
         if not self.client or not events:
-            return
-        try:
-            await self._execute_sync(
-                lambda: self.client.table("events").insert(events).execute()
-            )
-        except Exception:
-            logger.warning("batch_event_insert_failed", count=len(events), exc_info=True)
+            return 0
+        return get_event_buffer().add_many("events", events)
 
     async def track_event(self, user_id: str | None, event_type: str, category: str, payload: dict = None):
         if not self.client:
             return
-        try:
-            await self._execute_sync(
-                lambda: self.client.table("events").insert({
-                    "user_id": user_id,
-                    "event_type": event_type,
-                    "event_category": category,
-                    "payload": payload or {},
-                }).execute()
-            )
-        except Exception:
-            logger.warning("event_track_failed", exc_info=True)
+        get_event_buffer().add("events", {
+            "user_id": user_id,
+            "event_type": event_type,
+            "event_category": category,
+            "payload": payload or {},
+        })
 
     # ── Ban Check ──────────────────────────────────────────────────────────
 
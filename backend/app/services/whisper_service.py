@@ -1,4 +1,3 @@
-import asyncio
 import io
 import time
 
@@ -6,6 +5,7 @@ import structlog
 from faster_whisper import WhisperModel
 
 from app.interfaces.stt_service import AbstractSTTService
+from app.services.executors import STT, get_executor
 
 logger = structlog.get_logger()
 
@@ -21,7 +21,7 @@ class WhisperService(AbstractSTTService):
     async def transcribe(self, audio_bytes: bytes, mime_type: str, language: str | None = None) -> str:
         logger.info("transcription_start", audio_size_bytes=len(audio_bytes), language=language)
         t0 = time.perf_counter()
-        result = await asyncio.to_thread(self._transcribe_sync, audio_bytes, language)
+        result = await get_executor(STT).run(self._transcribe_sync, audio_bytes, language)
         duration_ms = round((time.perf_counter() - t0) * 1000, 1)
         logger.info("transcription_complete", duration_ms=duration_ms, text_length=len(result))
         return result
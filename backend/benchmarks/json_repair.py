@@ -0,0 +1,222 @@
+"""
+JSON extraction/repair fuzz and benchmark harness for AI responses.
+
+Exercises app.services.parsing.json_extractor.parse_json three ways:
+
+- fixtures   every ``fixtures/*.txt`` response (truncated, fenced, noisy)
+             must decode to its ``*.expected.json``
+- fuzz       random truncation points of a synthetic book-sized response
+             must always recover a value of the original's type, and random
+             byte mutations may only raise json.JSONDecodeError
+- timing     parse_json on the full, unfenced and truncated response and on
+             each fixture (well-formed input should stay on the C decoder)
+
+Exits non-zero when a fixture or fuzz check fails, so it doubles as a
+regression check after touching the extractor.
+
+Usage (from backend/):
+    python -m benchmarks.json_repair
+    python -m benchmarks.json_repair --truncations 2000 --mutations 5000 --repeat 50
+    python -m benchmarks.json_repair --seed 3 -o json_repair.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import structlog
+
+from app.services.parsing.json_extractor import parse_json
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+_WORDS = (
+    'we laughed all the way home under a sky full of "late summer" light and '
+    "promised to come back every year to the little café by the sea \\ twice"
+).split()
+# Characters that break JSON structure when they land in the wrong place
+_MUTATION_CHARS = '{}[],:"\\ax\x01'
+
+
+# ── Synthetic inputs ─────────────────────────────────────────────────────
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def synthetic_book(rng: random.Random, chapters: int = 14, spreads: int = 12) -> dict:
+    """A Stage D-shaped response: chapters of spreads with long text fields."""
+    return {
+        "title": "Our Year",
+        "reasoning": _text(rng, 40),
+        "chapters": [
+            {
+                "chapter_index": c,
+                "title": _text(rng, 3),
+                "score": 0.75,
+                "flags": [True, None, False],
+                "spreads": [
+                    {
+                        "spread_index": s,
+                        "layout_id": "TWO_BALANCED",
+                        "photo_indices": [c * 10 + s, c * 10 + s + 1],
+                        "caption": _text(rng, 12),
+                        "body": _text(rng, 60),
+                    }
+                    for s in range(spreads)
+                ],
+            }
+            for c in range(chapters)
+        ],
+    }
+
+
+def _fenced(doc: Any, closed: bool = True) -> str:
+    body = json.dumps(doc, indent=2, ensure_ascii=False)
+    return f"Here is the book:\n```json\n{body}" + ("\n```\nDone." if closed else "")
+
+
+# ── Checks ───────────────────────────────────────────────────────────────
+
+def check_fixtures() -> list[dict]:
+    """Decode every fixture and compare with its expected value."""
+    results = []
+    for path in sorted(FIXTURES_DIR.glob("*.txt")):
+        expected_path = path.with_suffix(".expected.json")
+        text = path.read_text(encoding="utf-8")
+        entry: dict = {"fixture": path.name, "chars": len(text)}
+        try:
+            data = parse_json(text)
+            entry["ok"] = data == json.loads(expected_path.read_text(encoding="utf-8"))
+        except Exception as exc:
+            entry.update(ok=False, error=f"{type(exc).__name__}: {exc}")
+        results.append(entry)
+    return results
+
+
+def fuzz_truncation(doc: dict, rng: random.Random, runs: int) -> dict:
+    """Cut an unterminated fenced response at random points; each cut must still decode."""
+    raw = _fenced(doc, closed=False)
+    start = raw.index("{")
+    failures = []
+    for _ in range(runs):
+        cut = rng.randrange(start + 1, len(raw))
+        try:
+            if not isinstance(parse_json(raw[:cut]), dict):
+                failures.append({"cut": cut, "error": "not a dict"})
+        except Exception as exc:
+            failures.append({"cut": cut, "error": f"{type(exc).__name__}: {exc}"})
+    return {"runs": runs, "chars": len(raw), "failures": failures[:10], "failure_count": len(failures)}
+
+
+def fuzz_mutations(doc: dict, rng: random.Random, runs: int) -> dict:
+    """Corrupt random characters; parse_json may give up only with JSONDecodeError."""
+    raw = _fenced(doc, closed=False)
+    undecodable, failures = 0, []
+    for _ in range(runs):
+        chars = list(raw[: rng.randrange(1, 3000)])
+        for _ in range(3):
+            chars[rng.randrange(len(chars))] = rng.choice(_MUTATION_CHARS)
+        text = "".join(chars)
+        try:
+            parse_json(text)
+        except json.JSONDecodeError:
+            undecodable += 1
+        except Exception as exc:
+            failures.append({"input": text[:200], "error": f"{type(exc).__name__}: {exc}"})
+    return {"runs": runs, "undecodable": undecodable, "failures": failures[:10], "failure_count": len(failures)}
+
+
+# ── Timing ───────────────────────────────────────────────────────────────
+
+def _summary(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+    p95_idx = max(0, math.ceil(0.95 * len(ordered)) - 1)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[p95_idx], 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+        "runs": len(ordered),
+    }
+
+
+def _time(fn: Callable[[str], Any], text: str, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - t) * 1000)
+    return {"chars": len(text), **_summary(samples)}
+
+
+def timings(doc: dict, repeat: int) -> dict:
+    raw = _fenced(doc, closed=False)
+    inputs = {
+        "full_fenced": _fenced(doc),
+        "full_unfenced": "Sure! " + json.dumps(doc, indent=2, ensure_ascii=False),
+        "truncated_80pct": raw[: int(len(raw) * 0.8)],
+        "truncated_50pct": raw[: int(len(raw) * 0.5)],
+    }
+    for path in sorted(FIXTURES_DIR.glob("*.txt")):
+        inputs[f"fixture:{path.stem}"] = path.read_text(encoding="utf-8")
+    return {name: _time(parse_json, text, repeat) for name, text in inputs.items()}
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--truncations", type=int, default=400, help="random truncation points to decode")
+    parser.add_argument("--mutations", type=int, default=2000, help="randomly corrupted inputs to decode")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per timed input (p50/p95 over these)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Repairs log at info/debug on every call; keep the output to the report
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    rng = random.Random(args.seed)
+    doc = synthetic_book(rng)
+
+    fixtures = check_fixtures()
+    truncation = fuzz_truncation(doc, rng, args.truncations)
+    mutation = fuzz_mutations(doc, rng, args.mutations)
+    report = {
+        "python": sys.version.split()[0],
+        "config": vars(args),
+        "fixtures": fixtures,
+        "truncation": truncation,
+        "mutation": mutation,
+        "timings": timings(doc, args.repeat),
+    }
+
+    failed_fixtures = [f["fixture"] for f in fixtures if not f["ok"]]
+    print(
+        f"fixtures {len(fixtures) - len(failed_fixtures)}/{len(fixtures)} ok"
+        f"  truncations {truncation['runs'] - truncation['failure_count']}/{truncation['runs']} recovered"
+        f"  mutations {mutation['failure_count']} unexpected errors"
+        f"  full_fenced p50 {report['timings']['full_fenced']['p50_ms']} ms"
+        f"  truncated_80pct p50 {report['timings']['truncated_80pct']['p50_ms']} ms",
+        file=sys.stderr,
+    )
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 1 if failed_fixtures or truncation["failure_count"] or mutation["failure_count"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
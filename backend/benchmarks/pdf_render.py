@@ -0,0 +1,313 @@
+"""
+PDF render benchmark with synthetic books.
+
+Builds MemoryBookDrafts of several sizes that cycle through every page
+layout, generates synthetic photos in memory, and times each stage of
+PlaywrightPdfGenerator separately and end to end:
+
+- plan            _plan_photo_slots (recorder pass over every page)
+- encode          _encode_photos_parallel
+- render_pages    render_page for the whole book (plus a per-page distribution)
+- fonts           build_fonts_css (subset cache warm after the first repeat)
+- build_document  _build_document
+- render_pdf      _render_pdf (needs Chromium)
+- end_to_end      generate()
+
+Each (size, template) scenario runs in a fresh process, so its peak RSS is its
+own. Results are printed or written as JSON.
+
+Usage (from backend/):
+    python -m benchmarks.pdf_render                       # 10/50/200 pages × every template
+    python -m benchmarks.pdf_render --pages 50 --templates romantic --repeat 5
+    python -m benchmarks.pdf_render --skip-browser -o bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import math
+import multiprocessing
+import random
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import structlog
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.models.schemas import MemoryBookDraft, MemoryPageDraft
+from app.pdf_templates.export_profiles import PDF_EXPORT_PROFILES, get_export_profile
+from app.pdf_templates.font_subsetting import build_fonts_css
+from app.pdf_templates.page_renderer import RenderContext, render_page
+from app.pdf_templates.template_styles import TEMPLATE_STYLES
+from app.services.playwright_pdf_generator import (
+    PAGE_SIZES_MM,
+    PlaywrightPdfGenerator,
+    _SlotPhotoSources,
+    _StepTimer,
+    shutdown_browser,
+)
+
+DEFAULT_PAGE_COUNTS = (10, 50, 200)
+
+# (page_type, layout_type, page_side, photo count) — every branch of render_page
+_PAGE_SHAPES = [
+    ("content", "HERO_FULLBLEED", "", 1),
+    ("content", "TWO_BALANCED", "", 2),
+    ("content", "THREE_GRID", "", 3),
+    ("content", "FOUR_GRID", "", 4),
+    ("content", "SIX_MONTAGE", "", 6),
+    ("content", "WALL_8_10", "", 9),
+    ("content", "PHOTO_PLUS_QUOTE", "", 1),
+    ("content", "COLLAGE_PLUS_LETTER", "", 3),
+    ("content", "QUOTE_PAGE", "", 0),
+    ("content", "DEDICATION", "", 0),
+    ("content", "TOC_SIMPLE", "", 0),
+    ("content", "FALLBACK", "", 2),
+    ("content", "HERO_FULLBLEED", "left", 3),
+    ("content", "HERO_FULLBLEED", "right", 0),
+]
+
+_WORDS = (
+    "we laughed all the way home under a sky full of late summer light and "
+    "promised to come back every year to the little house by the sea"
+).split()
+
+
+# ── Synthetic inputs ─────────────────────────────────────────────────────
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize()
+
+
+def synthetic_draft(page_count: int, template_slug: str, photo_count: int, seed: int = 0) -> MemoryBookDraft:
+    """A book of ``page_count`` pages: cover, every layout in turn, back cover."""
+    rng = random.Random(seed)
+    next_photo = 0
+
+    def take(n: int) -> list[int]:
+        nonlocal next_photo
+        indices = [(next_photo + i) % photo_count for i in range(n)]
+        next_photo += n
+        return indices
+
+    pages = [MemoryPageDraft(page_number=0, page_type="cover", photo_indices=take(1), heading_text="Our Memory Book")]
+    for n in range(1, max(page_count - 1, 1)):
+        page_type, layout, side, photos = _PAGE_SHAPES[(n - 1) % len(_PAGE_SHAPES)]
+        pages.append(MemoryPageDraft(
+            page_number=n,
+            page_type=page_type,
+            layout_type=layout,
+            page_side=side,
+            photo_indices=take(photos),
+            heading_text=_text(rng, 4),
+            body_text=_text(rng, 40),
+            caption_text=_text(rng, 8),
+            quote_text=_text(rng, 12) if layout in ("PHOTO_PLUS_QUOTE", "QUOTE_PAGE") else "",
+        ))
+    if page_count > 1:
+        pages.append(MemoryPageDraft(page_number=page_count - 1, page_type="back_cover", heading_text="The End"))
+    return MemoryBookDraft(title="Benchmark Book", template_slug=template_slug, pages=pages[:page_count])
+
+
+def synthetic_photo(idx: int, long_edge: int) -> bytes:
+    """A camera-like JPEG: smooth gradient, shapes and noise, in a mix of aspect ratios."""
+    rng = random.Random(idx)
+    ratio = (4 / 3, 3 / 4, 1.0, 16 / 9)[idx % 4]
+    w, h = (long_edge, round(long_edge / ratio)) if ratio >= 1 else (round(long_edge * ratio), long_edge)
+    base = Image.linear_gradient("L").resize((w, h))
+    img = Image.merge("RGB", (
+        base,
+        base.rotate(90, expand=False).resize((w, h)),
+        Image.new("L", (w, h), rng.randint(40, 200)),
+    ))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(w), rng.randrange(h)
+        r = rng.randint(w // 20, w // 5)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    img = img.filter(ImageFilter.GaussianBlur(2))
+    noise = Image.effect_noise((w, h), 24).convert("RGB")
+    img = Image.blend(img, noise, 0.12)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+# ── Measurement ──────────────────────────────────────────────────────────
+
+def _summary(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+    p95_idx = max(0, math.ceil(0.95 * len(ordered)) - 1)
+    return {
+        "p50_ms": round(statistics.median(ordered), 1),
+        "p95_ms": round(ordered[p95_idx], 1),
+        "min_ms": round(ordered[0], 1),
+        "max_ms": round(ordered[-1], 1),
+        "runs": len(ordered),
+    }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def _run_scenario(
+    page_count: int,
+    template_slug: str,
+    profile_name: str,
+    photo_count: int,
+    photo_px: int,
+    repeat: int,
+    with_browser: bool,
+) -> dict:
+    profile = get_export_profile(profile_name)
+    gen = PlaywrightPdfGenerator(default_profile=profile_name)
+    draft = synthetic_draft(page_count, template_slug, photo_count)
+    photos = {i: synthetic_photo(i, photo_px) for i in range(photo_count)}
+    page_w_mm, page_h_mm = PAGE_SIZES_MM["a4"]
+    bleed_mm = 3.0
+    page_mm = (page_w_mm - 2 * bleed_mm, page_h_mm - 2 * bleed_mm)
+
+    timings: dict[str, list[float]] = {k: [] for k in ("plan", "encode", "render_pages", "fonts", "build_document")}
+    per_page_ms: list[float] = []
+    sizes: dict[str, int] = {"photo_input_bytes": sum(len(b) for b in photos.values())}
+    html = ""
+
+    for _ in range(repeat):
+        ctx = RenderContext(template_slug, None, None, page_mm)
+
+        t = time.perf_counter()
+        slot_boxes = gen._plan_photo_slots(draft, photos, ctx, profile)
+        timings["plan"].append((time.perf_counter() - t) * 1000)
+
+        t = time.perf_counter()
+        variants, stats = await gen._encode_photos_parallel(photos, slot_boxes, profile, None, _StepTimer(), len(slot_boxes))
+        timings["encode"].append((time.perf_counter() - t) * 1000)
+        sizes["photo_output_bytes"] = stats["total_output"]
+        sources = _SlotPhotoSources(variants, profile)
+
+        pages_html = []
+        t = time.perf_counter()
+        for page in draft.pages:
+            t_page = time.perf_counter()
+            pages_html.append(render_page(page, sources, ctx))
+            per_page_ms.append((time.perf_counter() - t_page) * 1000)
+        timings["render_pages"].append((time.perf_counter() - t) * 1000)
+        sizes["pages_html_bytes"] = sum(len(h) for h in pages_html)
+
+        t = time.perf_counter()
+        fonts_css = build_fonts_css(template_slug, draft) if profile.embed_fonts else ""
+        timings["fonts"].append((time.perf_counter() - t) * 1000)
+        sizes["fonts_css_bytes"] = len(fonts_css)
+
+        t = time.perf_counter()
+        html = gen._build_document(pages_html, page_w_mm, page_h_mm, bleed_mm, fonts_css, ctx.assets)
+        timings["build_document"].append((time.perf_counter() - t) * 1000)
+        sizes["document_html_bytes"] = len(html)
+        del pages_html, variants, sources
+
+    result: dict = {
+        "pages": page_count,
+        "template": template_slug,
+        "profile": profile_name,
+        "photos": photo_count,
+        "photo_slots": sum(len(b) for b in slot_boxes.values()),
+        "stages": {name: _summary(samples) for name, samples in timings.items()},
+        "render_page_per_page": _summary(per_page_ms),
+        "sizes": sizes,
+    }
+
+    if with_browser:
+        try:
+            render_ms, e2e_ms = [], []
+            pdf = b""
+            for _ in range(repeat):
+                t = time.perf_counter()
+                pdf = await gen._render_pdf(html, page_w_mm, page_h_mm, page_count)
+                render_ms.append((time.perf_counter() - t) * 1000)
+            sizes["pdf_bytes"] = len(pdf)
+            del html, pdf
+            for _ in range(repeat):
+                t = time.perf_counter()
+                pdf = await gen.generate(
+                    draft, photos, {}, {"page_size": "a4", "bleed_mm": bleed_mm}, export_profile=profile_name,
+                )
+                e2e_ms.append((time.perf_counter() - t) * 1000)
+                del pdf
+            result["stages"]["render_pdf"] = _summary(render_ms)
+            result["stages"]["end_to_end"] = _summary(e2e_ms)
+        except Exception as exc:  # no Chromium installed, sandbox limits, ...
+            result["browser_error"] = f"{type(exc).__name__}: {str(exc).splitlines()[0] if str(exc) else ''}"
+        finally:
+            await shutdown_browser()
+
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _scenario_process(*args) -> dict:
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    return asyncio.run(_run_scenario(*args))
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=list(DEFAULT_PAGE_COUNTS))
+    parser.add_argument("--templates", nargs="+", default=list(TEMPLATE_STYLES), choices=list(TEMPLATE_STYLES))
+    parser.add_argument("--profile", default="print", choices=list(PDF_EXPORT_PROFILES))
+    parser.add_argument("--photos", type=int, default=40, help="distinct synthetic photos per book")
+    parser.add_argument("--photo-px", type=int, default=3000, help="long edge of each synthetic photo")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage (p50/p95 over these)")
+    parser.add_argument("--skip-browser", action="store_true", help="skip _render_pdf and end-to-end runs")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    scenarios = [
+        (pages, slug, args.profile, args.photos, args.photo_px, args.repeat, not args.skip_browser)
+        for pages in args.pages
+        for slug in args.templates
+    ]
+    started = time.time()
+    results = []
+    # One process per scenario: isolated peak RSS and no warm caches leaking between sizes
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+        for scenario in scenarios:
+            result = pool.submit(_scenario_process, *scenario).result()
+            results.append(result)
+            print(
+                f"{result['pages']:>4} pages  {result['template']:<11}"
+                f"  render_pages p50 {result['stages']['render_pages']['p50_ms']:>8} ms"
+                f"  encode p50 {result['stages']['encode']['p50_ms']:>8} ms"
+                f"  rss {result['peak_rss_mb']} MB",
+                file=sys.stderr,
+            )
+
+    report = {
+        "started_at": started,
+        "python": sys.version.split()[0],
+        "config": vars(args),
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
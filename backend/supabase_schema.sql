@@ -775,6 +775,100 @@ END;
 $$ LANGUAGE plpgsql SECURITY DEFINER;
 
 
+-- ── P4.0: Single-round-trip credit RPCs ────────────────────────────────
+-- Each wraps the balance change and its ledger entry in one call/transaction.
+
+-- Generation credit: unlimited plans only log the generation; others spend 1
+-- credit if available. Returns FALSE when the profile is missing or empty.
+CREATE OR REPLACE FUNCTION consume_generation_credit(user_id_input UUID)
+RETURNS BOOLEAN AS $$
+DECLARE
+  user_plan TEXT;
+BEGIN
+  SELECT plan INTO user_plan FROM profiles WHERE id = user_id_input;
+  IF NOT FOUND THEN
+    RETURN FALSE;
+  END IF;
+
+  IF user_plan IN ('monthly_pro', 'annual_pro') THEN
+    INSERT INTO credit_ledger (user_id, delta, reason)
+    VALUES (user_id_input, 0, 'book_generation_pro');
+    RETURN TRUE;
+  END IF;
+
+  UPDATE profiles
+  SET credits = credits - 1,
+      books_created = books_created + 1,
+      updated_at = NOW()
+  WHERE id = user_id_input AND credits > 0;
+  IF NOT FOUND THEN
+    RETURN FALSE;
+  END IF;
+
+  INSERT INTO credit_ledger (user_id, delta, reason)
+  VALUES (user_id_input, -1, 'book_generation');
+  RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION refund_generation_credit(user_id_input UUID, reason_input TEXT)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE profiles
+  SET credits = credits + 1,
+      updated_at = NOW()
+  WHERE id = user_id_input;
+
+  INSERT INTO credit_ledger (user_id, delta, reason)
+  VALUES (user_id_input, 1, reason_input);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION grant_credits(user_id_input UUID, amount_input INT, reason_input TEXT)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE profiles
+  SET credits = credits + amount_input,
+      updated_at = NOW()
+  WHERE id = user_id_input;
+
+  INSERT INTO credit_ledger (user_id, delta, reason)
+  VALUES (user_id_input, amount_input, reason_input);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+
+-- ── P4.1: Keyset pagination & search indexes ───────────────────────────
+-- Admin and marketplace listings page by (sort column, id) instead of OFFSET,
+-- so each listing needs a matching composite index. The (created_at, id)
+-- indexes supersede the single-column created_at ones from P3.1.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DROP INDEX IF EXISTS idx_profiles_created;
+DROP INDEX IF EXISTS idx_purchases_created;
+CREATE INDEX IF NOT EXISTS idx_profiles_created_id ON profiles(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_updated_id ON profiles(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_credits_id ON profiles(credits, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_books_created_id ON profiles(books_created, id);
+CREATE INDEX IF NOT EXISTS idx_purchases_created_id ON purchases(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_purchases_user_created ON purchases(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_payment_audit_created_id ON payment_audit_log(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_design_sub_submitted_id ON design_submissions(submitted_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_contacts_created_id ON contact_submissions(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_admin_audit_created_id ON admin_audit_log(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_admin_audit_action_created ON admin_audit_log(action, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_marketplace_order ON marketplace_designs(sort_order, created_at DESC, id DESC);
+
+-- Search boxes use ILIKE '%term%' (3+ characters) or 'te%' (shorter terms);
+-- trigram indexes serve both
+CREATE INDEX IF NOT EXISTS idx_profiles_display_name_trgm ON profiles USING gin (display_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_marketplace_name_trgm ON marketplace_designs USING gin (name gin_trgm_ops);
+
+
+-- ── P4.2: Draft photo digests (skip unchanged re-uploads) ───────────────
+ALTER TABLE book_draft_photos ADD COLUMN IF NOT EXISTS content_sha256 TEXT;
+
+
 -- ── Storage bucket for book photos ─────────────────────────────────────
 -- Run manually in Supabase Dashboard > Storage if not auto-created:
 -- INSERT INTO storage.buckets (id, name, public) VALUES ('book-photos', 'book-photos', false);
@@ -515,14 +515,63 @@ export async function regenerateText(request) {
   });
 }
 
-export async function downloadBookPdf({ draft, images, templateSlug, designScale, photoAnalyses, filename, cropOverrides, filterOverrides, textStyleOverrides, positionOffsets, blendOverrides, sizeOverrides, signal, customPageSize, onProgress, transformBlob }) {
+export async function downloadBookPdf({ draft, images, templateSlug, designScale, photoAnalyses, filename, cropOverrides, filterOverrides, textStyleOverrides, positionOffsets, blendOverrides, sizeOverrides, signal, customPageSize, onProgress, transformBlob, exportProfile, sessionId, draftId }) {
   log.action('bookApi', 'downloadPdf:start', { imageCount: images?.length, template: templateSlug, pageSize: designScale?.pageSize });
+  const BASE = import.meta.env.VITE_API_BASE_URL ?? '';
+  const pdfFilename = filename || `${draft.title || 'memory-book'}.pdf`;
+
+  // Photos already on the server (analysis session or saved draft): send JSON only, no re-upload
+  if (sessionId || draftId) {
+    const isCustom = designScale?.pageSize === 'custom';
+    const body = {
+      session_id: sessionId || null,
+      draft_id: draftId || null,
+      draft,
+      template_slug: templateSlug || 'romantic',
+      page_size: isCustom ? 'custom' : (designScale?.pageSize || 'a4'),
+      bleed_mm: designScale?.bleedMm ?? 3,
+      margin_mm: designScale?.marginMm ?? 12,
+      photo_analyses: photoAnalyses?.length ? photoAnalyses : null,
+      overrides: {
+        crop: cropOverrides || {},
+        filter: filterOverrides || {},
+        textStyle: textStyleOverrides || {},
+        position: positionOffsets || {},
+        blend: blendOverrides || {},
+        size: sizeOverrides || {},
+      },
+      export_profile: exportProfile || '',
+    };
+    if (isCustom && customPageSize) {
+      body.custom_width = customPageSize.width;
+      body.custom_height = customPageSize.height;
+      body.custom_unit = customPageSize.unit || 'mm';
+    }
+    try {
+      onProgress?.({ stage: 'printing', current: 0, total: 0 });
+      const downloadToken = await _downloadPdfViaSSE(BASE, JSON.stringify(body), signal, onProgress, '/api/books/pdf/session/stream');
+      await _downloadPdfByToken(BASE, downloadToken, signal, transformBlob, pdfFilename);
+      return;
+    } catch (err) {
+      if (err.name === 'AbortError' || signal?.aborted) {
+        throw new Error('PDF download cancelled.');
+      }
+      // Only 410 (session expired or photos gone) means uploading them will help
+      if (err.status !== 410) throw err;
+      if (import.meta.env.DEV) {
+        console.warn('Session PDF export failed, uploading photos instead:', err.message);
+      }
+    }
+  }
+
   // Pre-compress images for PDF quality (2400px, 0.92 quality)
   const compressed = await compressImagesForPDF(images, { onProgress });
   const form = new FormData();
   compressed.forEach(img => { if (isUploadable(img.file)) form.append('images', img.file); });
   form.append('draft_json', JSON.stringify(draft));
   form.append('template_slug', templateSlug || 'romantic');
+  // 'print' (default) | 'screen' | 'preview' — lighter profiles trade image quality for speed
+  if (exportProfile) form.append('export_profile', exportProfile);
 
   if (designScale) {
     const isCustom = designScale.pageSize === 'custom';
@@ -562,19 +611,10 @@ export async function downloadBookPdf({ draft, images, templateSlug, designScale
 
   onProgress?.({ stage: 'printing', current: 0, total: 0 });
 
-  const BASE = import.meta.env.VITE_API_BASE_URL ?? '';
-
   // Try SSE streaming endpoint first (scalable, no timeout issues)
   try {
     const downloadToken = await _downloadPdfViaSSE(BASE, form, signal, onProgress);
-    // Fetch the actual PDF via the download token
-    const pdfRes = await authFetch(`${BASE}/api/books/pdf/download/${downloadToken}`, {
-      signal,
-    });
-    if (!pdfRes.ok) throw new Error(`PDF download failed: ${pdfRes.status}`);
-    let blob = await pdfRes.blob();
-    if (transformBlob) blob = await transformBlob(blob);
-    _triggerBlobDownload(blob, filename || `${draft.title || 'memory-book'}.pdf`);
+    await _downloadPdfByToken(BASE, downloadToken, signal, transformBlob, pdfFilename);
     return;
   } catch (err) {
     if (err.name === 'AbortError' || signal?.aborted) {
@@ -602,7 +642,7 @@ export async function downloadBookPdf({ draft, images, templateSlug, designScale
     });
 
     if (transformBlob) blob = await transformBlob(blob);
-    _triggerBlobDownload(blob, filename || `${draft.title || 'memory-book'}.pdf`);
+    _triggerBlobDownload(blob, pdfFilename);
   } catch (err) {
     if (err.name === 'AbortError') {
       throw new Error(signal?.aborted ? 'PDF download cancelled.' : 'PDF generation timed out. Try reducing the number of pages or images.');
@@ -611,17 +651,31 @@ export async function downloadBookPdf({ draft, images, templateSlug, designScale
   }
 }
 
-/** Read SSE events from /pdf/stream and return the download token. */
-async function _downloadPdfViaSSE(base, form, signal, onProgress) {
-  const res = await authFetch(`${base}/api/books/pdf/stream`, {
+/** Fetch a generated PDF by its download token and hand it to the browser. */
+async function _downloadPdfByToken(base, downloadToken, signal, transformBlob, filename) {
+  const pdfRes = await authFetch(`${base}/api/books/pdf/download/${downloadToken}`, {
+    signal,
+  });
+  if (!pdfRes.ok) throw new Error(`PDF download failed: ${pdfRes.status}`);
+  let blob = await pdfRes.blob();
+  if (transformBlob) blob = await transformBlob(blob);
+  _triggerBlobDownload(blob, filename);
+}
+
+/** Read SSE events from a PDF stream endpoint and return the download token.
+ *  `body` is multipart FormData, or a JSON string for /pdf/session/stream. */
+async function _downloadPdfViaSSE(base, body, signal, onProgress, path = '/api/books/pdf/stream') {
+  const res = await authFetch(`${base}${path}`, {
     method: 'POST',
-    body: form,
+    body,
+    headers: typeof body === 'string' ? { 'Content-Type': 'application/json' } : undefined,
     signal,
   });
 
   if (!res.ok) {
     const text = await res.text();
-    throw new Error(text || `PDF stream failed: ${res.status}`);
+    // status lets callers tell "photos gone" (410) from other failures
+    throw Object.assign(new Error(text || `PDF stream failed: ${res.status}`), { status: res.status });
   }
 
   const reader = res.body.getReader();
@@ -36,7 +36,7 @@ export default function MyBooksPage() {
     try {
       const res = await getDraft(id);
       const data = await res.json();
-      hydrateFromExport(data);
+      hydrateFromExport({ ...data, draftId: id });
       navigate('/book/view');
     } catch {
       toast.error('Failed to load book');
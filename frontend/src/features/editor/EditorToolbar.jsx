@@ -41,9 +41,11 @@ export default function EditorToolbar({ onToggleSidebar }) {
     commitEditorDraft();
     setIsDownloading(true);
     try {
-      const draft = useBookStore.getState().bookDraft;
+      const { bookDraft: draft, sessionId, draftId } = useBookStore.getState();
       await downloadBookPdf({
         draft,
+        sessionId,
+        draftId,
         images,
         templateSlug: selectedTemplate,
         designScale,
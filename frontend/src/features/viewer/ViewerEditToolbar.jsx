@@ -180,8 +180,11 @@ export default function ViewerEditToolbar() {
       // Pre-generate book JSON for embedding into the PDF
       const bookJsonString = await exportBook();
 
+      const { sessionId, draftId } = useBookStore.getState();
       await downloadBookPdf({
         draft: bookDraft,
+        sessionId,
+        draftId,
         images,
         templateSlug: selectedTemplate || bookDraft?.template_slug || 'romantic',
         designScale,
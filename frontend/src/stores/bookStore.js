@@ -24,8 +24,8 @@ const useBookStore = create((...a) => ({
     if (timer) clearInterval(timer);
     const ctrl = get()._abortController;
     if (ctrl) ctrl.abort();
-    // Atomic state replacement
-    set(payload);
+    // Atomic state replacement (draftId only survives if the payload sets it)
+    set({ draftId: null, ...payload });
     // Initialize editor from restored bookDraft
     get().initEditor();
   },
@@ -52,7 +52,7 @@ const useBookStore = create((...a) => ({
       isGenerating: false, generationProgress: 0, generationStage: '', generationPhase: 'idle',
       generationTotalPages: 0, generationCurrentPage: 0,
       _abortController: null, _questionRevealTimer: null,
-      sessionId: null, analysisComplete: false, planResult: null, generationId: null,
+      sessionId: null, draftId: null, analysisComplete: false, planResult: null, generationId: null,
       bookDraft: null, photoAnalyses: [], previewOnly: false, error: null, cartoonImages: [], cartoonLoading: false,
       customTheme: { pageBgColor: '#1a1020', headingColor: '#f9a8d4', bodyColor: '#e2e8f0', accentColor: '#c084fc', photoFrameStyle: 'rounded' },
       customDensityCount: 4, customPageSize: { width: 8.5, height: 11, unit: 'in' },
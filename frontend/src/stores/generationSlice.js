@@ -38,6 +38,8 @@ export const createGenerationSlice = (set, get) => ({
 
   // Multi-step session state
   sessionId: null,
+  // Saved draft the book was opened from (its photos are stored server-side)
+  draftId: null,
   analysisComplete: false,
   planResult: null,
 